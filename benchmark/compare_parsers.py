@@ -0,0 +1,423 @@
+"""Runs a local corpus through `w3.parser` and other HTML parsers, and compares their throughput,
+peak memory and trees.
+
+The parsers compared are `w3.parser`, the standard library `html.parser` (with a minimal tree
+builder on top of it), and lxml and html5lib if they are installed; missing ones are reported
+and skipped.
+Sources are files, directories, glob patterns or WARC files, as for `python -m w3`.
+
+For each parser the script reports:
+
+-   throughput, from the best of `--runs` parses of every page;
+-   peak memory, measured in a fresh process parsing every page in turn: the largest of the peak
+    traced by `tracemalloc` while parsing a single page, and of the growth of the maximum resident
+    set size over all pages, which also counts allocations made by C extensions;
+-   mismatches against the tree built by `w3.parser`: pages whose element outline (tag names and
+    depths) differs, and pages whose text differs once whitespace is collapsed.
+    The `html`, `head`, `body` and `tbody` elements, which parsers imply differently,
+    are left out of outlines.
+
+With `--json`, the results are also written to a file, along with the versions measured,
+to be tracked over time.
+
+Example:
+    $ python benchmark/compare_parsers.py corpus/ --runs 5 --json results.json
+"""
+
+import argparse
+import datetime
+import gc
+from html.parser import HTMLParser
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _ROOT)
+
+from w3.__main__ import iter_sources  # noqa: E402
+from w3.dom import Node  # noqa: E402
+from w3.parser import parse  # noqa: E402
+
+
+# Elements implied by some parsers and not by others, left out of outlines.
+_WRAPPERS = frozenset(['html', 'head', 'body', 'tbody'])
+
+_VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                            'meta', 'param', 'source', 'track', 'wbr'])
+
+# What is compared between trees: the element outline, as `(depth, tag name)` pairs in preorder,
+# and the text.
+_Description = Tuple[Tuple[Tuple[int, str], ...], str]
+
+
+class Candidate(NamedTuple):
+    """A parser taking part in the comparison."""
+
+    name: str
+    # Module whose absence makes the parser unavailable
+    module: str
+    # Turns the text of a page into the input of `parse`; not timed.
+    prepare: Callable[[str], Any]
+    parse: Callable[[Any], Any]
+    describe: Callable[[Any], _Description]
+
+
+class _TreeBuilder(HTMLParser):
+    """Minimal tree builder for `html.parser`.
+
+    End tags close the nearest open element of the same name, if any.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        # Elements as `[tag, children]`, children being elements and strings
+        self.root: list = ['#document', []]
+        self._open: List[list] = [self.root]
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        element = [tag, []]
+        self._open[-1][1].append(element)
+        if tag not in _VOID_ELEMENTS:
+            self._open.append(element)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._open[-1][1].append([tag, []])
+
+    def handle_endtag(self, tag: str) -> None:
+        for index in range(len(self._open) - 1, 0, -1):
+            if self._open[index][0] == tag:
+                del self._open[index:]
+                return
+
+    def handle_data(self, data: str) -> None:
+        self._open[-1][1].append(data)
+
+
+def _parse_stdlib(text: str) -> list:
+    builder = _TreeBuilder()
+    builder.feed(text)
+    builder.close()
+    return builder.root
+
+
+def _describe(walk: Iterator[Tuple[int, Optional[str], str]]) -> _Description:
+    """Builds a description out of `(depth, tag name, text)` items; those with no tag are text."""
+    outline = []
+    texts = []
+    for depth, tag, text in walk:
+        if tag is None:
+            texts.append(text)
+        else:
+            outline.append((depth, tag))
+    return tuple(outline), ' '.join(''.join(texts).split())
+
+
+def _walk_w3(document: Any) -> Iterator[Tuple[int, Optional[str], str]]:
+    stack = [(child, 0) for child in reversed(document._child_nodes._nodes)]
+    while stack:
+        node, depth = stack.pop()
+        if node.nodeType is Node.TEXT_NODE or node.nodeType is Node.CDATA_SECTION_NODE:
+            yield depth, None, node.nodeValue
+        elif node.nodeType is Node.ELEMENT_NODE:
+            if node.nodeName not in _WRAPPERS:
+                yield depth, node.nodeName, ''
+                depth += 1
+            stack.extend((child, depth) for child in reversed(node._child_nodes._nodes))
+
+
+def _walk_stdlib(root: list) -> Iterator[Tuple[int, Optional[str], str]]:
+    stack = [(child, 0) for child in reversed(root[1])]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, str):
+            yield depth, None, node
+            continue
+        if node[0] not in _WRAPPERS:
+            yield depth, node[0], ''
+            depth += 1
+        stack.extend((child, depth) for child in reversed(node[1]))
+
+
+def _walk_etree(root: Any) -> Iterator[Tuple[int, Optional[str], str]]:
+    """Walks an ElementTree-like tree, as built by lxml and html5lib.
+
+    Comments and processing instructions only give their tail.
+    """
+    # Items are elements to enter, or strings of text
+    stack: List[Tuple[Any, int]] = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, str):
+            yield depth, None, node
+            continue
+        tag = node.tag
+        if not isinstance(tag, str):
+            continue
+        tag = tag.rpartition('}')[2].lower()
+        if tag not in _WRAPPERS:
+            yield depth, tag, ''
+            depth += 1
+        items: List[Tuple[Any, int]] = []
+        if node.text:
+            items.append((node.text, depth))
+        for child in node:
+            items.append((child, depth))
+            if child.tail:
+                items.append((child.tail, depth))
+        stack.extend(reversed(items))
+
+
+def _parse_lxml(data: bytes) -> Any:
+    import lxml.html
+    return lxml.html.document_fromstring(data, parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+
+def _parse_html5lib(text: str) -> Any:
+    import html5lib
+    return html5lib.parse(text, treebuilder='etree', namespaceHTMLElements=False)
+
+
+CANDIDATES = [
+    Candidate('w3', 'w3.parser', lambda text: text, parse, lambda tree: _describe(_walk_w3(tree))),
+    Candidate('html.parser', 'html.parser', lambda text: text, _parse_stdlib,
+              lambda tree: _describe(_walk_stdlib(tree))),
+    Candidate('lxml', 'lxml.html', lambda text: text.encode('utf-8'), _parse_lxml,
+              lambda tree: _describe(_walk_etree(tree))),
+    Candidate('html5lib', 'html5lib', lambda text: text, _parse_html5lib,
+              lambda tree: _describe(_walk_etree(tree))),
+]
+
+
+def _is_available(candidate: Candidate) -> bool:
+    try:
+        importlib.import_module(candidate.module)
+    except ImportError:
+        return False
+    return True
+
+
+def _version(candidate: Candidate) -> str:
+    if candidate.name == 'w3':
+        return _git_revision()
+    if candidate.name == 'html.parser':
+        return platform.python_version()
+    module = importlib.import_module(candidate.module.partition('.')[0])
+    return str(getattr(module, '__version__', getattr(module, 'VERSION', '?')))
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return '?'
+
+
+def load_corpus(sources: List[str], pattern: str, encoding: str) -> List[Tuple[str, str]]:
+    """Reads every page found in `sources`, as `(name, text)` pairs."""
+    pages = []
+    for name, content in iter_sources(sources, pattern):
+        if isinstance(content, str):
+            with open(content, 'rb') as stream:
+                content = stream.read()
+        pages.append((name, content.decode(encoding, 'replace')))
+    return pages
+
+
+def measure_time(candidate: Candidate,
+                 pages: List[Tuple[str, str]],
+                 runs: int) -> Tuple[float, List[Optional[Any]]]:
+    """Parses every page `runs` times.
+
+    Returns:
+        The total of the best parse time of every page, and the tree of every page,
+        or `None` where parsing failed.
+    """
+    total = 0.0
+    trees: List[Optional[Any]] = []
+    for _, text in pages:
+        data = candidate.prepare(text)
+        best = None
+        tree = None
+        try:
+            for _ in range(runs):
+                tree = None
+                gc.collect()
+                started = time.perf_counter()
+                tree = candidate.parse(data)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+        except Exception:
+            trees.append(None)
+            continue
+        total += best
+        trees.append(tree)
+    return total, trees
+
+
+def measure_memory(candidate: Candidate,
+                   sources: List[str],
+                   pattern: str,
+                   encoding: str) -> Optional[float]:
+    """Measures the peak memory taken by parsing a page in a fresh process.
+
+    Returns:
+        The peak memory in megabytes, or `None` if the measure failed.
+    """
+    result = subprocess.run([sys.executable, os.path.abspath(__file__),
+                             '--memory-of', candidate.name, '--pattern', pattern,
+                             '--encoding', encoding, '--', *sources],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip())
+
+
+def _run_memory_child(name: str, sources: List[str], pattern: str, encoding: str) -> int:
+    candidate = next(candidate for candidate in CANDIDATES if candidate.name == name)
+    inputs = [candidate.prepare(text) for _, text in load_corpus(sources, pattern, encoding)]
+    gc.collect()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    traced = 0
+    for data in inputs:
+        tracemalloc.start()
+        try:
+            candidate.parse(data)
+        except Exception:
+            pass
+        traced = max(traced, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        gc.collect()
+    grown = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    # `ru_maxrss` is in kilobytes on Linux, and in bytes on macOS.
+    grown *= 1 if sys.platform == 'darwin' else 1024
+    print('%.2f' % (max(traced, grown) / (1024 * 1024)))
+    return 0
+
+
+def compare(reference: List[Optional[_Description]],
+            trees: List[Optional[Any]],
+            candidate: Candidate) -> Dict[str, Any]:
+    """Counts the pages whose outline or text differs from `reference`.
+
+    The index of the first page of each kind of mismatch is kept as well.
+    """
+    result: Dict[str, Any] = {'outline_mismatches': 0, 'text_mismatches': 0,
+                              'first_outline_mismatch': None, 'first_text_mismatch': None}
+    for index, (expected, tree) in enumerate(zip(reference, trees)):
+        if expected is None or tree is None:
+            continue
+        outline, text = candidate.describe(tree)
+        if outline != expected[0]:
+            result['outline_mismatches'] += 1
+            if result['first_outline_mismatch'] is None:
+                result['first_outline_mismatch'] = index
+        if text != expected[1]:
+            result['text_mismatches'] += 1
+            if result['first_text_mismatch'] is None:
+                result['first_text_mismatch'] = index
+    return result
+
+
+def main(argv: List[str]) -> int:
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument('sources', nargs='+',
+                           help='files, directories, glob patterns or WARC files to read')
+    arguments.add_argument('--runs', type=int, default=3,
+                           help='number of parses per page, the best of which is kept')
+    arguments.add_argument('--parsers',
+                           default=','.join(candidate.name for candidate in CANDIDATES),
+                           help='comma separated parsers to compare (default: %(default)s)')
+    arguments.add_argument('--pattern', default='*.html,*.htm',
+                           help='file name patterns searched for in directories')
+    arguments.add_argument('--encoding', default='utf-8',
+                           help='encoding of the pages (default: %(default)s)')
+    arguments.add_argument('--no-memory', action='store_true', help='do not measure peak memory')
+    arguments.add_argument('--json', metavar='FILE', help='file to write the results to, as JSON')
+    arguments.add_argument('--memory-of', help=argparse.SUPPRESS)
+    options = arguments.parse_args(argv)
+    if options.memory_of:
+        return _run_memory_child(options.memory_of, options.sources, options.pattern,
+                                 options.encoding)
+
+    names = [name.strip() for name in options.parsers.split(',') if name.strip()]
+    unknown = set(names) - {candidate.name for candidate in CANDIDATES}
+    if unknown:
+        print('error: unknown parsers: %s' % ', '.join(sorted(unknown)), file=sys.stderr)
+        return 2
+    try:
+        pages = load_corpus(options.sources, options.pattern, options.encoding)
+    except (OSError, ValueError) as error:
+        print('error: %s' % error, file=sys.stderr)
+        return 2
+    if not pages:
+        print('error: no pages found', file=sys.stderr)
+        return 2
+    size = sum(len(text.encode('utf-8')) for _, text in pages)
+    print('%d pages, %.1f MB, best of %d runs' % (len(pages), size / 1e6, options.runs))
+
+    # Trees are compared with the ones `w3.parser` builds, which is therefore always run.
+    w3_candidate = CANDIDATES[0]
+    _, w3_trees = measure_time(w3_candidate, pages, 1)
+    reference = [w3_candidate.describe(tree) if tree is not None else None for tree in w3_trees]
+    del w3_trees
+
+    results: Dict[str, Any] = {}
+    print('%-12s %10s %10s %10s %8s %10s %10s'
+          % ('parser', 'MB/s', 'pages/s', 'peak MB', 'errors', 'outline', 'text'))
+    for candidate in CANDIDATES:
+        if candidate.name not in names:
+            continue
+        if not _is_available(candidate):
+            print('%-12s not installed' % candidate.name)
+            results[candidate.name] = {'available': False}
+            continue
+        elapsed, trees = measure_time(candidate, pages, options.runs)
+        result: Dict[str, Any] = {
+            'available': True,
+            'version': _version(candidate),
+            'seconds': elapsed,
+            'mb_per_second': size / 1e6 / elapsed if elapsed else None,
+            'pages_per_second': len(pages) / elapsed if elapsed else None,
+            'errors': sum(tree is None for tree in trees),
+            'peak_mb': None if options.no_memory else measure_memory(
+                candidate, options.sources, options.pattern, options.encoding),
+        }
+        result.update(compare(reference, trees, candidate))
+        del trees
+        results[candidate.name] = result
+        print('%-12s %10.2f %10.1f %10s %8d %10d %10d' % (
+            candidate.name, result['mb_per_second'] or 0, result['pages_per_second'] or 0,
+            '-' if result['peak_mb'] is None else '%.1f' % result['peak_mb'], result['errors'],
+            result['outline_mismatches'], result['text_mismatches']))
+    for name, result in results.items():
+        for kind in ('outline', 'text'):
+            index = result.get('first_%s_mismatch' % kind)
+            if index is not None:
+                print('%s: first %s mismatch in %s' % (name, kind, pages[index][0]))
+
+    if options.json:
+        report = {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pages': len(pages),
+            'megabytes': size / 1e6,
+            'runs': options.runs,
+            'parsers': results,
+        }
+        with open(options.json, 'w', encoding='utf-8') as stream:
+            json.dump(report, stream, indent=2)
+            stream.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,59 @@
+"""Measures how long importing `w3` and its facades takes in a fresh interpreter.
+
+Each module is imported `--runs` times in a new process with `-X importtime`, and the median
+cumulative time is reported.
+With `--max-ms`, the script exits with status 1 if any median exceeds that budget, so it can guard
+against regressions in CI.
+
+Example:
+    $ python benchmark/import_time.py --runs 15 --max-ms 80
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import List
+
+
+MODULES = ['w3', 'w3.dom', 'w3.parser']
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> float:
+    """Returns the cumulative time in milliseconds taken to import `module` in a fresh interpreter.
+    """
+    environment = dict(os.environ, PYTHONPATH=_ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            capture_output=True, text=True, env=environment, check=True)
+    for line in reversed(result.stderr.splitlines()):
+        match = re.match(r'import time:\s*\d+ \|\s*(\d+) \| (\S+)', line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError('no import time reported for %s' % module)
+
+
+def main(argv: List[str]) -> int:
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument('--runs', type=int, default=9,
+                           help='number of imports measured per module')
+    arguments.add_argument('--max-ms', type=float, default=None,
+                           help='fail if a median exceeds this many milliseconds')
+    options = arguments.parse_args(argv)
+    # The first import compiles the bytecode, which is not what is being measured.
+    for module in MODULES:
+        measure(module)
+    failed = False
+    for module in MODULES:
+        median = statistics.median(measure(module) for _ in range(options.runs))
+        over = options.max_ms is not None and median > options.max_ms
+        failed = failed or over
+        print('%-12s %8.2f ms%s' % (module, median, '  (over budget)' if over else ''))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,138 @@
+import random
+import unittest
+
+from w3.dom import Document
+from w3.dom import DOMException
+from w3.python.core.rope import ROPE_THRESHOLD
+
+
+# Data long enough to be edited in a rope.
+_LARGE_DATA = ''.join(chr(ord('a') + i % 26) for i in range(ROPE_THRESHOLD * 4))
+
+
+class TestMethod_SubstringData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = Document()
+        return super().setUp()
+
+    def test_Default(self):
+        text = self.document.createTextNode('lorem ipsum')
+        self.assertEqual(text.substringData(0, 5), 'lorem')
+        self.assertEqual(text.substringData(6, 100), 'ipsum')
+        self.assertEqual(text.substringData(11, 1), '')
+
+    def test_Large(self):
+        text = self.document.createTextNode(_LARGE_DATA)
+        text.insertData(0, '-')
+        self.assertEqual(text.substringData(ROPE_THRESHOLD, 3000),
+                         ('-' + _LARGE_DATA)[ROPE_THRESHOLD:ROPE_THRESHOLD+3000])
+
+    def test_Raises_INDEX_SIZE_ERR(self):
+        text = self.document.createTextNode('lorem')
+        for offset, count in [(-1, 1), (6, 0), (0, -1)]:
+            with self.subTest(offset=offset, count=count):
+                with self.assertRaises(DOMException) as context_manager:
+                    text.substringData(offset, count)
+                self.assertEqual(context_manager.exception.code,
+                                 DOMException.INDEX_SIZE_ERR)
+
+
+class TestMethod_AppendData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = Document()
+        return super().setUp()
+
+    def test_Default(self):
+        comment = self.document.createComment('lorem')
+        comment.appendData(' ipsum')
+        self.assertEqual(comment.data, 'lorem ipsum')
+        self.assertEqual(comment.length, 11)
+
+    def test_Raises_NO_MODIFICATION_ALLOWED_ERR(self):
+        html = self.document.appendChild(self.document.createElement('html'))
+        text = html.appendChild(self.document.createTextNode('lorem'))
+        self.document.freeze()
+        with self.assertRaises(DOMException) as context_manager:
+            text.appendData(' ipsum')
+        self.assertEqual(context_manager.exception.code,
+                         DOMException.NO_MODIFICATION_ALLOWED_ERR)
+        self.assertEqual(text.data, 'lorem')
+
+
+class TestMethod_InsertData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = Document()
+        return super().setUp()
+
+    def test_Default(self):
+        text = self.document.createTextNode('lorem')
+        text.insertData(0, '>')
+        text.insertData(6, '!')
+        text.insertData(3, '-')
+        self.assertEqual(text.data, '>lo-rem!')
+
+    def test_Raises_INDEX_SIZE_ERR(self):
+        text = self.document.createTextNode('lorem')
+        for offset in [-1, 6]:
+            with self.subTest(offset=offset):
+                with self.assertRaises(DOMException) as context_manager:
+                    text.insertData(offset, 'x')
+                self.assertEqual(context_manager.exception.code,
+                                 DOMException.INDEX_SIZE_ERR)
+
+
+class TestMethod_DeleteData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = Document()
+        return super().setUp()
+
+    def test_Default(self):
+        text = self.document.createTextNode('lorem ipsum')
+        text.deleteData(0, 6)
+        self.assertEqual(text.data, 'ipsum')
+        # Deleting past the end deletes up to the end.
+        text.deleteData(2, 100)
+        self.assertEqual(text.data, 'ip')
+
+    def test_Raises_INDEX_SIZE_ERR(self):
+        text = self.document.createTextNode('lorem')
+        for offset, count in [(-1, 1), (6, 0), (0, -1)]:
+            with self.subTest(offset=offset, count=count):
+                with self.assertRaises(DOMException) as context_manager:
+                    text.deleteData(offset, count)
+                self.assertEqual(context_manager.exception.code,
+                                 DOMException.INDEX_SIZE_ERR)
+
+
+class TestMethod_ReplaceData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = Document()
+        return super().setUp()
+
+    def test_Default(self):
+        text = self.document.createTextNode('lorem ipsum')
+        text.replaceData(0, 5, 'hello')
+        self.assertEqual(text.data, 'hello ipsum')
+        text.replaceData(6, 100, 'world')
+        self.assertEqual(text.data, 'hello world')
+
+    def test_ManyEditsOnLargeData(self):
+        html = self.document.appendChild(self.document.createElement('html'))
+        text = html.appendChild(self.document.createTextNode(_LARGE_DATA))
+        expected = _LARGE_DATA
+        rng = random.Random(0)
+        for i in range(500):
+            offset = rng.randint(0, len(expected))
+            count = rng.randint(0, 50)
+            arg = str(i) * rng.randint(0, 3)
+            text.replaceData(offset, count, arg)
+            expected = expected[:offset] + arg + expected[offset+count:]
+            self.assertEqual(text.length, len(expected))
+            if i % 100 == 0:
+                self.assertEqual(text.data, expected)
+                self.assertEqual(html.textContent, expected)
+        self.assertEqual(text.data, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
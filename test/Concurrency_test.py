@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+import unittest
+
+from w3.dom import compile_path
+from w3.dom import sort_in_document_order
+from w3.dom import subtree_hash
+from w3.dom import text_simhash
+from w3.parser import parse
+from w3.python.core.order import order_key
+from w3.python.core.order import update_document_order
+
+
+_THREADS = 8
+
+
+def _create_sample_document():
+    # ======================================
+    # <document>
+    #     <html>
+    #         <body>
+    #             <div id="d0" class="row">
+    #                 <p>0 <b>bold</b></p>
+    #                 <a href="/0">link 0</a>
+    #             </div>
+    #             ...
+    #             <div id="d199" class="row">...</div>
+    #         </body>
+    #     </html>
+    # <document>
+    # ======================================
+    return parse('<html><body>%s</body></html>' % ''.join(
+        '<div id="d%d" class="row"><p>%d <b>bold</b></p><a href="/%d">link %d</a></div>'
+        % (i, i, i, i)
+        for i in range(200)))
+
+
+def _query(document):
+    links = document.getElementsByTagName('a')
+    return (
+        links.length,
+        [link.getAttribute('href') for link in links],
+        document.getElementById('d150').textContent,
+        document.documentElement.textContent,
+        [node.textContent for node in compile_path('//div[@id="d7"]//b').evaluate(document)],
+        [node.value for node in compile_path('//div[@class="row"]/a/@href').evaluate(document)],
+        [node.getAttribute('id')
+         for node in sort_in_document_order(reversed(document.getElementsByTagName('div')))],
+        subtree_hash(document),
+        text_simhash(document),
+    )
+
+
+class TestFunction_ConcurrentReads(unittest.TestCase):
+    def setUp(self) -> None:
+        # Switch threads as often as possible, so that lazy caches are filled by racing threads.
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        sys.setswitchinterval(self.interval)
+        return super().tearDown()
+
+    def _run(self, document, expected):
+        barrier = threading.Barrier(_THREADS)
+
+        def task(_):
+            barrier.wait()
+            return [_query(document) for _ in range(3)]
+
+        with ThreadPoolExecutor(max_workers=_THREADS) as executor:
+            for results in executor.map(task, range(_THREADS)):
+                for result in results:
+                    self.assertEqual(result, expected)
+
+    def test_Unmodified(self):
+        expected = _query(_create_sample_document())
+        for _ in range(3):
+            self._run(_create_sample_document(), expected)
+
+    def test_Frozen(self):
+        expected = _query(_create_sample_document())
+        document = _create_sample_document()
+        document.freeze()
+        self._run(document, expected)
+
+    def test_AfterModification(self):
+        document = _create_sample_document()
+        _query(document)
+        body = document.getElementsByTagName('body').item(0)
+        body.insertBefore(body.lastChild, body.firstChild)
+        source = _create_sample_document()
+        source_body = source.getElementsByTagName('body').item(0)
+        source_body.insertBefore(source_body.lastChild, source_body.firstChild)
+        self._run(document, _query(source))
+
+
+class TestFunction_UpdateDocumentOrder(unittest.TestCase):
+    def test_NumberedTwice(self):
+        # Another thread numbering the same tree in the middle of a sort leaves the keys read so far
+        # valid.
+        document = _create_sample_document()
+        divs = list(document.getElementsByTagName('div'))
+        update_document_order(document)
+        keys = [order_key(div) for div in divs]
+        first = [div._order_key for div in divs]
+        document._order_version = None
+        update_document_order(document)
+        # The second numbering has not reached the second half of the nodes yet.
+        for div, key in list(zip(divs, first))[100:]:
+            div._order_key = key
+        self.assertEqual([order_key(div) for div in divs], keys)
+        self.assertEqual(keys, sorted(keys))
+
+    def test_OutOfDateAfterModification(self):
+        document = _create_sample_document()
+        div = document.getElementById('d5')
+        update_document_order(document)
+        div.parentNode.removeChild(div)
+        update_document_order(document)
+        self.assertIsNone(order_key(div))
+
+    def test_WithinBatch(self):
+        document = _create_sample_document()
+        div = document.getElementById('d5')
+        body = div.parentNode
+        with document.batch():
+            self.assertEqual(sort_in_document_order([div, body])[0], body)
+            body.removeChild(div)
+            update_document_order(document)
+            self.assertIsNone(order_key(div))
+        self.assertIsNone(order_key(div))
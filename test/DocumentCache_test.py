@@ -0,0 +1,177 @@
+import gc
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from w3.dom import DOMException
+from w3.dom import Node
+from w3.parser import DocumentCache
+from w3.parser import parse
+from w3.python.parser.cache import deserialize
+from w3.python.parser.cache import gc_paused
+from w3.python.parser.cache import serialize
+
+
+_SOURCE = ('<!DOCTYPE html>'
+           '<html><body class="main">'
+           '<p id="a">Hello, <b>world</b>!</p>'
+           '<!-- comment -->'
+           '<![CDATA[x < y]]>'
+           '</body></html>')
+
+
+def _dump(node: Node) -> list:
+    result = []
+    for child in node.childNodes:
+        attributes = []
+        if child.attributes:
+            attributes = [(attr.name, attr.value) for attr in child.attributes]
+        result.append((child.nodeName, child.nodeValue, attributes, _dump(child)))
+    return result
+
+
+class TestFunction_Serialize(unittest.TestCase):
+    def test_RoundTrip(self):
+        document = parse(_SOURCE)
+        copy = deserialize(serialize(document))
+        self.assertEqual(_dump(copy), _dump(document))
+        self.assertEqual(copy.doctype.name, 'html')
+        p = copy.getElementById('a')
+        self.assertIs(p.getAttributeNode('id')._owner_element, p)
+
+    def test_PauseGc(self):
+        data = serialize(parse(_SOURCE))
+        for enabled in [True, False]:
+            with self.subTest(enabled=enabled):
+                states = []
+                (gc.enable if enabled else gc.disable)()
+                try:
+                    with mock.patch('w3.python.parser.cache.build',
+                                    side_effect=lambda *args: states.append(gc.isenabled())):
+                        deserialize(data)
+                        deserialize(data, pause_gc=True)
+                    self.assertEqual(states, [enabled, False])
+                    self.assertEqual(gc.isenabled(), enabled)
+                finally:
+                    gc.enable()
+
+    def test_PauseGc_Overlapping(self):
+        first = gc_paused()
+        second = gc_paused()
+        first.__enter__()
+        second.__enter__()
+        # The block which began first ends first, while the other one still runs.
+        first.__exit__(None, None, None)
+        self.assertFalse(gc.isenabled())
+        second.__exit__(None, None, None)
+        self.assertTrue(gc.isenabled())
+
+    def test_Raises_ValueError(self):
+        for data in [b'', b'garbage', serialize(parse(_SOURCE))[:-3]]:
+            with self.subTest(data=data[:10]):
+                with self.assertRaises(ValueError):
+                    deserialize(data)
+
+
+class TestMethod_Parse(unittest.TestCase):
+    def test_Hit(self):
+        cache = DocumentCache()
+        document = cache.parse(_SOURCE.encode())
+        self.assertIs(cache.parse(_SOURCE.encode()), document)
+        self.assertTrue(document.frozen)
+        self.assertEqual(_dump(document), _dump(parse(_SOURCE)))
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.documents), (1, 1, 1))
+        self.assertEqual(info.nodes, len(document._preorder))
+
+    def test_EncodingIsPartOfTheKey(self):
+        cache = DocumentCache()
+        document = cache.parse(b'<p>caf\xc3\xa9</p>')
+        other = cache.parse(b'<p>caf\xc3\xa9</p>', encoding='latin-1')
+        self.assertIsNot(document, other)
+        self.assertEqual(other.documentElement.textContent, 'caf\xc3\xa9')
+
+    def test_Copy(self):
+        cache = DocumentCache(copy=True)
+        first = cache.parse(_SOURCE)
+        second = cache.parse(_SOURCE)
+        self.assertIsNot(first, second)
+        self.assertEqual(_dump(first), _dump(second))
+        first.getElementById('a').setAttribute('id', 'b')
+        self.assertEqual(cache.parse(_SOURCE).getElementById('a').tagName, 'p')
+
+    def test_SharedDocumentIsReadOnly(self):
+        document = DocumentCache().parse(_SOURCE)
+        with self.assertRaises(DOMException) as context_manager:
+            document.documentElement.appendChild(document.createElement('p'))
+        self.assertEqual(context_manager.exception.code,
+                         DOMException.NO_MODIFICATION_ALLOWED_ERR)
+
+    def test_SharedDocumentIsNotReleased(self):
+        cache = DocumentCache()
+        with cache.parse(_SOURCE) as document:
+            pass
+        with self.assertRaises(DOMException) as context_manager:
+            document.release()
+        self.assertEqual(context_manager.exception.code,
+                         DOMException.NO_MODIFICATION_ALLOWED_ERR)
+        hit = cache.parse(_SOURCE)
+        self.assertIs(hit, document)
+        self.assertTrue(hit.frozen)
+        self.assertEqual(_dump(hit), _dump(parse(_SOURCE)))
+
+    def test_EvictsLeastRecentlyUsedByNodeCount(self):
+        sources = ['<p>%d</p>' % i for i in range(3)]
+        nodes = 1 + len(list(parse(sources[0])._iter_descendants()))
+        cache = DocumentCache(max_nodes=nodes * 2)
+        first = cache.parse(sources[0])
+        cache.parse(sources[1])
+        self.assertIs(cache.parse(sources[0]), first)
+        cache.parse(sources[2])
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.parse(sources[0]), first)
+        self.assertEqual(cache.info().misses, 3)
+        cache.parse(sources[1])
+        self.assertEqual(cache.info().misses, 4)
+
+    def test_DocumentLargerThanCache(self):
+        cache = DocumentCache(max_nodes=2)
+        document = cache.parse(_SOURCE)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNot(cache.parse(_SOURCE), document)
+
+
+class TestMethod_Parse_Disk(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return super().tearDown()
+
+    def _files(self):
+        return [os.path.join(root, name)
+                for root, _, names in os.walk(self.directory.name) for name in names]
+
+    def test_DiskHit(self):
+        DocumentCache(directory=self.directory.name).parse(_SOURCE)
+        self.assertEqual(len(self._files()), 1)
+        cache = DocumentCache(directory=self.directory.name)
+        document = cache.parse(_SOURCE)
+        self.assertEqual(_dump(document), _dump(parse(_SOURCE)))
+        self.assertEqual(cache.info().disk_hits, 1)
+        self.assertEqual(cache.info().misses, 0)
+
+    def test_CorruptFileIsParsedAgain(self):
+        DocumentCache(directory=self.directory.name).parse(_SOURCE)
+        with open(self._files()[0], 'wb') as stream:
+            stream.write(b'corrupt')
+        cache = DocumentCache(directory=self.directory.name)
+        self.assertEqual(_dump(cache.parse(_SOURCE)), _dump(parse(_SOURCE)))
+        self.assertEqual(cache.info().misses, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
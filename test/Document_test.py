@@ -0,0 +1,379 @@
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import unittest
+import weakref
+
+from w3.dom import Document
+from w3.dom import DOMException
+from w3.dom import Node
+from w3.dom import sort_in_document_order
+
+
+def _create_sample_document() -> Document:
+    # ======================================
+    # <document>
+    #     <html>
+    #         <body>
+    #             <p id="p0">0</p>
+    #             <div>
+    #                 <p id="p1">1</p>
+    #             </div>
+    #             <p id="p2">2</p>
+    #         </body>
+    #     </html>
+    # <document>
+    # ======================================
+    document = Document()
+    html = document.appendChild(document.createElement('html'))
+    body = html.appendChild(document.createElement('body'))
+    div = document.createElement('div')
+    for i, parent in enumerate([body, div, body]):
+        p = document.createElement('p')
+        p.setAttribute('id', f'p{i}')
+        p.appendChild(document.createTextNode(str(i)))
+        parent.appendChild(p)
+        if i == 0:
+            body.appendChild(div)
+    return document
+
+
+class TestMethod_Freeze(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        return super().setUp()
+
+    def test_Frozen(self):
+        self.assertFalse(self.document.frozen)
+        self.document.freeze()
+        self.assertTrue(self.document.frozen)
+        # Freezing twice should do nothing.
+        self.document.freeze()
+        self.assertTrue(self.document.frozen)
+
+    def test_Raises_NO_MODIFICATION_ALLOWED_ERR(self):
+        body = self.document.getElementsByTagName('body').item(0)
+        p = self.document.getElementById('p0')
+        text = p.firstChild
+        self.document.freeze()
+        modifications = {
+            'appendChild': lambda: body.appendChild(self.document.createElement('p')),
+            'removeChild': lambda: body.removeChild(p),
+            'setAttribute': lambda: p.setAttribute('class', 'foo'),
+            'data': lambda: setattr(text, 'data', 'foo'),
+        }
+        for name, modify in modifications.items():
+            with self.subTest(modification=name):
+                with self.assertRaises(DOMException) as context_manager:
+                    modify()
+                self.assertEqual(context_manager.exception.code,
+                                 DOMException.NO_MODIFICATION_ALLOWED_ERR)
+        self.assertIs(p.parentNode, body)
+        self.assertEqual(text.data, '0')
+
+    def test_GetElementsByTagName(self):
+        expected = [p.getAttribute('id')
+                    for p in self.document.getElementsByTagName('p')]
+        div = self.document.getElementsByTagName('div').item(0)
+        div_expected = [p.getAttribute('id')
+                        for p in div.getElementsByTagName('p')]
+        self.document.freeze()
+        self.assertEqual([p.getAttribute('id') for p in self.document.getElementsByTagName('p')],
+                         expected)
+        self.assertEqual([p.getAttribute('id') for p in div.getElementsByTagName('p')],
+                         div_expected)
+        self.assertEqual(self.document.getElementsByTagName('*').length, 6)
+        self.assertEqual(self.document.getElementsByTagName('table').length, 0)
+
+    def test_GetElementById(self):
+        self.document.freeze()
+        self.assertEqual(self.document.getElementById('p1').firstChild.data, '1')
+        self.assertIsNone(self.document.getElementById('p3'))
+
+    def test_ConcurrentReads(self):
+        self.document.freeze()
+
+        def query(_):
+            return [p.getAttribute('id') for p in self.document.getElementsByTagName('p')]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(query, range(64)))
+        for result in results:
+            self.assertEqual(result, ['p0', 'p1', 'p2'])
+
+
+class TestMethod_GetElementsByTagName(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        return super().setUp()
+
+    def test_Live(self):
+        ps = self.document.getElementsByTagName('p')
+        self.assertEqual(ps.length, 3)
+        body = self.document.getElementsByTagName('body').item(0)
+        body.removeChild(self.document.getElementById('p0'))
+        self.assertEqual([p.getAttribute('id') for p in ps], ['p1', 'p2'])
+        body.appendChild(self.document.createElement('p'))
+        self.assertEqual(ps.length, 3)
+
+
+class TestMethod_GetElementById(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        return super().setUp()
+
+    def test_AfterModification(self):
+        self.assertEqual(self.document.getElementById('p1').firstChild.data, '1')
+        self.document.getElementById('p1').setAttribute('id', 'p3')
+        self.assertIsNone(self.document.getElementById('p1'))
+        self.assertEqual(self.document.getElementById('p3').firstChild.data, '1')
+
+
+class TestMethod_Batch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        self.body = self.document.getElementsByTagName('body').item(0)
+        return super().setUp()
+
+    def test_Default(self):
+        ps = self.document.getElementsByTagName('p')
+        self.assertEqual(self.body.textContent, '012')
+        with self.document.batch():
+            for i in range(3, 6):
+                p = self.body.appendChild(self.document.createElement('p'))
+                p.setAttribute('id', f'p{i}')
+                p.appendChild(self.document.createTextNode(str(i)))
+        self.assertEqual(ps.length, 6)
+        self.assertEqual(self.body.textContent, '012345')
+        self.assertEqual(self.document.getElementById('p5').firstChild.data, '5')
+
+    def test_ReadsWithinBatch(self):
+        ps = self.document.getElementsByTagName('p')
+        self.assertEqual(self.body.textContent, '012')
+        self.assertIsNone(self.document.getElementById('p3'))
+        with self.document.batch():
+            p = self.body.appendChild(self.document.createElement('p'))
+            p.setAttribute('id', 'p3')
+            p.appendChild(self.document.createTextNode('3'))
+            self.assertEqual(ps.length, 4)
+            self.assertEqual(self.body.textContent, '0123')
+            self.assertIs(self.document.getElementById('p3'), p)
+            p.firstChild.data = 'three'
+            self.assertEqual(self.body.textContent, '012three')
+        self.assertEqual(self.body.textContent, '012three')
+
+    def test_Nested(self):
+        self.assertEqual(self.body.textContent, '012')
+        with self.document.batch():
+            with self.document.batch():
+                self.body.removeChild(self.body.firstChild)
+            self.assertEqual(self.document._batch_nodes, [self.body])
+        self.assertEqual(self.document._batch_nodes, [])
+        self.assertEqual(self.body.textContent, '12')
+
+    def test_CommitsOnException(self):
+        self.assertEqual(self.body.textContent, '012')
+        with self.assertRaises(DOMException):
+            with self.document.batch():
+                self.body.removeChild(self.body.firstChild)
+                self.body.removeChild(self.document.createElement('p'))
+        self.assertEqual(self.body.textContent, '12')
+
+
+class TestMethod_AppendChild(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        return super().setUp()
+
+    def test_Raises_HIERARCHY_REQUEST_ERR(self):
+        body = self.document.getElementsByTagName('body').item(0)
+        div = self.document.getElementsByTagName('div').item(0)
+        p1 = self.document.getElementById('p1')
+        for parent, child in [(p1, div), (p1, body), (div, div), (p1.firstChild, p1)]:
+            with self.subTest(parent=parent.nodeName, child=child.nodeName):
+                with self.assertRaises(DOMException) as context_manager:
+                    parent.appendChild(child)
+                self.assertEqual(context_manager.exception.code,
+                                 DOMException.HIERARCHY_REQUEST_ERR)
+
+    def test_MovedSubtree(self):
+        # A subtree moved elsewhere is still checked against its new ancestors.
+        body = self.document.getElementsByTagName('body').item(0)
+        div = self.document.getElementsByTagName('div').item(0)
+        p1 = self.document.getElementById('p1')
+        p2 = self.document.getElementById('p2')
+        p2.appendChild(body.removeChild(div))
+        with self.assertRaises(DOMException):
+            p1.appendChild(p2)
+        with self.assertRaises(DOMException):
+            p1.appendChild(body)
+        # Once moved out of `div`, `p1` may take it as a child.
+        body.appendChild(p1)
+        p1.appendChild(div)
+        self.assertIs(div.parentNode, p1)
+
+
+class TestMethod_CompareDocumentPosition(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        return super().setUp()
+
+    def test_Default(self):
+        body = self.document.getElementsByTagName('body').item(0)
+        div = self.document.getElementsByTagName('div').item(0)
+        p0, p1, p2 = (self.document.getElementById(f'p{i}') for i in range(3))
+        for frozen in [False, True]:
+            if frozen:
+                self.document.freeze()
+            with self.subTest(frozen=frozen):
+                self.assertEqual(p0.compareDocumentPosition(p0), 0)
+                self.assertEqual(p0.compareDocumentPosition(p1), Node.DOCUMENT_POSITION_FOLLOWING)
+                self.assertEqual(p2.compareDocumentPosition(p1), Node.DOCUMENT_POSITION_PRECEDING)
+                self.assertEqual(p1.compareDocumentPosition(body),
+                                 Node.DOCUMENT_POSITION_CONTAINS | Node.DOCUMENT_POSITION_PRECEDING)
+                self.assertEqual(body.compareDocumentPosition(p1.firstChild),
+                                 Node.DOCUMENT_POSITION_CONTAINED_BY
+                                 | Node.DOCUMENT_POSITION_FOLLOWING)
+                self.assertEqual(div.compareDocumentPosition(p2), Node.DOCUMENT_POSITION_FOLLOWING)
+
+    def test_Attr(self):
+        p1 = self.document.getElementById('p1')
+        attr = p1.getAttributeNode('id')
+        self.assertEqual(p1.compareDocumentPosition(attr),
+                         Node.DOCUMENT_POSITION_CONTAINED_BY | Node.DOCUMENT_POSITION_FOLLOWING)
+        self.assertEqual(attr.compareDocumentPosition(p1.firstChild),
+                         Node.DOCUMENT_POSITION_FOLLOWING)
+        self.assertEqual(attr.compareDocumentPosition(self.document.getElementById('p0')),
+                         Node.DOCUMENT_POSITION_PRECEDING)
+
+    def test_Disconnected(self):
+        p0 = self.document.getElementById('p0')
+        other = self.document.createElement('p')
+        position = p0.compareDocumentPosition(other)
+        self.assertTrue(position & Node.DOCUMENT_POSITION_DISCONNECTED)
+        self.assertTrue(position & Node.DOCUMENT_POSITION_IMPLEMENTATION_SPECIFIC)
+        # The order is arbitrary, yet consistent.
+        reverse = other.compareDocumentPosition(p0)
+        self.assertEqual(position ^ reverse,
+                         Node.DOCUMENT_POSITION_FOLLOWING | Node.DOCUMENT_POSITION_PRECEDING)
+
+
+class TestFunction_SortInDocumentOrder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        self.p0, self.p1, self.p2 = (self.document.getElementById(f'p{i}') for i in range(3))
+        self.div = self.p1.parentNode
+        return super().setUp()
+
+    def test_Default(self):
+        nodes = [self.p2, self.p0.firstChild, self.div, self.p2, self.p1, self.p0]
+        self.assertEqual(sort_in_document_order(nodes),
+                         [self.p0, self.p0.firstChild, self.div, self.p1, self.p2])
+
+    def test_AfterModification(self):
+        self.assertEqual(sort_in_document_order([self.p2, self.p0]), [self.p0, self.p2])
+        self.p0.parentNode.appendChild(self.p0)
+        self.assertEqual(sort_in_document_order([self.p2, self.p0, self.p1]),
+                         [self.p1, self.p2, self.p0])
+
+    def test_Frozen(self):
+        self.document.freeze()
+        self.assertEqual(sort_in_document_order([self.p2, self.p1, self.p0]),
+                         [self.p0, self.p1, self.p2])
+
+    def test_Attr(self):
+        self.p1.setAttribute('class', 'foo')
+        id_attr = self.p1.getAttributeNode('id')
+        class_attr = self.p1.getAttributeNode('class')
+        self.assertEqual(sort_in_document_order([self.p1.firstChild, class_attr, self.p1, id_attr]),
+                         [self.p1, id_attr, class_attr, self.p1.firstChild])
+
+    def test_Detached(self):
+        removed = self.div.parentNode.removeChild(self.div)
+        other = self.document.createElement('p')
+        nodes = sort_in_document_order([other, self.p1, self.p2, self.p0])
+        self.assertEqual(nodes[:2], [self.p0, self.p2])
+        self.assertEqual(set(nodes[2:]), {other, self.p1})
+        self.assertTrue(nodes[2].compareDocumentPosition(nodes[3])
+                        & Node.DOCUMENT_POSITION_FOLLOWING)
+        self.assertIs(self.p1.parentNode, removed)
+
+
+class TestMethod_Release(unittest.TestCase):
+    def test_Default(self):
+        document = Document(arena=True)
+        html = document.appendChild(document.createElement('html'))
+        p = html.appendChild(document.createElement('p'))
+        p.setAttribute('id', 'p0')
+        attr = p.getAttributeNode('id')
+        detached = document.createTextNode('detached')
+        document.release()
+        self.assertIsNone(document.documentElement)
+        self.assertFalse(document.hasChildNodes())
+        for node in [html, p, attr, detached]:
+            with self.subTest(node=node):
+                self.assertIsNone(node.ownerDocument)
+                self.assertIsNone(node.parentNode)
+                self.assertFalse(node.hasChildNodes())
+        self.assertIsNone(attr._owner_element)
+        self.assertEqual(p.attributes.length, 0)
+
+    def test_FreedWithoutGarbageCollector(self):
+        document = Document(arena=True)
+        html = document.appendChild(document.createElement('html'))
+        for i in range(3):
+            html.appendChild(document.createElement('p')).appendChild(
+                document.createTextNode(str(i)))
+        references = [weakref.ref(node) for node in [document, html, *html._iter_descendants()]]
+        del html
+        gc.disable()
+        try:
+            document.release()
+            del document
+            self.assertEqual([reference() for reference in references], [None] * len(references))
+        finally:
+            gc.enable()
+
+    def test_Raises_NO_MODIFICATION_ALLOWED_ERR(self):
+        document = Document(arena=True)
+        html = document.appendChild(document.createElement('html'))
+        document.freeze()
+        with self.assertRaises(DOMException) as context_manager:
+            document.release()
+        self.assertEqual(context_manager.exception.code,
+                         DOMException.NO_MODIFICATION_ALLOWED_ERR)
+        self.assertTrue(document.frozen)
+        self.assertIs(html.parentNode, document)
+
+    def test_WithoutArena(self):
+        document = _create_sample_document()
+        p0 = document.getElementById('p0')
+        references = [weakref.ref(node) for node in document._iter_descendants()]
+        attr = weakref.ref(p0.getAttributeNode('id'))
+        gc.disable()
+        try:
+            document.release()
+            self.assertIsNone(document.documentElement)
+            self.assertIsNone(p0.parentNode)
+            self.assertEqual(p0.attributes.length, 0)
+            del p0
+            self.assertEqual([reference() for reference in references], [None] * len(references))
+            self.assertIsNone(attr())
+        finally:
+            gc.enable()
+
+    def test_ContextManager(self):
+        with _create_sample_document() as document:
+            html = document.documentElement
+        self.assertIsNone(document.documentElement)
+        self.assertIsNone(html.parentNode)
+
+    def test_ContextManager_Frozen(self):
+        document = _create_sample_document()
+        document.freeze()
+        with document:
+            html = document.documentElement
+        self.assertIs(document.documentElement, html)
+        self.assertTrue(document.frozen)
+
+if __name__ == '__main__':
+    unittest.main()
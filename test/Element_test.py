@@ -0,0 +1,203 @@
+import unittest
+
+from w3.dom import Document
+from w3.dom import DOMException
+from w3.dom import MutationJournal
+from w3.parser import Parser
+from w3.python.core.rope import ROPE_THRESHOLD
+
+
+def _create_sample_document() -> Document:
+    # ======================================
+    # <document>
+    #     <html>
+    #         <p>Hello, <b>world</b>!</p>
+    #         <!-- comment -->
+    #         <p><![CDATA[x < y]]></p>
+    #     </html>
+    # <document>
+    # ======================================
+    document = Document()
+    html = document.appendChild(document.createElement('html'))
+    p = html.appendChild(document.createElement('p'))
+    p.appendChild(document.createTextNode('Hello, '))
+    b = p.appendChild(document.createElement('b'))
+    b.appendChild(document.createTextNode('world'))
+    p.appendChild(document.createTextNode('!'))
+    html.appendChild(document.createComment(' comment '))
+    p = html.appendChild(document.createElement('p'))
+    p.appendChild(document.createCDATASection('x < y'))
+    return document
+
+
+class TestProperty_TextContent(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        self.html = self.document.documentElement
+        return super().setUp()
+
+    def testGetter(self):
+        self.assertEqual(self.html.textContent, 'Hello, world!x < y')
+        self.assertEqual(self.html.firstChild.textContent, 'Hello, world!')
+        self.assertEqual(self.html.childNodes.item(1).textContent, ' comment ')
+        self.assertIsNone(self.document.textContent)
+
+    def testGetter_Cached(self):
+        self.assertEqual(self.html.textContent, 'Hello, world!x < y')
+        self.assertIs(self.html.textContent, self.html.textContent)
+
+    def testGetter_AfterModification(self):
+        b = self.document.getElementsByTagName('b').item(0)
+        self.assertEqual(self.html.textContent, 'Hello, world!x < y')
+        modifications = [
+            (lambda: setattr(b.firstChild, 'data', 'there'), 'Hello, there!x < y'),
+            (lambda: b.appendChild(self.document.createTextNode('s')), 'Hello, theres!x < y'),
+            (lambda: self.html.removeChild(self.html.lastChild), 'Hello, theres!'),
+            (lambda: self.html.insertBefore(self.document.createTextNode('> '),
+                                            self.html.firstChild),
+             '> Hello, theres!'),
+            (lambda: b.parentNode.replaceChild(self.document.createTextNode('you'), b),
+             '> Hello, you!'),
+        ]
+        for modify, expected in modifications:
+            with self.subTest(expected=expected):
+                modify()
+                self.assertEqual(self.html.textContent, expected)
+
+    def testGetter_WhileParsing(self):
+        parser = Parser(events=('start',))
+        parser.feed('<div><p>one')
+        div = next(parser.read_events())[1]
+        self.assertEqual(div.textContent, '')
+        parser.feed('</p>two')
+        self.assertEqual(div.textContent, 'one')
+        parser.close()
+        self.assertEqual(div.textContent, 'onetwo')
+
+    def testSetter(self):
+        p = self.html.firstChild
+        b = p.childNodes.item(1)
+        p.textContent = 'Goodbye'
+        self.assertEqual(p.childNodes.length, 1)
+        self.assertEqual(p.firstChild.data, 'Goodbye')
+        self.assertIsNone(b.parentNode)
+        self.assertEqual(self.html.textContent, 'Goodbyex < y')
+        p.textContent = ''
+        self.assertEqual(p.childNodes.length, 0)
+
+    def testSetter_ManyChildren(self):
+        p = self.html.firstChild
+        for i in range(100):
+            b = p.appendChild(self.document.createElement('b'))
+            b.appendChild(self.document.createTextNode(str(i)))
+        children = list(p.childNodes)
+        journal = MutationJournal(self.document)
+        version = self.document._version
+        p.textContent = 'Goodbye'
+        # Versions are bumped up to the root once, whatever the number of children.
+        self.assertEqual(self.document._version, version + 1)
+        for child in children:
+            self.assertIsNone(child.parentNode)
+            self.assertIsNone(child.previousSibling)
+            self.assertIsNone(child.nextSibling)
+        records = journal.drain()
+        self.assertEqual([record.type for record in records], ['childList', 'childList'])
+        self.assertEqual(records[0].removedNodes, tuple(children))
+        self.assertEqual(records[1].addedNodes, (p.firstChild,))
+        self.assertEqual(self.html.textContent, 'Goodbyex < y')
+
+    def testSetter_Raises_NO_MODIFICATION_ALLOWED_ERR(self):
+        self.document.freeze()
+        with self.assertRaises(DOMException) as context_manager:
+            self.html.textContent = 'foo'
+        self.assertEqual(context_manager.exception.code,
+                         DOMException.NO_MODIFICATION_ALLOWED_ERR)
+        self.assertEqual(self.html.textContent, 'Hello, world!x < y')
+
+
+class TestMethod_Normalize(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = Document()
+        return super().setUp()
+
+    def _create_text_nodes(self, parent, *data):
+        return [parent.appendChild(self.document.createTextNode(value)) for value in data]
+
+    def test_MergesAdjacentTextNodes(self):
+        # ======================================
+        # <div>
+        #     "a" "" "b"
+        #     <p>"c" "d"</p>
+        #     "" "e"
+        #     <![CDATA[f]]>
+        #     "g"
+        # </div>
+        # ======================================
+        div = self.document.createElement('div')
+        first = self._create_text_nodes(div, 'a', '', 'b')[0]
+        p = div.appendChild(self.document.createElement('p'))
+        self._create_text_nodes(p, 'c', 'd')
+        self._create_text_nodes(div, '', 'e')
+        cdata = div.appendChild(self.document.createCDATASection('f'))
+        self._create_text_nodes(div, 'g')
+        child_nodes = div.childNodes
+        div.normalize()
+        self.assertIs(div.childNodes, child_nodes)
+        self.assertEqual([child.nodeValue for child in div.childNodes],
+                         ['ab', None, 'e', 'f', 'g'])
+        self.assertEqual([child.nodeValue for child in p.childNodes], ['cd'])
+        # The first node of each run is kept.
+        self.assertIs(div.firstChild, first)
+        self.assertIs(div.childNodes.item(3), cdata)
+        # Sibling links follow the new child list.
+        self.assertIs(first.nextSibling, p)
+        self.assertIs(p.previousSibling, first)
+        self.assertIsNone(div.lastChild.nextSibling)
+        self.assertEqual(div.textContent, 'abcdefg')
+
+    def test_RemovedNodesAreDetached(self):
+        div = self.document.createElement('div')
+        text_nodes = self._create_text_nodes(div, 'a', 'b', '')
+        div.normalize()
+        for text in text_nodes[1:]:
+            self.assertIsNone(text.parentNode)
+            self.assertIsNone(text.previousSibling)
+            self.assertIsNone(text.nextSibling)
+
+    def test_AfterRopeEdit(self):
+        # ======================================
+        # <p>
+        #     "a" "b"
+        #     <!-- c -->
+        #     "xxx…" (edited in a rope)
+        # </p>
+        # ======================================
+        p = self.document.createElement('p')
+        first = self._create_text_nodes(p, 'a', 'b')[0]
+        p.appendChild(self.document.createComment(' c '))
+        large = self._create_text_nodes(p, 'x' * ROPE_THRESHOLD * 2)[0]
+        large.appendData('y')
+        p.normalize()
+        self.assertIs(large.parentNode, p)
+        self.assertEqual([child.nodeValue for child in p.childNodes],
+                         ['ab', ' c ', 'x' * ROPE_THRESHOLD * 2 + 'y'])
+        self.assertIs(p.firstChild, first)
+        self.assertIs(p.lastChild, large)
+
+    def test_AlreadyNormalOnFrozenDocument(self):
+        document = _create_sample_document()
+        document.freeze()
+        document.documentElement.normalize()
+
+    def test_Raises_NO_MODIFICATION_ALLOWED_ERR(self):
+        html = self.document.appendChild(self.document.createElement('html'))
+        self._create_text_nodes(html, 'a', 'b')
+        self.document.freeze()
+        with self.assertRaises(DOMException) as context_manager:
+            html.normalize()
+        self.assertEqual(context_manager.exception.code,
+                         DOMException.NO_MODIFICATION_ALLOWED_ERR)
+
+
+if __name__ == '__main__':
+    unittest.main()
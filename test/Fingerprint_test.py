@@ -0,0 +1,140 @@
+import unittest
+
+from w3.dom import hamming_distance
+from w3.dom import subtree_hash
+from w3.dom import text_simhash
+from w3.parser import Parser
+from w3.parser import parse
+
+
+def _create_sample_document(page='Latest news'):
+    # ======================================
+    # <document>
+    #     <html>
+    #         <body>
+    #             <nav class="menu" id="top">
+    #                 <a href="/">Home</a>
+    #                 <!-- menu -->
+    #             </nav>
+    #             <p>{page}</p>
+    #         </body>
+    #     </html>
+    # <document>
+    # ======================================
+    return parse('<html><body>'
+                 '<nav class="menu" id="top"><a href="/">Home</a><!-- menu --></nav>'
+                 '<p>%s</p>'
+                 '</body></html>' % page)
+
+
+_ARTICLE = ('The city council approved the new budget on Monday after a long debate about '
+            'public transport, schools and the renovation of the old library in the centre')
+
+
+class TestFunction_SubtreeHash(unittest.TestCase):
+    def test_SameStructure(self):
+        first = _create_sample_document('First')
+        second = _create_sample_document('Second')
+        self.assertNotEqual(subtree_hash(first), subtree_hash(second))
+        self.assertEqual(subtree_hash(first.getElementsByTagName('nav').item(0)),
+                         subtree_hash(second.getElementsByTagName('nav').item(0)))
+        self.assertEqual(subtree_hash(first), subtree_hash(_create_sample_document('First')))
+
+    def test_Bits(self):
+        value = subtree_hash(_create_sample_document())
+        self.assertGreaterEqual(value, 0)
+        self.assertLess(value, 1 << 64)
+
+    def test_AttributeOrder(self):
+        first = parse('<div class="a" id="b">x</div>')
+        second = parse('<div id="b" class="a">x</div>')
+        self.assertEqual(subtree_hash(first), subtree_hash(second))
+
+    def test_IgnoresComments(self):
+        first = parse('<div><a>x</a><!-- one --></div>')
+        second = parse('<div><!-- two --><a>x</a></div>')
+        self.assertEqual(subtree_hash(first), subtree_hash(second))
+
+    def test_Distinguishes(self):
+        sources = ['<div><a>x</a></div>', '<div><b>x</b></div>', '<div><a>y</a></div>',
+                   '<div><a>x</a>y</div>', '<div><a title="x"></a></div>',
+                   '<div><a><a>x</a></a></div>', '<div><a></a><a>x</a></div>']
+        hashes = {subtree_hash(parse(source)) for source in sources}
+        self.assertEqual(len(hashes), len(sources))
+
+    def test_CachesDescendants(self):
+        document = _create_sample_document()
+        subtree_hash(document)
+        nav = document.getElementsByTagName('nav').item(0)
+        self.assertIsNotNone(nav._hash_cache)
+        self.assertEqual(nav._hash_cache[0], nav._version)
+
+    def test_InvalidatedOnMutation(self):
+        document = _create_sample_document()
+        nav = document.getElementsByTagName('nav').item(0)
+        p = document.getElementsByTagName('p').item(0)
+        before, nav_before, p_before = subtree_hash(document), subtree_hash(nav), subtree_hash(p)
+        nav.setAttribute('class', 'other')
+        self.assertNotEqual(subtree_hash(document), before)
+        self.assertNotEqual(subtree_hash(nav), nav_before)
+        self.assertEqual(subtree_hash(p), p_before)
+        nav.setAttribute('class', 'menu')
+        self.assertEqual(subtree_hash(document), before)
+        p.firstChild.appendData('!')
+        self.assertNotEqual(subtree_hash(document), before)
+        self.assertNotEqual(subtree_hash(p), p_before)
+        p.appendChild(document.createElement('br'))
+        self.assertEqual(subtree_hash(document),
+                         subtree_hash(parse('<html><body><nav class="menu" id="top">'
+                                            '<a href="/">Home</a></nav>'
+                                            '<p>Latest news!<br></p></body></html>')))
+
+    def test_WithinBatch(self):
+        document = _create_sample_document()
+        p = document.getElementsByTagName('p').item(0)
+        before = subtree_hash(document)
+        with document.batch():
+            p.firstChild.data = 'Changed'
+            changed = subtree_hash(document)
+        self.assertNotEqual(changed, before)
+        self.assertEqual(subtree_hash(document), changed)
+
+    def test_WhileParsing(self):
+        parser = Parser()
+        parser.feed('<html><body><p>one</p>')
+        partial = subtree_hash(parser._document)
+        parser.feed('<p>two</p></body></html>')
+        document = parser.close()
+        self.assertNotEqual(subtree_hash(document), partial)
+        self.assertEqual(subtree_hash(document),
+                         subtree_hash(parse('<html><body><p>one</p><p>two</p></body></html>')))
+
+
+class TestFunction_TextSimhash(unittest.TestCase):
+    def test_NearDuplicates(self):
+        original = text_simhash(parse('<p>%s</p>' % _ARTICLE))
+        edited = text_simhash(parse('<div><p>%s.</p><p>Updated</p></div>' % _ARTICLE.upper()))
+        other = text_simhash(parse('<p>Recipe: whisk three eggs with sugar, add flour and butter, '
+                                   'then bake the cake for forty minutes until golden</p>'))
+        self.assertLess(hamming_distance(original, edited), 8)
+        self.assertGreater(hamming_distance(original, other), 16)
+
+    def test_Empty(self):
+        self.assertEqual(text_simhash(parse('<p></p>')), 0)
+        self.assertEqual(text_simhash(parse('')), 0)
+
+    def test_InvalidatedOnMutation(self):
+        document = parse('<p>%s</p>' % _ARTICLE)
+        p = document.getElementsByTagName('p').item(0)
+        before = text_simhash(p)
+        self.assertEqual(text_simhash(p), before)
+        p.textContent = 'Something else entirely'
+        self.assertNotEqual(text_simhash(p), before)
+        self.assertEqual(text_simhash(p), text_simhash(parse('<p>Something else entirely</p>')))
+
+
+class TestFunction_HammingDistance(unittest.TestCase):
+    def test_HammingDistance(self):
+        self.assertEqual(hamming_distance(0, 0), 0)
+        self.assertEqual(hamming_distance(0b1011, 0b0001), 2)
+        self.assertEqual(hamming_distance(0, (1 << 64) - 1), 64)
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_after(statement: str, *modules: str) -> dict:
+    """Runs `statement` in a fresh interpreter and tells which of `modules` were imported by it."""
+    code = '%s\nimport sys\nprint(*(name in sys.modules for name in %r))' % (statement, modules)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=_ROOT), check=True)
+    return dict(zip(modules, (flag == 'True' for flag in result.stdout.split())))
+
+
+class TestDunder_GetAttr(unittest.TestCase):
+    def test_SubpackagesAreLazy(self):
+        loaded = _loaded_after('import w3', 'w3.dom', 'w3.parser', 'typing')
+        self.assertEqual(loaded, {'w3.dom': False, 'w3.parser': False, 'typing': False})
+
+    def test_SubpackagesOnAccess(self):
+        loaded = _loaded_after('import w3\nw3.dom.Document', 'w3.dom', 'w3.parser')
+        self.assertEqual(loaded, {'w3.dom': True, 'w3.parser': False})
+
+    def test_ParserDoesNotLoadAsyncio(self):
+        loaded = _loaded_after('from w3.parser import parse\nparse("<p>a &amp; b</p>")', 'asyncio')
+        self.assertEqual(loaded, {'asyncio': False})
+
+    def test_AsyncNamesOnAccess(self):
+        loaded = _loaded_after('from w3.parser import parse_async, aiterparse', 'asyncio')
+        self.assertEqual(loaded, {'asyncio': True})
+
+    def test_ParserDoesNotLoadCacheOrIncremental(self):
+        loaded = _loaded_after('import w3.parser',
+                               'w3.python.parser.cache', 'w3.python.parser.incremental',
+                               'tempfile', 'zlib')
+        self.assertEqual(loaded, {'w3.python.parser.cache': False,
+                                  'w3.python.parser.incremental': False,
+                                  'tempfile': False, 'zlib': False})
+
+    def test_CacheNamesOnAccess(self):
+        statement = 'from w3.parser import DocumentCache, serialize, deserialize, reparse'
+        loaded = _loaded_after(statement, 'w3.python.parser.cache', 'w3.python.parser.incremental')
+        self.assertEqual(loaded, {'w3.python.parser.cache': True,
+                                  'w3.python.parser.incremental': True})
+
+    def test_DomDoesNotLoadFingerprintMutationOrXPath(self):
+        loaded = _loaded_after('import w3.dom',
+                               'w3.python.core.fingerprint', 'w3.python.core.mutation',
+                               'w3.python.core.xpath', 'hashlib')
+        self.assertEqual(loaded, {'w3.python.core.fingerprint': False,
+                                  'w3.python.core.mutation': False,
+                                  'w3.python.core.xpath': False, 'hashlib': False})
+
+    def test_DomNamesOnAccess(self):
+        loaded = _loaded_after('from w3.dom import subtree_hash, MutationJournal, XPath',
+                               'w3.python.core.fingerprint', 'w3.python.core.mutation',
+                               'w3.python.core.xpath')
+        self.assertEqual(loaded, {'w3.python.core.fingerprint': True,
+                                  'w3.python.core.mutation': True,
+                                  'w3.python.core.xpath': True})
+
+    def test_EntityTableOnFirstReference(self):
+        loaded = _loaded_after('from w3.parser import parse\nparse("<p>a</p>")', 'html.entities')
+        self.assertEqual(loaded, {'html.entities': False})
+
+    def test_Raises_AttributeError(self):
+        import w3
+        import w3.dom
+        import w3.parser
+        for module, name in [(w3, 'missing'), (w3.dom, 'missing'), (w3.parser, 'missing')]:
+            with self.subTest(module=module.__name__):
+                with self.assertRaises(AttributeError):
+                    getattr(module, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from w3.__main__ import _write
+from w3.__main__ import main
+
+
+def _warc_record(warc_type: bytes, uri: bytes, block: bytes) -> bytes:
+    return (b'WARC/1.0\r\nWARC-Type: %s\r\nWARC-Target-URI: %s\r\nContent-Length: %d\r\n\r\n'
+            % (warc_type, uri, len(block))) + block + b'\r\n\r\n'
+
+
+class TestFunction_Main(unittest.TestCase):
+    def setUp(self) -> None:
+        # ======================================
+        # <directory>
+        #     a.html
+        #     sub/
+        #         b.htm
+        #         c.txt
+        #     pages.warc.gz
+        # <directory>
+        # ======================================
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        os.mkdir(os.path.join(self.root, 'sub'))
+        for name, content in [('a.html', '<html><a href="/a">A</a><p>one</p></html>'),
+                              ('sub/b.htm', '<p>two <a href="/b">B</a>'),
+                              ('sub/c.txt', 'not a page')]:
+            with open(os.path.join(self.root, name), 'w') as stream:
+                stream.write(content)
+        with gzip.open(os.path.join(self.root, 'pages.warc.gz'), 'wb') as stream:
+            stream.write(_warc_record(b'warcinfo', b'', b'software: test\r\n'))
+            stream.write(_warc_record(b'response', b'http://example.com/',
+                                      b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n'
+                                      b'<a href="/w">W</a>'))
+            stream.write(_warc_record(b'request', b'http://example.com/',
+                                      b'GET / HTTP/1.1\r\n\r\n'))
+        self.output = os.path.join(self.root, 'out.jsonl')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return super().tearDown()
+
+    def _run(self, *arguments):
+        status = main([*arguments, '-q', '-o', self.output])
+        with open(self.output) as stream:
+            return status, [json.loads(line) for line in stream]
+
+    def test_XPathAndText(self):
+        status, records = self._run('-j', '1', '-x', '//a/@href', '--text',
+                                    self.root, os.path.join(self.root, 'pages.warc.gz'))
+        self.assertEqual(status, 0)
+        self.assertEqual(records, [
+            {'source': os.path.join(self.root, 'a.html'),
+             'xpath': {'//a/@href': ['/a']}, 'text': 'Aone'},
+            {'source': os.path.join(self.root, 'sub', 'b.htm'),
+             'xpath': {'//a/@href': ['/b']}, 'text': 'two B'},
+            {'source': os.path.join(self.root, 'pages.warc.gz') + '#http://example.com/',
+             'xpath': {'//a/@href': ['/w']}, 'text': 'W'},
+        ])
+
+    def test_WorkerProcesses(self):
+        status, records = self._run('-j', '2', '--ordered', '-x', '//p',
+                                    os.path.join(self.root, '**', '*.htm*'))
+        self.assertEqual(status, 0)
+        self.assertEqual([record['xpath']['//p'] for record in records], [['one'], ['two B']])
+
+    def test_Pattern(self):
+        status, records = self._run('-j', '1', '--pattern', '*.txt', os.path.join(self.root, 'sub'))
+        self.assertEqual(status, 0)
+        self.assertEqual(records,
+                         [{'source': os.path.join(self.root, 'sub', 'c.txt'), 'elements': 1}])
+
+    def test_ErrorRecord(self):
+        broken = os.path.join(self.root, 'sub', 'broken.html')
+        os.symlink(os.path.join(self.root, 'nowhere'), broken)
+        status, records = self._run('-j', '1', os.path.join(self.root, 'sub'))
+        self.assertEqual(status, 1)
+        self.assertEqual(records[0]['source'], os.path.join(self.root, 'sub', 'b.htm'))
+        self.assertEqual(records[1]['source'], broken)
+        self.assertTrue(records[1]['error'].startswith('FileNotFoundError'))
+
+    def test_MissingSource(self):
+        self.assertEqual(main(['-q', self.root, os.path.join(self.root, 'missing.html')]), 2)
+
+    def test_InvalidExpression(self):
+        self.assertEqual(main(['-q', '-x', '//a[', self.root]), 2)
+
+
+class TestFunction_Write(unittest.TestCase):
+    def test_FlushesEveryLine(self):
+        output = io.StringIO()
+        written = []
+        with mock.patch.object(output, 'flush',
+                               side_effect=lambda: written.append(output.getvalue())):
+            counts = _write([({'source': 'a'}, 10), ({'source': 'b', 'error': 'e'}, 20)], output)
+        self.assertEqual(counts, (2, 1, 30))
+        self.assertEqual(written, ['{"source": "a"}\n',
+                                   '{"source": "a"}\n{"source": "b", "error": "e"}\n'])
+
+
+if __name__ == '__main__':
+    unittest.main()
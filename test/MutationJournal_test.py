@@ -0,0 +1,101 @@
+import unittest
+
+from w3.dom import Document
+from w3.dom import MutationJournal
+
+
+def _create_sample_document() -> Document:
+    # ======================================
+    # <document>
+    #     <html>
+    #         <p id="p0">0</p>
+    #     </html>
+    # <document>
+    # ======================================
+    document = Document()
+    html = document.appendChild(document.createElement('html'))
+    p = html.appendChild(document.createElement('p'))
+    p.setAttribute('id', 'p0')
+    p.appendChild(document.createTextNode('0'))
+    return document
+
+
+class TestMethod_Drain(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        self.html = self.document.documentElement
+        self.p = self.html.firstChild
+        return super().setUp()
+
+    def test_ChildList(self):
+        journal = MutationJournal(self.document)
+        new_p = self.html.appendChild(self.document.createElement('p'))
+        self.html.removeChild(self.p)
+        records = journal.drain()
+        self.assertEqual([(record.type, record.target) for record in records],
+                         [('childList', self.html), ('childList', self.html)])
+        self.assertEqual(records[0].addedNodes, (new_p,))
+        self.assertIs(records[0].previousSibling, self.p)
+        self.assertEqual(records[1].removedNodes, (self.p,))
+        self.assertIs(records[1].nextSibling, new_p)
+        self.assertEqual(journal.drain(), [])
+
+    def test_Attributes(self):
+        journal = MutationJournal(self.document, old_values=True)
+        self.p.setAttribute('id', 'p1')
+        self.p.setAttribute('class', 'foo')
+        self.p.removeAttribute('class')
+        self.assertEqual([(record.type, record.target, record.attributeName, record.oldValue)
+                          for record in journal.drain()],
+                         [('attributes', self.p, 'id', 'p0'),
+                          ('attributes', self.p, 'class', None),
+                          ('attributes', self.p, 'class', 'foo')])
+
+    def test_CharacterData(self):
+        journal = MutationJournal(self.document, old_values=True)
+        text = self.p.firstChild
+        text.data = '1'
+        text.appendData('2')
+        self.assertEqual([(record.type, record.target, record.oldValue)
+                          for record in journal.drain()],
+                         [('characterData', text, '0'),
+                          ('characterData', text, '1')])
+
+    def test_WithoutOldValues(self):
+        journal = MutationJournal(self.document)
+        self.p.setAttribute('id', 'p1')
+        self.p.firstChild.data = '1'
+        self.assertEqual([record.oldValue for record in journal.drain()], [None, None])
+
+    def test_Overflowed(self):
+        journal = MutationJournal(self.document, maxlen=2)
+        for i in range(3):
+            self.p.setAttribute('id', f'p{i}')
+        self.assertTrue(journal.overflowed)
+        records = journal.drain()
+        self.assertEqual(len(records), 2)
+        self.assertFalse(journal.overflowed)
+
+
+class TestMethod_Close(unittest.TestCase):
+    def test_Default(self):
+        document = _create_sample_document()
+        with MutationJournal(document) as journal:
+            document.documentElement.appendChild(document.createElement('p'))
+        document.documentElement.appendChild(document.createElement('p'))
+        self.assertEqual(len(journal), 1)
+        self.assertEqual(document._journals, ())
+
+    def test_SeveralJournals(self):
+        document = _create_sample_document()
+        first = MutationJournal(document)
+        second = MutationJournal(document)
+        document.documentElement.firstChild.setAttribute('id', 'p1')
+        first.close()
+        document.documentElement.firstChild.setAttribute('id', 'p2')
+        self.assertEqual(len(first.drain()), 1)
+        self.assertEqual(len(second.drain()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
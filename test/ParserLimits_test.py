@@ -0,0 +1,150 @@
+import asyncio
+import time
+import unittest
+
+from w3.parser import Parser
+from w3.parser import ParserLimits
+from w3.parser import aiterparse
+from w3.parser import parse
+
+
+# <html>
+#     <body>
+#         <div id="a" class="x">one</div>
+#         <!-- two -->
+#         <p>three</p>
+#     </body>
+# </html>
+_SOURCE = '<html><body><div id="a" class="x">one</div><!-- two --><p>three</p></body></html>'
+
+
+class TestFunction_Parse(unittest.TestCase):
+    def test_WithinLimits(self):
+        limits = ParserLimits(max_depth=3, max_nodes=7, max_attributes=2, max_text_size=5,
+                              time_budget=10.0)
+        document = parse(_SOURCE, limits=limits)
+        self.assertFalse(document.truncated)
+        self.assertEqual(document.documentElement.textContent, 'onethree')
+
+    def test_NoLimits(self):
+        self.assertFalse(parse(_SOURCE).truncated)
+        self.assertFalse(parse(_SOURCE, limits=ParserLimits()).truncated)
+
+
+class TestProperty_MaxDepth(unittest.TestCase):
+    def test_Exceeded(self):
+        parser = Parser(limits=ParserLimits(max_depth=100))
+        parser.feed('<div>' * 1_000_000)
+        document = parser.close()
+        self.assertEqual(parser.exceeded, 'max_depth')
+        self.assertTrue(parser.stopped)
+        self.assertTrue(document.truncated)
+        self.assertEqual(document.getElementsByTagName('div').length, 99)
+
+    def test_Skipped(self):
+        parser = Parser(only='p', limits=ParserLimits(max_depth=100))
+        parser.feed('<div>' * 1000 + '<p>x</p>')
+        parser.close()
+        self.assertEqual(parser.exceeded, 'max_depth')
+
+
+class TestProperty_MaxNodes(unittest.TestCase):
+    def test_Exceeded(self):
+        parser = Parser(limits=ParserLimits(max_nodes=4))
+        parser.feed(_SOURCE)
+        document = parser.close()
+        self.assertEqual(parser.exceeded, 'max_nodes')
+        self.assertTrue(document.truncated)
+        # <html>, <body>, <div> and its text are built; the comment and <p> are left out.
+        self.assertEqual(document.getElementById('a').textContent, 'one')
+        self.assertEqual(len(document.getElementsByTagName('body').item(0).childNodes), 1)
+
+
+class TestProperty_MaxAttributes(unittest.TestCase):
+    def test_Exceeded(self):
+        parser = Parser(limits=ParserLimits(max_attributes=1))
+        parser.feed(_SOURCE)
+        document = parser.close()
+        self.assertEqual(parser.exceeded, 'max_attributes')
+        self.assertEqual(document.getElementsByTagName('div').length, 0)
+
+
+class TestProperty_MaxTextSize(unittest.TestCase):
+    def test_Exceeded(self):
+        for source in ['<p>short</p><p>%s</p>' % ('x' * 100),
+                       '<p>short</p><p title="%s"></p>' % ('x' * 100),
+                       '<p>short</p><!--%s-->' % ('x' * 100),
+                       '<p>short</p>%s' % ('x' * 100)]:
+            with self.subTest(source=source[:30]):
+                parser = Parser(limits=ParserLimits(max_text_size=10))
+                parser.feed(source)
+                document = parser.close()
+                self.assertEqual(parser.exceeded, 'max_text_size')
+                self.assertTrue(document.truncated)
+                self.assertEqual(document.documentElement.textContent, 'short')
+                self.assertIsNotNone(document.getElementsByTagName('p').item(0)._source_end)
+
+    def test_StopsWithinText(self):
+        parser = Parser(limits=ParserLimits(max_text_size=1000))
+        parser.feed('<p>short</p><p>')
+        for chunks in range(1, 101):
+            parser.feed('x' * 100)
+            if parser.stopped:
+                break
+        # Parsing stops with the chunk going beyond the limit, without keeping the text fed so far.
+        self.assertEqual(chunks, 11)
+        self.assertEqual(parser.exceeded, 'max_text_size')
+        self.assertEqual(parser._builder._text_data, [])
+        self.assertEqual(parser.close().documentElement.textContent, 'short')
+
+    def test_OnlyBoundsParsing(self):
+        document = parse('<p title="short">short</p>', limits=ParserLimits(max_text_size=10))
+        p = document.getElementsByTagName('p').item(0)
+        p.firstChild.appendData(' and long')
+        p.setAttribute('title', 'short and long')
+        for get in [lambda: p.firstChild.data, lambda: p.firstChild.nodeValue,
+                    lambda: p.firstChild.substringData(0, 14), lambda: p.textContent,
+                    lambda: p.getAttribute('title'), lambda: p.getAttributeNode('title').nodeValue]:
+            self.assertEqual(get(), 'short and long')
+
+
+class TestProperty_TimeBudget(unittest.TestCase):
+    def test_Exceeded(self):
+        parser = Parser(limits=ParserLimits(time_budget=0.0))
+        time.sleep(0.001)
+        parser.feed('<p>x</p>' * 10_000)
+        document = parser.close()
+        self.assertEqual(parser.exceeded, 'time_budget')
+        self.assertTrue(document.truncated)
+        self.assertLess(document.getElementsByTagName('p').length, 10_000)
+
+
+class TestFunction_AIterParse(unittest.TestCase):
+    def _collect(self, source: str, limits: ParserLimits):
+        """Returns the elements `aiterparse()` yields for `source`, and whether the stream was read
+        to the end.
+        """
+        async def collect():
+            stream = asyncio.StreamReader()
+            stream.feed_data(source.encode())
+            stream.feed_eof()
+            elements = [element
+                        async for _, element in aiterparse(stream, chunk_size=8, limits=limits)]
+            return elements, stream.at_eof()
+
+        return asyncio.run(collect())
+
+    def test_MaxNodes(self):
+        elements, at_eof = self._collect(_SOURCE + '<p>more</p>' * 1000, ParserLimits(max_nodes=4))
+        document = elements[-1].ownerDocument
+        self.assertTrue(document.truncated)
+        self.assertEqual([element.tagName for element in elements], ['div', 'body', 'html'])
+        # The rest of the stream is left unread.
+        self.assertFalse(at_eof)
+
+    def test_MaxTextSize(self):
+        elements, _ = self._collect('<p>short</p><p>%s</p>' % ('x' * 1000),
+                                    ParserLimits(max_text_size=10))
+        document = elements[-1].ownerDocument
+        self.assertTrue(document.truncated)
+        self.assertEqual(document.documentElement.textContent, 'short')
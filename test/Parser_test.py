@@ -0,0 +1,468 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import random
+import unittest
+from unittest import mock
+
+from w3.dom import Node
+from w3.parser import Parser
+from w3.parser import ParserLimits
+from w3.parser import StringPool
+from w3.parser import aiterparse
+from w3.parser import parse
+from w3.parser import parse_async
+from w3.parser import parse_sharded
+from w3.parser import reparse
+import w3.python.parser.sharded
+
+
+def _create_stream(source: bytes) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    stream.feed_data(source)
+    stream.feed_eof()
+    return stream
+
+
+def _dump(node: Node) -> list:
+    """Accessor to describe the subtree of `node` as a comparable list."""
+    result = []
+    for child in node.childNodes:
+        if child.nodeType is Node.ELEMENT_NODE:
+            attributes = [(attr.name, attr.value) for attr in child.attributes]
+            result.append((child.nodeName, attributes, _dump(child)))
+        else:
+            result.append((child.nodeName, child.nodeValue))
+    return result
+
+
+def _dump_spans(node: Node) -> list:
+    """Accessor to describe the subtree of `node` as a comparable list, source spans included."""
+    return [(descendant.nodeName, descendant.nodeValue,
+             descendant._source_start, descendant._source_end)
+            for descendant in node._iter_descendants()]
+
+
+_SOURCE = ('<!DOCTYPE html>'
+           '<html>'
+           '<head><title>Fish &amp; Chips</title></head>'
+           '<body class="main">'
+           '<ul><li>one<li>two</ul>'
+           '<p>Hello, <b>world</b>!'
+           '<div id="content"><span>lorem</span> ipsum</div>'
+           '<!-- footer -->'
+           '<script>if (a < b) {}</script>'
+           '</body>'
+           '</html>')
+
+
+class TestFunction_Parse(unittest.TestCase):
+    def test_Structure(self):
+        document = parse(_SOURCE)
+        self.assertEqual(document.doctype.name, 'html')
+        html = document.documentElement
+        self.assertEqual(html.tagName, 'html')
+        self.assertEqual([child.tagName for child in html.childNodes],
+                         ['head', 'body'])
+        self.assertEqual(document.getElementsByTagName('title').item(0).firstChild.data,
+                         'Fish & Chips')
+        self.assertEqual(document.getElementsByTagName('body').item(0).getAttribute('class'),
+                         'main')
+        self.assertEqual(document.getElementsByTagName('script').item(0).firstChild.data,
+                         'if (a < b) {}')
+
+    def test_ImpliedEndTags(self):
+        document = parse(_SOURCE)
+        items = document.getElementsByTagName('li')
+        self.assertEqual(items.length, 2)
+        self.assertEqual(items.item(1).parentNode.tagName, 'ul')
+        # `<div>` implicitly closes the `<p>` before it.
+        div = document.getElementById('content')
+        self.assertEqual(div.parentNode.tagName, 'body')
+        self.assertEqual(div.previousSibling.tagName, 'p')
+
+    def test_ImpliedDocumentElement(self):
+        document = parse('Hello <b>world</b>')
+        self.assertEqual(document.documentElement.tagName, 'html')
+        self.assertEqual(document.documentElement.firstChild.data, 'Hello ')
+
+    def test_WellFormed(self):
+        source = ('<html><body><p id="a">Hello, <b>world</b><br>!</p><ul><li>one</li></ul>'
+                  '</body></html>')
+        parser = Parser()
+        parser.feed(source)
+        document = parser.close()
+        self.assertTrue(parser._builder._well_formed)
+        self.assertEqual(_dump(document), [
+            ('html', [], [('body', [], [
+                ('p', [('id', 'a')], [('#text', 'Hello, '), ('b', [], [('#text', 'world')]),
+                                      ('br', [], []), ('#text', '!')]),
+                ('ul', [], [('li', [], [('#text', 'one')])])])])])
+        b = document.getElementsByTagName('b').item(0)
+        self.assertEqual(source[b._source_start:b._source_end], '<b>world</b>')
+        br = document.getElementsByTagName('br').item(0)
+        self.assertEqual(source[br._source_start:br._source_end], '<br>')
+
+    def test_FallsBackAtFirstAnomaly(self):
+        parser = Parser()
+        # Well-formed up to the `<li>` which implies the end of the one before it.
+        parser.feed('<html><body><ul><li>one<li>two</ul><p><b>x</p></body></html>')
+        document = parser.close()
+        self.assertFalse(parser._builder._well_formed)
+        self.assertEqual(_dump(document.documentElement), [
+            ('body', [], [
+                ('ul', [], [('li', [], [('#text', 'one')]), ('li', [], [('#text', 'two')])]),
+                ('p', [], [('b', [], [('#text', 'x')])])])])
+
+    def test_Bytes(self):
+        document = parse('<p>Ünïcödé</p>'.encode('utf-8'))
+        self.assertEqual(document.getElementsByTagName('p').item(0).firstChild.data,
+                         'Ünïcödé')
+
+    def test_StopAtTagName(self):
+        document = parse(_SOURCE, stop='title')
+        # html
+        # └── head
+        #     └── title
+        #         └── 'Fish & Chips'
+        self.assertEqual(_dump(document.documentElement),
+                         [('head', [], [('title', [], [('#text', 'Fish & Chips')])])])
+
+    def test_StopAtCallable(self):
+        document = parse(_SOURCE, stop=lambda element: element.tagName == 'li'
+                         and element.firstChild.data == 'two')
+        items = document.getElementsByTagName('li')
+        self.assertEqual(items.length, 2)
+        self.assertEqual(document.getElementsByTagName('p').length, 0)
+
+    def test_StopNeverMet(self):
+        self.assertEqual(_dump(parse(_SOURCE, stop='video')), _dump(parse(_SOURCE)))
+
+    def test_OnlySelector(self):
+        document = parse(_SOURCE, only='li')
+        # html
+        # ├── li
+        # │   └── 'one'
+        # └── li
+        #     └── 'two'
+        self.assertEqual(_dump(document.documentElement),
+                         [('li', [], [('#text', 'one')]),
+                          ('li', [], [('#text', 'two')])])
+
+    def test_OnlySubtreesMatchFullParse(self):
+        full = parse(_SOURCE)
+        for selector, name in [('div#content', 'div'), ('body.main', 'body'), ('p', 'p'),
+                               ('*#content', 'div')]:
+            with self.subTest(selector=selector):
+                element = full.getElementsByTagName(name).item(0)
+                expected = [(element.tagName,
+                             [(attr.name, attr.value) for attr in element.attributes],
+                             _dump(element))]
+                document = parse(_SOURCE, only=selector)
+                self.assertEqual(_dump(document.documentElement), expected)
+
+    def test_OnlyCallable(self):
+        document = parse(_SOURCE, only=lambda name, attributes: attributes.get('id') == 'content')
+        self.assertEqual([child.tagName for child in document.documentElement.childNodes], ['div'])
+        self.assertEqual(document.getElementsByTagName('span').item(0).firstChild.data, 'lorem')
+
+    def test_OnlyNoMatch(self):
+        document = parse(_SOURCE, only='table')
+        self.assertEqual(document.getElementsByTagName('*').length, 1)
+
+    def test_Raises_ValueError(self):
+        for selector in ['', 'div p', 'div > p', '[href]']:
+            with self.subTest(selector=selector):
+                with self.assertRaises(ValueError):
+                    parse(_SOURCE, only=selector)
+
+
+class TestMethod_Feed(unittest.TestCase):
+    def test_Chunks(self):
+        expected = _dump(parse(_SOURCE))
+        for chunk_size in [1, 2, 3, 7, 64]:
+            with self.subTest(chunk_size=chunk_size):
+                parser = Parser()
+                for i in range(0, len(_SOURCE), chunk_size):
+                    parser.feed(_SOURCE[i:i+chunk_size])
+                self.assertEqual(_dump(parser.close()), expected)
+
+    def test_BytesChunks(self):
+        source = _SOURCE.replace('Chips', 'Frïtes').encode('utf-8')
+        expected = _dump(parse(source))
+        parser = Parser()
+        for i in range(len(source)):
+            parser.feed(source[i:i+1])
+        self.assertEqual(_dump(parser.close()), expected)
+
+    def test_LongRawTextAndComments(self):
+        for head, tail in [('<script>', '</script >'), ('<style>', '</STYLE>'),
+                           ('<!--', '-->'), ('<![CDATA[', ']]>')]:
+            source = '<p>' + head + 'x-]<' * 1000 + tail + '</p>'
+            expected = _dump(parse(source))
+            for chunk_size in [1, 3, 100]:
+                with self.subTest(head=head, chunk_size=chunk_size):
+                    parser = Parser()
+                    for i in range(0, len(source), chunk_size):
+                        parser.feed(source[i:i+chunk_size])
+                        if i + chunk_size < source.index(tail):
+                            # Chunks are kept aside until the terminator comes.
+                            self.assertLess(len(parser._tokenizer._buffer), 2 * chunk_size + 16)
+                    self.assertEqual(_dump(parser.close()), expected)
+
+    def test_IgnoredAfterStop(self):
+        parser = Parser(stop='b')
+        parser.feed('<p>Hello, <b>world</b>!')
+        self.assertTrue(parser.stopped)
+        parser.feed('<p>more</p>')
+        document = parser.close()
+        self.assertEqual(_dump(document.documentElement),
+                         [('p', [], [('#text', 'Hello, '), ('b', [], [('#text', 'world')])])])
+
+
+class TestMethod_ReadEvents(unittest.TestCase):
+    def test_StartEnd(self):
+        parser = Parser(events=('start', 'end'))
+        parser.feed('<ul><li>one<li>two<br>')
+        self.assertEqual([(event, element.tagName) for event, element in parser.read_events()],
+                         [('start', 'html'), ('start', 'ul'),
+                          ('start', 'li'), ('end', 'li'), ('start', 'li'),
+                          ('start', 'br'), ('end', 'br')])
+        parser.feed('</ul>')
+        parser.close()
+        self.assertEqual([(event, element.tagName) for event, element in parser.read_events()],
+                         [('end', 'li'), ('end', 'ul'), ('end', 'html')])
+
+    def test_Raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            Parser(events=('start', 'comment'))
+
+
+class TestFunction_AIterParse(unittest.TestCase):
+    def test_Events(self):
+        async def collect():
+            return [(event, element.tagName)
+                    async for event, element in aiterparse(_create_stream(_SOURCE.encode()),
+                                                           chunk_size=16)]
+
+        events = asyncio.run(collect())
+        expected_parser = Parser(events=('end',))
+        expected_parser.feed(_SOURCE)
+        expected_parser.close()
+        self.assertEqual(events, [(event, element.tagName)
+                                  for event, element in expected_parser.read_events()])
+
+    def test_EarlyBreak(self):
+        async def find_title():
+            async for _, element in aiterparse(_create_stream(_SOURCE.encode()), chunk_size=8):
+                if element.tagName == 'title':
+                    return element.firstChild.data
+
+        self.assertEqual(asyncio.run(find_title()), 'Fish & Chips')
+
+
+class TestFunction_ParseAsync(unittest.TestCase):
+    def test_Document(self):
+        async def build():
+            return await parse_async(_create_stream(_SOURCE.encode()), chunk_size=5)
+
+        document = asyncio.run(build())
+        self.assertEqual(_dump(document), _dump(parse(_SOURCE)))
+
+    def test_Executor(self):
+        async def build(executor):
+            return await parse_async(_create_stream(_SOURCE.encode()),
+                                     chunk_size=32,
+                                     executor=executor,
+                                     offload_size=16)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            document = asyncio.run(build(executor))
+        self.assertEqual(_dump(document), _dump(parse(_SOURCE)))
+
+    def test_Stop(self):
+        async def build():
+            stream = _create_stream(_SOURCE.encode())
+            document = await parse_async(stream, chunk_size=8, stop='title')
+            return document, stream.at_eof()
+
+        document, at_eof = asyncio.run(build())
+        self.assertEqual(_dump(document), _dump(parse(_SOURCE, stop='title')))
+        # The rest of the stream is left unread.
+        self.assertFalse(at_eof)
+
+
+class TestFunction_Reparse(unittest.TestCase):
+    def test_InPlace(self):
+        document = parse(_SOURCE)
+        html = document.documentElement
+        ul = document.getElementsByTagName('ul').item(0)
+        new_source = _SOURCE.replace('<span>lorem</span>',
+                                     '<span>dolor</span><b>sit</b>')
+        updated = reparse(document, _SOURCE, new_source)
+        self.assertIs(updated, document)
+        self.assertEqual(_dump(updated), _dump(parse(new_source)))
+        # Nodes outside of the edit are reused.
+        self.assertIs(updated.documentElement, html)
+        self.assertIs(updated.getElementsByTagName('ul').item(0), ul)
+
+    def test_ConsecutiveEdits(self):
+        document = parse(_SOURCE)
+        old_source = _SOURCE
+        for new_source in [old_source.replace('one', 'first'),
+                           old_source.replace('one', 'first').replace('world', 'there'),
+                           old_source.replace('<!-- footer -->', '<p>new</p>'),
+                           old_source.replace('<li>two', '')]:
+            with self.subTest(new_source=new_source):
+                document = reparse(document, old_source, new_source)
+                self.assertEqual(_dump(document), _dump(parse(new_source)))
+                old_source = new_source
+
+    def test_FallbackToParse(self):
+        document = parse(_SOURCE)
+        # Edits to the tags of the document element rebuild everything.
+        new_source = _SOURCE.replace('<html>', '<html lang="en">')
+        updated = reparse(document, _SOURCE, new_source)
+        self.assertIsNot(updated, document)
+        self.assertEqual(_dump(updated), _dump(parse(new_source)))
+
+    def test_Frozen(self):
+        document = parse(_SOURCE)
+        document.freeze()
+        new_source = _SOURCE.replace('lorem', 'dolor')
+        updated = reparse(document, _SOURCE, new_source)
+        self.assertIsNot(updated, document)
+        self.assertEqual(_dump(updated), _dump(parse(new_source)))
+
+    def test_EditsAtDocumentLevel(self):
+        for old_source, new_source in [(' <br>', ' bbr>'),
+                                       ('</title><br></tr>', '</title> <br></tr>'),
+                                       ('</html><li>', '</html><!-- c --><html>text li>'),
+                                       ('<html><body></html></body><br>text<div></div>',
+                                        '<html><body></html></body> <br>text<div></div>'),
+                                       ('<div></html><!-- c -->x<div><p>',
+                                        '<div></html><!-- c -->x<div><')]:
+            with self.subTest(old_source=old_source, new_source=new_source):
+                document = reparse(parse(old_source), old_source, new_source)
+                self.assertEqual(_dump(document), _dump(parse(new_source)))
+                self.assertEqual(_dump_spans(document), _dump_spans(parse(new_source)))
+
+    def test_RandomEdits(self):
+        pieces = ['<p>', '</p>', '<li>', '</li>', '<ul>', '</ul>', '<br>', '<b>', '</b>', 'text',
+                  ' ', '<!-- c -->', '<html>', '</html>', '<body>', '</body>', '<title>',
+                  '</title>', '<tr>', '<td>', '</table>', '<script>', '</script>', '&amp;',
+                  '<div id="x">', '</div>', '<!DOCTYPE html>', '<', '>', '/', '"']
+        generator = random.Random(0)
+        for _ in range(2000):
+            old_source = ''.join(generator.choice(pieces) for _ in range(generator.randint(0, 12)))
+            if generator.random() < 0.5:
+                old_source = '<html><body>' + old_source + '</body></html>'
+            start = generator.randint(0, len(old_source))
+            end = min(len(old_source), start + generator.randint(0, 6))
+            new_source = old_source[:start] + generator.choice(['', *pieces]) + old_source[end:]
+            with self.subTest(old_source=old_source, new_source=new_source):
+                document = reparse(parse(old_source), old_source, new_source)
+                self.assertEqual(_dump(document), _dump(parse(new_source)))
+                self.assertEqual(_dump_spans(document), _dump_spans(parse(new_source)))
+
+    def test_Options(self):
+        pool = StringPool()
+        document = parse(_SOURCE, arena=True, pool=pool)
+        # Rebuilt in place, with strings taken from the pool
+        new_source = _SOURCE.replace('lorem', 'one')
+        updated = reparse(document, _SOURCE, new_source, pool=pool)
+        self.assertIs(updated, document)
+        self.assertIs(updated.getElementsByTagName('span').item(0).firstChild.data,
+                      updated.getElementsByTagName('li').item(0).firstChild.data)
+        # Parsed again, still in arena mode
+        updated = reparse(document, new_source, new_source.replace('<html>', '<html lang="en">'),
+                          pool=pool)
+        self.assertIsNot(updated, document)
+        self.assertIsNotNone(updated._arena)
+        # Parsed again within the same limits
+        limits = ParserLimits(max_nodes=5)
+        document = parse(_SOURCE, limits=limits)
+        updated = reparse(document, _SOURCE, new_source, limits=limits)
+        self.assertIsNot(updated, document)
+        self.assertTrue(updated.truncated)
+
+
+def _create_table_source(rows: str) -> str:
+    # ======================================
+    # <!DOCTYPE html>
+    # <html>
+    #     <body>
+    #         <h1>Export</h1>
+    #         <table id="export">
+    #             {rows}
+    #         </table>
+    #         <p>end
+    #     </body>
+    # </html>
+    # ======================================
+    return ('<!DOCTYPE html><html><body><h1>Export</h1><table id="export">\n%s</table>'
+            '<p>end</body></html>' % rows)
+
+
+class TestFunction_ParseSharded(unittest.TestCase):
+    def _parse_sharded(self, source: str, sharded: bool):
+        with mock.patch.object(w3.python.parser.sharded, 'parse', wraps=parse) as fallback:
+            document = parse_sharded(source, processes=2, shard_size=200)
+        self.assertEqual(fallback.called, not sharded)
+        self.assertEqual(_dump(document), _dump(parse(source)))
+        self.assertEqual(_dump_spans(document), _dump_spans(parse(source)))
+        return document
+
+    def test_SameAsParse(self):
+        source = _create_table_source(''.join(
+            '<tr class="r%d"><td>%d</td><td><a href="/%d">item &amp; %d</a></td></tr>\n'
+            % (i % 2, i, i, i)
+            for i in range(100)))
+        document = self._parse_sharded(source, sharded=True)
+        self.assertEqual(document.getElementsByTagName('tr').length, 100)
+        self.assertIs(document.getElementsByTagName('tr').item(0).parentNode,
+                      document.getElementById('export'))
+
+    def test_EndTagOfContainer(self):
+        rows = ''.join('<tr><td>%d</td></tr>\n' % i for i in range(100))
+        for end_tag in ['</Table >', '</TABLE\n>', '</table/>']:
+            with self.subTest(end_tag=end_tag):
+                # `</tables>` is not the end tag of the table, and must not be taken for it.
+                source = _create_table_source(rows).replace('</table>', end_tag + '<p></tables>')
+                self._parse_sharded(source, sharded=True)
+
+    def test_ImpliedEndTags(self):
+        source = _create_table_source(''.join('<TR><td>%d<td>%d\n' % (i, i) for i in range(100)))
+        self._parse_sharded(source, sharded=True)
+
+    def test_FallbackToParse(self):
+        rows = ''.join('<tr><td>%d</td></tr>' % i for i in range(50))
+        for source in [
+                # Cuts within a comment or a script
+                _create_table_source(rows + '<!--%s-->' % rows + rows),
+                _create_table_source(rows + '<script>"%s"</script>' % rows + rows),
+                # An element left open which a row does not close
+                _create_table_source(rows + '<tr><td><p>open' + rows),
+                # An end tag closing the table within a shard
+                _create_table_source(rows + '</table><table>' + rows)]:
+            with self.subTest(source=source[:80]):
+                self._parse_sharded(source, sharded=False)
+
+    def test_Small(self):
+        self._parse_sharded(_create_table_source('<tr><td>1</td></tr>'), sharded=False)
+
+    def test_PauseGc(self):
+        source = _create_table_source(''.join('<tr><td>%d</td></tr>\n' % i for i in range(100)))
+        for enabled in [True, False]:
+            with self.subTest(enabled=enabled):
+                (gc.enable if enabled else gc.disable)()
+                try:
+                    document = parse_sharded(source, processes=2, shard_size=200, pause_gc=True)
+                    self.assertEqual(gc.isenabled(), enabled)
+                finally:
+                    gc.enable()
+                self.assertEqual(_dump_spans(document), _dump_spans(parse(source)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import gc
+import unittest
+import weakref
+
+from w3.parser import StringPool
+from w3.parser import parse
+
+
+# <html>
+#   <body>
+#     <nav class="site-nav">
+#       <a href="/about us">About us</a>
+#     </nav>
+#     <p>{page}</p>
+#   </body>
+# </html>
+_TEMPLATE = ('<html><body>'
+             '<nav class="site-nav"><a href="/about us">About us</a></nav>'
+             '<p>{page}</p>'
+             '</body></html>')
+
+
+def _link(document):
+    return document.getElementsByTagName('a').item(0)
+
+
+class TestMethod_Intern(unittest.TestCase):
+    def test_ReturnsPooledString(self):
+        pool = StringPool()
+        first = ''.join(['foo ', 'bar'])
+        second = ''.join(['foo', ' bar'])
+        self.assertIsNot(first, second)
+        self.assertIs(pool.intern(first), first)
+        self.assertIs(pool.intern(second), first)
+        self.assertEqual(len(pool), 1)
+
+    def test_Full(self):
+        pool = StringPool(max_size=1)
+        pool.intern('a b')
+        value = ''.join(['c', ' d'])
+        self.assertIs(pool.intern(value), value)
+        self.assertIsNot(pool.intern(''.join(['c ', 'd'])), value)
+        self.assertEqual(len(pool), 1)
+
+    def test_TooLong(self):
+        pool = StringPool(max_length=3)
+        value = ''.join(['a', ' b c'])
+        self.assertIs(pool.intern(value), value)
+        self.assertIsNot(pool.intern(''.join(['a ', 'b c'])), value)
+        self.assertEqual(len(pool), 0)
+
+
+class TestMethod_Clear(unittest.TestCase):
+    def test_Clear(self):
+        pool = StringPool()
+        pool.intern('a b')
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+
+class TestFunction_Parse(unittest.TestCase):
+    def test_SharesStrings(self):
+        pool = StringPool()
+        first = parse(_TEMPLATE.format(page='First page'), pool=pool)
+        second = parse(_TEMPLATE.format(page='Second page'), pool=pool)
+        self.assertIs(_link(first).firstChild.data, _link(second).firstChild.data)
+        self.assertIs(_link(first).getAttribute('href'), _link(second).getAttribute('href'))
+        self.assertIs(first.getElementsByTagName('nav').item(0).getAttributeNode('class').name,
+                      second.getElementsByTagName('nav').item(0).getAttributeNode('class').name)
+        self.assertEqual(first.getElementsByTagName('p').item(0).textContent, 'First page')
+        self.assertEqual(second.getElementsByTagName('p').item(0).textContent, 'Second page')
+
+    def test_DropsUniqueText(self):
+        pool = StringPool()
+        document = parse(_TEMPLATE.format(page='x' * 1000), pool=pool)
+        page = document.getElementsByTagName('p').item(0).firstChild
+        reference = weakref.ref(page)
+        size = len(pool)
+        del document, page
+        gc.collect()
+        # The text of the page is not pooled, so nothing is left of the page once it is dropped.
+        self.assertIsNone(reference())
+        self.assertNotIn('x' * 1000, pool._strings)
+        parse(_TEMPLATE.format(page='y' * 1000), pool=pool)
+        self.assertEqual(len(pool), size)
+
+    def test_WithoutPool(self):
+        first = parse(_TEMPLATE.format(page='First page'))
+        second = parse(_TEMPLATE.format(page='Second page'))
+        self.assertEqual(_link(first).firstChild.data, _link(second).firstChild.data)
+        self.assertIsNot(_link(first).firstChild.data, _link(second).firstChild.data)
@@ -0,0 +1,124 @@
+import unittest
+
+from w3.dom import compile_path
+from w3.dom import Node
+from w3.dom import XPath
+from w3.parser import parse
+
+
+def _create_sample_document():
+    # ======================================
+    # <document>
+    #     <html>
+    #         <body>
+    #             <table>
+    #                 <tr><td>a</td><td>b</td></tr>
+    #                 <tr><td>c<b>x</b></td><td id="z" class="p q">d</td></tr>
+    #             </table>
+    #             <a href="/1">one</a>
+    #             <div>
+    #                 <a href="/2">two</a>
+    #                 <a>three</a>
+    #             </div>
+    #         </body>
+    #     </html>
+    # <document>
+    # ======================================
+    return parse('<html><body>'
+                 '<table><tr><td>a</td><td>b</td></tr>'
+                 '<tr><td>c<b>x</b></td><td id="z" class="p q">d</td></tr></table>'
+                 '<a href="/1">one</a><div><a href="/2">two</a><a>three</a></div>'
+                 '</body></html>')
+
+
+def _values(nodes):
+    return [node.value if node.nodeType is Node.ATTRIBUTE_NODE else node.textContent
+            for node in nodes]
+
+
+class TestMethod_Evaluate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.document = _create_sample_document()
+        return super().setUp()
+
+    def _evaluate(self, expression, context=None):
+        return _values(XPath(expression).evaluate(context or self.document))
+
+    def test_Default(self):
+        cases = [
+            ('//table/tr[2]/td/text()', ['c', 'd']),
+            ('//a/@href', ['/1', '/2']),
+            ('/html/body/a', ['one']),
+            ('//tr/td[1]', ['a', 'cx']),
+            ('//td[last()]', ['b', 'd']),
+            ('//td//text()', ['a', 'b', 'c', 'x', 'd']),
+            ('//b/..', ['cx']),
+            ('//b/ancestor::tr', ['cxd']),
+            ('//td/following-sibling::td', ['b', 'd']),
+            ('//td/preceding-sibling::td[1]', ['a', 'cx']),
+            ('descendant::a[2]', ['two']),
+        ]
+        for expression, expected in cases:
+            with self.subTest(expression=expression):
+                self.assertEqual(self._evaluate(expression), expected)
+
+    def test_Predicates(self):
+        cases = [
+            ('//td[@id="z"]', ['d']),
+            ('//td[@id!="z"]', []),
+            ('//td[contains(@class, "q")]', ['d']),
+            ('//a[starts-with(@href, "/2")]', ['two']),
+            ('//a[not(@href)]', ['three']),
+            ('//td[b]', ['cx']),
+            ('//td[text()="a"]', ['a']),
+            ('//tr[td="b"]', ['ab']),
+            ('//div/a[@href][1]', ['two']),
+            ('descendant::a[@href][2]', ['two']),
+        ]
+        for expression, expected in cases:
+            with self.subTest(expression=expression):
+                self.assertEqual(self._evaluate(expression), expected)
+
+    def test_PositionsPerContextNode(self):
+        # `//td[1]` is the first `td` child of each parent, not the first `td` of the document.
+        self.assertEqual(self._evaluate('//td[1]'), ['a', 'cx'])
+        self.assertEqual(self._evaluate('//td/text()[1]'), ['a', 'b', 'c', 'd'])
+
+    def test_RelativeToContextNode(self):
+        div = self.document.getElementsByTagName('div').item(0)
+        self.assertEqual(self._evaluate('a', div), ['two', 'three'])
+        self.assertEqual(self._evaluate('./a[2]', div), ['three'])
+        self.assertEqual(self._evaluate('//td[1]', div), ['a', 'cx'])
+
+    def test_DocumentOrderWithoutDuplicates(self):
+        nodes = XPath('//td/ancestor::*').evaluate(self.document)
+        self.assertEqual([node.tagName for node in nodes], ['html', 'body', 'table', 'tr', 'tr'])
+
+    def test_Frozen(self):
+        expected = self._evaluate('//table/tr[2]/td/text()')
+        self.document.freeze()
+        self.assertEqual(self._evaluate('//table/tr[2]/td/text()'), expected)
+
+    def test_AfterModification(self):
+        path = XPath('//div/a')
+        self.assertEqual(len(path.evaluate(self.document)), 2)
+        div = self.document.getElementsByTagName('div').item(0)
+        div.appendChild(self.document.createElement('a'))
+        self.assertEqual(len(path.evaluate(self.document)), 3)
+
+    def test_Raises_ValueError(self):
+        for expression in ['', '//', 'a[', '//a[@]', 'foo::a', 'a b', '//a[contains(@x)]']:
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    XPath(expression)
+
+
+class TestFunction_CompilePath(unittest.TestCase):
+    def test_Cached(self):
+        path = compile_path('//a/@href')
+        self.assertIs(compile_path('//a/@href'), path)
+        self.assertEqual(path.expression, '//a/@href')
+
+
+if __name__ == '__main__':
+    unittest.main()
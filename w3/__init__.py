@@ -4,10 +4,23 @@ This is a personal project owned by Hepheir.
 https://github.com/Hepheir/Python-HTML-Parser/
 """
 
-from w3 import dom
-from w3 import parser
+import importlib
 
 
 __version__ = '0.0.0'
 
 __author__ = 'hepheir@gmail.com'
+
+# Subpackages, imported on first access so that `import w3` stays cheap.
+__all__ = ['dom', 'parser']
+
+
+# `typing` is left out, as importing it would cost more than the rest of `import w3`.
+def __getattr__(name: str) -> object:
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,255 @@
+"""Command-line batch tool: parses HTML files in parallel and streams what is extracted from them as
+JSON Lines.
+
+Sources are files, directories (searched recursively for `--pattern`), glob patterns, and WARC files
+(`.warc`, `.warc.gz`), whose `response` and `resource` records are each treated as a page.
+
+Each page gives one line of output, e.g. for `python -m w3 --xpath '//a/@href' --text pages/`:
+
+    {"source": "pages/index.html", "xpath": {"//a/@href": ["/about"]}, "text": "Welcome"}
+
+A page which cannot be read or parsed gives a line with an `error` instead.
+Every line is flushed as soon as it is written, so that results can be followed through a pipe as
+they come.
+Throughput is reported on the standard error once every page has been processed.
+"""
+
+import argparse
+import fnmatch
+import glob
+import gzip
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from w3.dom import Node
+from w3.dom import compile_path
+from w3.parser import Parser
+from w3.parser import parse
+
+
+# A page to process: its name in the output, and either the path of the file or its content.
+_Task = Tuple[str, Union[str, bytes]]
+
+DEFAULT_PATTERN = '*.html,*.htm'
+
+# Options of the current run, set in every worker process by `_initialize()`.
+_options: Optional[argparse.Namespace] = None
+
+
+def _create_argument_parser() -> argparse.ArgumentParser:
+    arguments = argparse.ArgumentParser(
+        prog='python -m w3',
+        description='Parses HTML files in parallel and streams what is extracted from them '
+                    'as JSON Lines.')
+    arguments.add_argument('sources', nargs='+',
+                           help='files, directories, glob patterns or WARC files to read pages '
+                                'from')
+    arguments.add_argument('-x', '--xpath', action='append', default=[], metavar='EXPRESSION',
+                           help='path expression to evaluate on every page; may be repeated')
+    arguments.add_argument('-t', '--text', action='store_true',
+                           help='extract the text content of every page')
+    arguments.add_argument('--only', metavar='SELECTOR',
+                           help='only build the subtrees of the elements matching this simple '
+                                'selector')
+    arguments.add_argument('--pattern', default=DEFAULT_PATTERN,
+                           help='comma separated file name patterns searched for in directories '
+                                '(default: %(default)s)')
+    arguments.add_argument('--encoding', default='utf-8',
+                           help='encoding of the pages (default: %(default)s)')
+    arguments.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                           help='number of worker processes (default: %(default)s)')
+    arguments.add_argument('--ordered', action='store_true',
+                           help='write results in the order of the sources rather than as soon '
+                                'as they are ready')
+    arguments.add_argument('-o', '--output', metavar='FILE',
+                           help='file to write the results to, instead of the standard output')
+    arguments.add_argument('-q', '--quiet', action='store_true',
+                           help='do not report throughput')
+    return arguments
+
+
+def iter_sources(sources: Sequence[str], pattern: str = DEFAULT_PATTERN) -> Iterator[_Task]:
+    """Yields the pages found in `sources`, in order.
+
+    Args:
+        sources: Files, directories, glob patterns or WARC files.
+        pattern: Comma separated file name patterns searched for in directories.
+    """
+    patterns = [part.strip() for part in pattern.split(',') if part.strip()]
+    for source in sources:
+        if os.path.isdir(source):
+            for directory, names, files in os.walk(source):
+                names.sort()
+                for name in sorted(files):
+                    if any(fnmatch.fnmatch(name, part) for part in patterns):
+                        yield from _iter_file(os.path.join(directory, name))
+        elif os.path.exists(source):
+            yield from _iter_file(source)
+        else:
+            paths = sorted(glob.glob(source, recursive=True))
+            if not paths:
+                raise FileNotFoundError('no such file, directory or match: %r' % source)
+            for path in paths:
+                if os.path.isfile(path):
+                    yield from _iter_file(path)
+
+
+def _iter_file(path: str) -> Iterator[_Task]:
+    if path.endswith(('.warc', '.warc.gz')):
+        yield from iter_warc(path)
+    else:
+        yield path, path
+
+
+def iter_warc(path: str) -> Iterator[_Task]:
+    """Yields the pages stored in the `response` and `resource` records of a WARC file.
+
+    Pages are named after the file and the target URI of their record; HTTP headers of responses are
+    stripped.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as stream:
+        while True:
+            headers = _read_warc_headers(stream)
+            if headers is None:
+                return
+            block = stream.read(int(headers.get('content-length', 0)))
+            if headers.get('warc-type') not in ('response', 'resource'):
+                continue
+            if headers.get('warc-type') == 'response' and block.startswith(b'HTTP/'):
+                separator = block.find(b'\r\n\r\n')
+                block = block[separator + 4:] if separator >= 0 else b''
+            uri = headers.get('warc-target-uri', headers.get('warc-record-id', ''))
+            yield '%s#%s' % (path, uri), block
+
+
+def _read_warc_headers(stream: IO[bytes]) -> Optional[Dict[str, str]]:
+    """Reads the headers of the next record, or returns `None` at the end of the file."""
+    line = stream.readline()
+    while line and not line.strip():
+        line = stream.readline()
+    if not line:
+        return None
+    if not line.startswith(b'WARC/'):
+        raise ValueError('not a WARC record: %r' % line[:40])
+    headers: Dict[str, str] = {}
+    for line in iter(stream.readline, b''):
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.decode('utf-8', 'replace').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _initialize(options: argparse.Namespace) -> None:
+    global _options
+    _options = options
+
+
+def _process(task: _Task) -> Tuple[Dict[str, object], int]:
+    """Parses a single page and extracts what the options ask for.
+
+    Returns:
+        The output record, and the size of the page in bytes.
+    """
+    name, content = task
+    record: Dict[str, object] = {'source': name}
+    size = 0
+    try:
+        if isinstance(content, str):
+            with open(content, 'rb') as stream:
+                content = stream.read()
+        size = len(content)
+        with parse(content, encoding=_options.encoding, only=_options.only) as document:
+            if _options.xpath:
+                record['xpath'] = {
+                    expression: [_string_value(node)
+                                 for node in compile_path(expression).evaluate(document)]
+                    for expression in _options.xpath}
+            if _options.text:
+                element = document.documentElement
+                record['text'] = element.textContent if element is not None else ''
+            if not _options.xpath and not _options.text:
+                record['elements'] = document.getElementsByTagName('*').length
+    except Exception as error:
+        record['error'] = '%s: %s' % (type(error).__name__, error)
+    return record, size
+
+
+def _string_value(node: Node) -> str:
+    if node.nodeType is Node.ELEMENT_NODE or node.nodeType is Node.DOCUMENT_NODE:
+        return node.textContent or ''
+    return node.nodeValue or ''
+
+
+def _write(results: Iterable[Tuple[Dict[str, object], int]],
+           output: IO[str]) -> Tuple[int, int, int]:
+    """Writes every record as soon as it is ready, flushing each line.
+
+    Returns:
+        The number of pages, the number of them which gave an error, and their total size in bytes.
+    """
+    pages = errors = total_size = 0
+    for record, size in results:
+        pages += 1
+        total_size += size
+        errors += 'error' in record
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        output.flush()
+    return pages, errors, total_size
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the command-line tool with `argv`, or the arguments of the process.
+
+    Returns:
+        The exit status: 0 if every page was processed, 1 if any gave an error, 2 if the sources
+        could not be read.
+    """
+    options = _create_argument_parser().parse_args(argv)
+    try:
+        for expression in options.xpath:
+            compile_path(expression)
+        Parser(only=options.only)
+        for source in options.sources:
+            if not os.path.exists(source) and not glob.glob(source, recursive=True):
+                raise FileNotFoundError('no such file, directory or match: %r' % source)
+    except (OSError, ValueError) as error:
+        print('error: %s' % error, file=sys.stderr)
+        return 2
+    output = open(options.output, 'w', encoding='utf-8') if options.output else sys.stdout
+    started = time.perf_counter()
+    try:
+        tasks = iter_sources(options.sources, options.pattern)
+        if options.jobs <= 1:
+            _initialize(options)
+            pages, errors, total_size = _write(map(_process, tasks), output)
+        else:
+            with multiprocessing.Pool(options.jobs, initializer=_initialize,
+                                      initargs=(options,)) as pool:
+                mapping = pool.imap if options.ordered else pool.imap_unordered
+                pages, errors, total_size = _write(mapping(_process, tasks, chunksize=4), output)
+    except (OSError, ValueError) as error:
+        print('error: %s' % error, file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+    if not options.quiet:
+        elapsed = time.perf_counter() - started
+        print('%d pages (%d errors), %.1f MB in %.2f s: %.1f pages/s, %.2f MB/s'
+              % (pages, errors, total_size / 1e6, elapsed,
+                 pages / elapsed if elapsed else 0, total_size / 1e6 / elapsed if elapsed else 0),
+              file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
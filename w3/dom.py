@@ -1,6 +1,9 @@
 """API Module of DOM - Level 1"""
 
 
+import importlib
+from typing import Any, List
+
 # Bring in subpackages.
 from w3.python.core.type import DOMString
 from w3.python.core.exception import DOMException
@@ -20,3 +23,30 @@ from w3.python.core.interface import DocumentType
 from w3.python.core.interface import Notation
 from w3.python.core.interface import EntityReference
 from w3.python.core.interface import ProcessingInstruction
+from w3.python.core.order import sort_in_document_order
+
+# Names imported from their module on first access, as most uses of the DOM need none of them.
+_LAZY = {
+    # `hashlib`
+    'hamming_distance': 'w3.python.core.fingerprint',
+    'subtree_hash': 'w3.python.core.fingerprint',
+    'text_simhash': 'w3.python.core.fingerprint',
+    # Only needed once the modifications of a document are recorded
+    'MutationJournal': 'w3.python.core.mutation',
+    'MutationRecord': 'w3.python.core.mutation',
+    # Compiled paths and their cache
+    'XPath': 'w3.python.core.xpath',
+    'compile_path': 'w3.python.core.xpath',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
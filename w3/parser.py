@@ -1 +1,38 @@
 """A Parser module for building Document Object Model Structure parsed from text/html."""
+
+
+import importlib
+from typing import Any, List
+
+# Bring in subpackages.
+from w3.python.parser.parser import Parser
+from w3.python.parser.parser import parse
+from w3.python.parser.pool import StringPool
+from w3.python.parser.limits import ParserLimits
+
+# Names imported from their module on first access, as the module pulls in heavy dependencies.
+_LAZY = {
+    # `asyncio`
+    'aiterparse': 'w3.python.parser.asynchronous',
+    'parse_async': 'w3.python.parser.asynchronous',
+    # `marshal`, `tempfile`, `threading` and `zlib`
+    'DocumentCache': 'w3.python.parser.cache',
+    'deserialize': 'w3.python.parser.cache',
+    'serialize': 'w3.python.parser.cache',
+    # Only needed by editors
+    'reparse': 'w3.python.parser.incremental',
+    # `multiprocessing`
+    'parse_sharded': 'w3.python.parser.sharded',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
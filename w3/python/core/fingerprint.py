@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import Counter
+from hashlib import blake2b
+import re
+from typing import List, Optional, Tuple
+
+from w3.python.core.interface import Node
+
+
+# Number of bits of hashes and fingerprints.
+BITS = 64
+
+_WORD = re.compile(r'\w+')
+
+_ELEMENT = Node.ELEMENT_NODE.value
+_TEXT = Node.TEXT_NODE.value
+_CDATA_SECTION = Node.CDATA_SECTION_NODE.value
+_DOCUMENT = Node.DOCUMENT_NODE.value
+_DOCUMENT_FRAGMENT = Node.DOCUMENT_FRAGMENT_NODE.value
+# Types of the nodes which make up the structure hashed by `subtree_hash()`; comments, processing
+# instructions and the document type are left out, so that they do not tell apart pages which are
+# otherwise the same.
+_HASHED = frozenset([_ELEMENT, _TEXT, _CDATA_SECTION])
+
+
+def subtree_hash(node: Node) -> int:
+    """Returns a hash of the subtree rooted at `node`, which two subtrees share if and only if they
+    have the same structure and content.
+
+    The hash is computed bottom-up in a single walk, Merkle-style: the hash of an element is a
+    digest of its tag name, its attributes (in any order) and the hashes of its children, and the
+    hash of character data is a digest of its data.
+    Comments, processing instructions and the document type are left out.
+
+    The hash of every element of the subtree is cached on it until its subtree is modified,
+    so after hashing a whole document, hashing any of its elements is immediate, and after a
+    modification only the modified element and its ancestors are hashed again.
+    Within `Document.batch()`, hashes are neither cached nor taken from the cache.
+
+    Hashes are stable across processes and runs, so they can be stored and compared between crawls.
+
+    Args:
+        node: The root of the subtree.
+
+    Returns:
+        An unsigned integer of `BITS` bits.
+    """
+    cached = not node._is_batching()
+    hashes: List[bytes] = []
+    # Nodes to visit, each with the number of its children pushed after it, or `None` while they are
+    # yet to be pushed, and whether its hash may be cached: not while the parser may still add
+    # children to it
+    stack: List[Tuple[Node, Optional[int], bool]] = [(node, None, False)]
+    while stack:
+        current, count, complete = stack.pop()
+        if count is None:
+            cache = current._hash_cache
+            if cached and cache is not None and cache[0] == current._version:
+                hashes.append(cache[1])
+                continue
+            node_type = current._node_type.value
+            if node_type == _TEXT or node_type == _CDATA_SECTION:
+                digest = _digest(b'T', current._get_nodeValue())
+                if cached:
+                    current._hash_cache = (current._version, digest)
+                hashes.append(digest)
+                continue
+            if node_type not in _HASHED and node_type not in (_DOCUMENT, _DOCUMENT_FRAGMENT):
+                # An attribute, or another node which has no structure of its own
+                value = current._get_nodeValue() or ''
+                hashes.append(_digest(b'N', '%s\0%s' % (current._node_name, value)))
+                continue
+            children = [child for child in current._child_nodes._nodes
+                        if child._node_type.value in _HASHED]
+            # An element is only closed once its children are; the document has no end of its own to
+            # tell.
+            complete = not current._is_being_parsed() \
+                and (node_type == _ELEMENT
+                     or not any(child._is_being_parsed() for child in children))
+            stack.append((current, len(children), complete))
+            stack.extend((child, None, False) for child in reversed(children))
+            continue
+        digest = blake2b(digest_size=BITS // 8)
+        if current._node_type.value == _ELEMENT:
+            digest.update(_encode('E%s' % current._node_name))
+            items = current._attributes._items
+            for name in sorted(items):
+                digest.update(_encode('\0%s=%s' % (name, items[name]._get_nodeValue())))
+        else:
+            digest.update(b'D')
+        digest.update(b'\1')
+        if count:
+            digest.update(b''.join(hashes[-count:]))
+            del hashes[-count:]
+        value = digest.digest()
+        if cached and complete:
+            current._hash_cache = (current._version, value)
+        hashes.append(value)
+    return int.from_bytes(hashes[0], 'little')
+
+
+def text_simhash(node: Node) -> int:
+    """Returns a simhash fingerprint of the text of `node`, so that nodes with nearly the same text
+    get nearly the same fingerprint.
+
+    The features are the words of `textContent`, case folded and weighted by their number of
+    occurrences.
+    Fingerprints of similar texts differ in few bits: compare them with `hamming_distance()`.
+    The fingerprint of the whole document is that of its document element.
+
+    The fingerprint is cached on `node` until its subtree is modified; the text it is computed from
+    is cached as well, see `Node.textContent`.
+
+    Args:
+        node: The node whose text is fingerprinted.
+
+    Returns:
+        An unsigned integer of `BITS` bits; 0 if there are no words.
+    """
+    if node._node_type.value == _DOCUMENT:
+        element = node.documentElement
+        if element is None:
+            return 0
+        node = element
+    cached = not node._is_batching()
+    cache = node._simhash_cache
+    if cached and cache is not None and cache[0] == node._version:
+        return cache[1]
+    text = node._get_textContent() or ''
+    weights = Counter(word.casefold() for word in _WORD.findall(text))
+    totals = [0] * BITS
+    for word, weight in weights.items():
+        bits = format(int.from_bytes(_digest(b'W', word), 'little'), '0%db' % BITS)
+        for index, bit in enumerate(bits):
+            totals[index] += weight if bit == '1' else -weight
+    fingerprint = 0
+    for total in totals:
+        fingerprint = fingerprint << 1 | (total > 0)
+    if cached and not node._is_being_parsed():
+        node._simhash_cache = (node._version, fingerprint)
+    return fingerprint
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Returns the number of bits which differ between two fingerprints returned by
+    `text_simhash()`.
+    """
+    return bin(first ^ second).count('1')
+
+
+def _encode(value: str) -> bytes:
+    return value.encode('utf-8', 'surrogatepass')
+
+
+def _digest(kind: bytes, value: str) -> bytes:
+    return blake2b(kind + _encode(value), digest_size=BITS // 8).digest()
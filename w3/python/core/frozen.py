@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import bisect
+from typing import Dict, List
+
+from w3.python.core.interface import Document
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.core.type import DOMString
+
+
+def build_indexes(document: Document) -> None:
+    """Builds the read-only indexes of `document`; see `Document.freeze()`.
+
+    The document is not marked as frozen here:
+    that is left to the caller, once every index is built.
+    """
+    preorder = [document, *document._iter_descendants()]
+    tag_index: Dict[DOMString, List[int]] = {'*': []}
+    id_index: Dict[DOMString, Element] = {}
+    for index, node in enumerate(preorder):
+        node._preorder_index = index
+        if node._node_type is Node.ELEMENT_NODE:
+            tag_index['*'].append(index)
+            tag_index.setdefault(node._node_name, []).append(index)
+            element_id = node.getAttribute('id')
+            if element_id and element_id not in id_index:
+                id_index[element_id] = node
+    # Children come after their parent in preorder, so a reversed walk
+    # sees every last child before its parent.
+    for node in reversed(preorder):
+        children = node._child_nodes._nodes
+        if children:
+            node._subtree_end = children[-1]._subtree_end
+        else:
+            node._subtree_end = node._preorder_index + 1
+    document._preorder = tuple(preorder)
+    document._tag_index = {name: tuple(positions)
+                           for name, positions in tag_index.items()}
+    document._id_index = id_index
+
+
+def indexed_elements(document: Document,
+                     name: DOMString,
+                     start: int,
+                     end: int) -> List[Element]:
+    """Returns the elements named `name` whose preorder index lies in `[start, end)`.
+
+    Only valid once `document` is frozen.
+    """
+    positions = document._tag_index.get(name, ())
+    lo = bisect.bisect_left(positions, start)
+    hi = bisect.bisect_left(positions, end, lo)
+    preorder = document._preorder
+    return [preorder[position] for position in positions[lo:hi]]
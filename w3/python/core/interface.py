@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+import re
 from ctypes import c_ushort, c_ulong
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable, Iterator, List
+from typing import Optional, Tuple
 
 from w3.python.core.exception import DOMException
+from w3.python.core.rope import Rope
+from w3.python.core.rope import splice
 from w3.python.core.type import DOMString
 
+if TYPE_CHECKING:
+    from w3.python.core.mutation import MutationJournal
+
 
 class DOMImplementation:
     """Interface DOMImplementation
@@ -34,16 +42,243 @@ class DOMImplementation:
 
 
 class NodeList:
-    item: Callable[[c_ulong], Node]
-    length: c_ulong
+    """Interface `NodeList`
+
+    The `NodeList` interface provides the abstraction of an ordered collection of nodes, without
+    defining or constraining how this collection is implemented.
+    The items in the `NodeList` are accessible via an integral index, starting from 0.
+    """
+
+    def __init__(self, nodes: Iterable[Node] = ()) -> None:
+        self._nodes: List[Node] = list(nodes)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self._get_nodes())
+
+    def __len__(self) -> int:
+        return len(self._get_nodes())
+
+    def __getitem__(self, index: int) -> Node:
+        return self._get_nodes()[index]
+
+    def __setitem__(self, index: int, node: Node) -> None:
+        self._nodes[index] = node
+
+    def __contains__(self, node: object) -> bool:
+        return any(item is node for item in self._get_nodes())
+
+    def _get_nodes(self) -> List[Node]:
+        """Accessor to get the underlying list of nodes."""
+        return self._nodes
+
+    def _get_length(self) -> c_ulong:
+        """Indirect accessor to get the `length` property."""
+        return len(self._get_nodes())
+
+    @property
+    def length(self) -> c_ulong:
+        """The number of nodes in the list.
+
+        The range of valid child node indices is 0 to `length`-1 inclusive.
+        """
+        return self._get_length()
+
+    def item(self, index: c_ulong) -> Optional[Node]:
+        """Returns the `index`th item in the collection.
+
+        If `index` is greater than or equal to the number of nodes in the list, this returns `None`.
+
+        Args:
+            index: Index into the collection.
+
+        Returns:
+            The node at the `index`th position in the `NodeList`, or `None` if that is not a valid
+            index.
+
+        This method raises no exceptions.
+        """
+        if not isinstance(index, int) or isinstance(index, bool):
+            return None
+        nodes = self._get_nodes()
+        if not 0 <= index < len(nodes):
+            return None
+        return nodes[index]
+
+
+class _ElementsByTagName(NodeList):
+    """Live `NodeList` of the descendant elements of `root` named `name`, as returned by
+    `getElementsByTagName()`.
+
+    The elements are only looked up again when accessed after the subtree of `root` has been
+    modified.
+    """
+
+    def __init__(self, root: Node, name: DOMString) -> None:
+        super().__init__()
+        self._root: Node = root
+        self._name: DOMString = name
+        # Version of `root` the elements were looked up for, and the elements, published together
+        self._cache: Optional[Tuple[int, List[Node]]] = None
+
+    def _get_nodes(self) -> List[Node]:
+        """Accessor to get the underlying list of nodes, looked up again if it may be out of date.
+        """
+        root = self._root
+        version = root._version
+        cache = self._cache
+        if cache is None or cache[0] != version or root._is_batching():
+            cache = (version, root._get_elements_by_tag_name(self._name))
+            self._cache = cache
+        return cache[1]
 
 
 class NamedNodeMap:
-    getNamedItem: Callable[[DOMString], Node]
-    setNamedItem: Callable[[Node], Node]
-    removeNamedItem: Callable[[DOMString], Node]
-    item: Callable[[c_ulong], Node]
-    length: c_ulong
+    """Interface `NamedNodeMap`
+
+    Objects implementing the `NamedNodeMap` interface are used to represent collections of nodes
+    that can be accessed by name.
+    Note that `NamedNodeMap` does not inherit from `NodeList`; `NamedNodeMap`s are not maintained in
+    any particular order.
+    Objects contained in an object implementing `NamedNodeMap` may also be accessed by an ordinal
+    index, but this is simply to allow convenient enumeration of the contents of a `NamedNodeMap`,
+    and does not imply that the DOM specifies an order to these Nodes.
+    """
+
+    def __init__(self,
+                 owner_element: Optional[Element] = None,
+                 read_only: bool = False) -> None:
+        self._owner_element: Optional[Element] = owner_element
+        self._read_only: bool = read_only
+        self._items: Dict[DOMString, Node] = {}
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _check_NO_MODIFICATION_ALLOWED_ERR(self) -> None:
+        if self._read_only:
+            raise DOMException(DOMException.NO_MODIFICATION_ALLOWED_ERR)
+        if self._owner_element is not None:
+            self._owner_element._check_NO_MODIFICATION_ALLOWED_ERR()
+
+    @property
+    def length(self) -> c_ulong:
+        """The number of nodes in the map.
+
+        The range of valid child node indices is 0 to `length`-1 inclusive.
+        """
+        return len(self._items)
+
+    def getNamedItem(self, name: DOMString) -> Optional[Node]:
+        """Retrieves a node specified by name.
+
+        Args:
+            name: Name of a node to retrieve.
+
+        Returns:
+            A `Node` (of any type) with the specified name, or `None` if the specified name did not
+            identify any node in the map.
+
+        This method raises no exceptions.
+        """
+        return self._items.get(name)
+
+    def setNamedItem(self, arg: Node) -> Optional[Node]:
+        """Adds a node using its `nodeName` attribute.
+
+        As the `nodeName` attribute is used to derive the name which the node must be stored under,
+        multiple nodes of certain types (those that have a "special" string value) cannot be stored
+        as the names would clash.
+
+        Args:
+            arg: A node to store in a named node map.
+
+        Returns:
+            If the new `Node` replaces an existing node with the same name the previously existing
+            `Node` is returned, otherwise `None` is returned.
+
+        Raises:
+            DOMException:
+            -   WRONG_DOCUMENT_ERR: Raised if `arg` was created from a different document than the
+                one that created the `NamedNodeMap`.
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this `NamedNodeMap` is readonly.
+            -   INUSE_ATTRIBUTE_ERR: Raised if `arg` is an `Attr` that is already an attribute of
+                another `Element` object.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        owner_element = self._owner_element
+        if owner_element is not None:
+            owner_element._check_WRONG_DOCUMENT_ERR(arg)
+            if isinstance(arg, Attr):
+                if arg._owner_element not in (None, owner_element):
+                    raise DOMException(DOMException.INUSE_ATTRIBUTE_ERR)
+                arg._owner_element = owner_element
+        old_item = self._items.get(arg.nodeName)
+        if old_item is arg:
+            return None
+        if isinstance(old_item, Attr):
+            old_item._owner_element = None
+        self._items[arg.nodeName] = arg
+        if owner_element is not None:
+            owner_element._bump_version()
+            journals = owner_element._get_journals()
+            if journals:
+                old_value = None
+                if old_item is not None and _wants_old_values(journals):
+                    old_value = old_item._node_value
+                _record(journals, 'attributes', owner_element, attributeName=arg.nodeName,
+                        oldValue=old_value)
+        return old_item
+
+    def removeNamedItem(self, name: DOMString) -> Node:
+        """Removes a node specified by name.
+
+        Args:
+            name: The name of a node to remove.
+
+        Returns:
+            The node removed from the map.
+
+        Raises:
+            DOMException:
+            -   NOT_FOUND_ERR: Raised if there is no node named `name` in the map.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        if name not in self._items:
+            raise DOMException(DOMException.NOT_FOUND_ERR)
+        old_item = self._items.pop(name)
+        if isinstance(old_item, Attr):
+            old_item._owner_element = None
+        owner_element = self._owner_element
+        if owner_element is not None:
+            owner_element._bump_version()
+            journals = owner_element._get_journals()
+            if journals:
+                _record(journals, 'attributes', owner_element, attributeName=name,
+                        oldValue=old_item._node_value if _wants_old_values(journals) else None)
+        return old_item
+
+    def item(self, index: c_ulong) -> Optional[Node]:
+        """Returns the `index`th item in the map.
+
+        If `index` is greater than or equal to the number of nodes in the map, this returns `None`.
+
+        Args:
+            index: Index into the map.
+
+        Returns:
+            The node at the `index`th position in the `NamedNodeMap`, or `None` if that is not a
+            valid index.
+
+        This method raises no exceptions.
+        """
+        if not isinstance(index, int) or isinstance(index, bool):
+            return None
+        if not 0 <= index < len(self._items):
+            return None
+        return list(self._items.values())[index]
 
 
 class Node:
@@ -74,20 +309,56 @@ class Node:
     DOCUMENT_FRAGMENT_NODE: c_ushort = c_ushort(11)
     NOTATION_NODE: c_ushort = c_ushort(12)
 
-    def __init__(self) -> None:
+    # Definition group `DocumentPosition`
+    # A bitmask indicating the relative document position of a node with respect to another node.
+    DOCUMENT_POSITION_DISCONNECTED: int = 0x01
+    DOCUMENT_POSITION_PRECEDING: int = 0x02
+    DOCUMENT_POSITION_FOLLOWING: int = 0x04
+    DOCUMENT_POSITION_CONTAINS: int = 0x08
+    DOCUMENT_POSITION_CONTAINED_BY: int = 0x10
+    DOCUMENT_POSITION_IMPLEMENTATION_SPECIFIC: int = 0x20
+
+    def __init__(self,
+                 owner_document: Optional[Document] = None,
+                 node_type: Optional[c_ushort] = None,
+                 node_name: DOMString = '',
+                 node_value: Optional[DOMString] = None,
+                 read_only: bool = False) -> None:
         # Accessor about this node's modification
-        self._read_only: bool
+        self._read_only: bool = read_only
         # Accessors about this node's properties
-        self._node_type: c_ushort
-        self._node_name: DOMString
-        self._node_value: DOMString
-        self._attributes: NamedNodeMap
+        self._node_type: c_ushort = node_type
+        self._node_name: DOMString = node_name
+        self._node_value: Optional[DOMString] = node_value
+        self._attributes: Optional[NamedNodeMap] = None
         # Accessors about DOM Tree
-        self._owner_document: Optional[Document]
-        self._parent_node: Optional[Node]
-        self._next_sibling_node: Optional[Node]
-        self._prev_sibling_node: Optional[Node]
-        self._child_nodes: NodeList
+        self._owner_document: Optional[Document] = owner_document
+        arena = getattr(owner_document, '_arena', None)
+        if arena is not None:
+            arena.append(self)
+        self._parent_node: Optional[Node] = None
+        self._next_sibling_node: Optional[Node] = None
+        self._prev_sibling_node: Optional[Node] = None
+        self._child_nodes: NodeList = NodeList()
+        # Number of links up to the root of this node's tree; only differences of depths along links
+        # are meaningful, so a removed subtree keeps its depths until it is inserted elsewhere.
+        self._depth: int = 0
+        # Mutation counter of the subtree rooted at this node, and the `textContent` cached for a
+        # given count
+        self._version: int = 0
+        self._text_cache: Optional[Tuple[int, DOMString]] = None
+        # Structural hash and text fingerprint cached for a given count, see
+        # `w3.python.core.fingerprint`
+        self._hash_cache: Optional[Tuple[int, bytes]] = None
+        self._simhash_cache: Optional[Tuple[int, int]] = None
+        # Position in document order, as `(stamp, index)`, see `w3.python.core.order`
+        self._order_key: Optional[Tuple[int, int]] = None
+        # Interval labels assigned by `Document.freeze()`
+        self._preorder_index: Optional[int] = None
+        self._subtree_end: Optional[int] = None
+        # Span of the source this node was parsed from, set by the parser
+        self._source_start: Optional[int] = None
+        self._source_end: Optional[int] = None
         # Methods typing hints
         self.insertBefore: Callable[[Node, Node], Node]
         self.replaceChild: Callable[[Node, Node], Node]
@@ -116,7 +387,9 @@ class Node:
 
     def _set_nodeValue(self, value: DOMString) -> None:
         """Indirect accessor to set the `nodeValue` property."""
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
         self._node_value = DOMString(value)
+        self._bump_version()
 
     def _get_nodeType(self) -> c_ushort:
         """Indirect accessor to get the `nodeType` property."""
@@ -139,18 +412,299 @@ class Node:
         return self._child_nodes
 
     def _get_child_node(self, index: c_ulong) -> Optional[Node]:
-        """Accessor to get the `childNodes`property."""
-        if self.parentNode is None:
-            return None
-        if not self.parentNode.hasChildNodes():
-            return None
-        return self.parentNode.childNodes.item(index)
+        """Accessor to get the `index`th node of the `childNodes` property."""
+        return self._child_nodes.item(index)
 
     def _insert_child_node(self, index: c_ulong, new_child: Node) -> Node:
-        raise NotImplementedError()
+        """Links `new_child` into the child list at `index`.
+
+        No checks are made here; `new_child` must already be detached from its previous parent.
+        """
+        children = self._child_nodes._nodes
+        prev_node = children[index-1] if index > 0 else None
+        next_node = children[index] if index < len(children) else None
+        children.insert(index, new_child)
+        new_child._parent_node = self
+        depth = self._depth + 1
+        if new_child._depth != depth:
+            new_child._set_depth(depth)
+        new_child._prev_sibling_node = prev_node
+        new_child._next_sibling_node = next_node
+        if prev_node is not None:
+            prev_node._next_sibling_node = new_child
+        if next_node is not None:
+            next_node._prev_sibling_node = new_child
+        return new_child
+
+    def _remove_child_node(self, old_child: Node) -> Node:
+        """Unlinks `old_child` from the child list.
+
+        No checks are made here; `old_child` must be a child of this node.
+        """
+        del self._child_nodes._nodes[self._get_index_of_child_node(old_child)]
+        prev_node = old_child._prev_sibling_node
+        next_node = old_child._next_sibling_node
+        if prev_node is not None:
+            prev_node._next_sibling_node = next_node
+        if next_node is not None:
+            next_node._prev_sibling_node = prev_node
+        old_child._parent_node = None
+        old_child._prev_sibling_node = None
+        old_child._next_sibling_node = None
+        self._bump_version()
+        journals = self._get_journals()
+        if journals:
+            _record(journals, 'childList', self, removedNodes=(old_child,),
+                    previousSibling=prev_node, nextSibling=next_node)
+        return old_child
+
+    def _set_depth(self, depth: int) -> None:
+        """Moves this node to `depth`, and its descendants along with it."""
+        shift = depth - self._depth
+        self._depth = depth
+        if self._child_nodes._nodes:
+            for node in self._iter_descendants():
+                node._depth += shift
+
+    def _release(self) -> None:
+        """Drops every reference this node holds to other nodes, leaving it detached and empty."""
+        self._owner_document = None
+        self._parent_node = None
+        self._next_sibling_node = None
+        self._prev_sibling_node = None
+        self._child_nodes._nodes.clear()
+        self._text_cache = None
+        self._hash_cache = None
+        self._simhash_cache = None
+        if self._attributes is not None:
+            self._attributes._owner_element = None
+            self._attributes._items.clear()
+
+    def _get_ancestor(self, levels: int) -> Optional[Node]:
+        """Accessor to get the ancestor `levels` links above this node, or `None` if the tree is not
+        that deep.
+        """
+        node = self
+        while levels > 0 and node is not None:
+            node = node._parent_node
+            levels -= 1
+        return node
+
+    def _contains(self, node: Node) -> bool:
+        """Returns `True` if `node` is this node or one of its descendants.
+
+        On a frozen document this compares preorder interval labels, and otherwise walks up from
+        `node` only as many links as it is deeper than this node.
+        """
+        if not self._child_nodes._nodes:
+            return node is self
+        if self._preorder_index is not None and node._preorder_index is not None \
+                and self._is_frozen() and self._get_document() is node._get_document():
+            return self._preorder_index <= node._preorder_index < self._subtree_end
+        levels = node._depth - self._depth
+        return levels >= 0 and node._get_ancestor(levels) is self
+
+    def _get_journals(self) -> Tuple[MutationJournal, ...]:
+        """Accessor to get the journals recording the modifications of the document owning this
+        node.
+        """
+        document = self._get_document()
+        return () if document is None else document._journals
+
+    def _record_insertion(self, new_child: Node) -> None:
+        """Records that `new_child` has just been inserted into the child list, if any journal is
+        attached.
+        """
+        journals = self._get_journals()
+        if journals:
+            _record(journals, 'childList', self, addedNodes=(new_child,),
+                    previousSibling=new_child._prev_sibling_node,
+                    nextSibling=new_child._next_sibling_node)
+
+    def _normalize_child_nodes(self) -> None:
+        """Merges adjacent `Text` children and removes empty ones.
+
+        The first `Text` node of each run is kept and gets the data of the whole run.
+        Nothing is done unless there is something to merge or remove, and otherwise the child list
+        is rebuilt once.
+        """
+        children = self._child_nodes._nodes
+        previous_is_text = False
+        for child in children:
+            is_text = child._node_type is Node.TEXT_NODE
+            if is_text and (previous_is_text or not child._get_nodeValue()):
+                break
+            previous_is_text = is_text
+        else:
+            return
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        journals = self._get_journals()
+        normalized: List[Node] = []
+        removed: List[Node] = []
+        index = 0
+        length = len(children)
+        while index < length:
+            child = children[index]
+            if child._node_type is not Node.TEXT_NODE:
+                normalized.append(child)
+                index += 1
+                continue
+            end = index + 1
+            while end < length and children[end]._node_type is Node.TEXT_NODE:
+                end += 1
+            if end - index > 1:
+                old_value = child._get_nodeValue()
+                child._node_value = ''.join([node._get_nodeValue() for node in children[index:end]])
+                child._rope = None
+                child._version += 1
+                if journals:
+                    _record(journals, 'characterData', child,
+                            oldValue=old_value if _wants_old_values(journals) else None)
+            if child._get_length():
+                normalized.append(child)
+                removed.extend(children[index+1:end])
+            else:
+                removed.extend(children[index:end])
+            index = end
+        for node in removed:
+            node._parent_node = None
+            node._prev_sibling_node = None
+            node._next_sibling_node = None
+        prev_node = None
+        for node in normalized:
+            node._prev_sibling_node = prev_node
+            if prev_node is not None:
+                prev_node._next_sibling_node = node
+            prev_node = node
+        if prev_node is not None:
+            prev_node._next_sibling_node = None
+        children[:] = normalized
+        self._bump_version()
+        if journals:
+            _record(journals, 'childList', self, removedNodes=tuple(removed))
+
+    def _bump_version(self) -> None:
+        """Records a mutation of this node, invalidating what is cached for it and for its
+        ancestors.
+
+        `_insert_child_node()` leaves this to its caller, so the parser can build trees without
+        walking up on every node.
+        Within `Document.batch()`, the node is only noted down, and versions are bumped once the
+        batch ends.
+        """
+        document = self._get_document()
+        if document is not None and document._batch_depth:
+            document._batch_nodes.append(self)
+            return
+        node = self
+        while node is not None:
+            node._version += 1
+            node = node._parent_node
+
+    def _is_being_parsed(self) -> bool:
+        """Returns `True` if this element has been opened but not yet closed by the parser, and so
+        may still get children.
+        """
+        return self._source_start is not None and self._source_end is None
+
+    def _get_textContent(self) -> Optional[DOMString]:
+        """Indirect accessor to get the `textContent` property.
+
+        The text of the subtree is gathered in a single walk and cached until the subtree is
+        modified.
+        Cached text of descendants is reused, so only modified parts of the tree are walked again.
+        Within `Document.batch()`, caches are neither used nor stored.
+        """
+        if self._is_batching():
+            return ''.join([node._get_nodeValue() for node in self._iter_descendants()
+                            if node._node_type is Node.TEXT_NODE
+                            or node._node_type is Node.CDATA_SECTION_NODE])
+        version = self._version
+        cache = self._text_cache
+        if cache is not None and cache[0] == version and not self._is_being_parsed():
+            return cache[1]
+        parts: List[DOMString] = []
+        stack = self._child_nodes._nodes[::-1]
+        while stack:
+            node = stack.pop()
+            node_type = node._node_type
+            if node_type is Node.TEXT_NODE or node_type is Node.CDATA_SECTION_NODE:
+                value = node._node_value
+                parts.append(value if value is not None else node._get_nodeValue())
+                continue
+            if node_type is Node.COMMENT_NODE or node_type is Node.PROCESSING_INSTRUCTION_NODE:
+                continue
+            cache = node._text_cache
+            if cache is not None and cache[0] == node._version and not node._is_being_parsed():
+                parts.append(cache[1])
+                continue
+            stack.extend(node._child_nodes._nodes[::-1])
+        text = ''.join(parts)
+        if not self._is_being_parsed():
+            self._text_cache = (version, text)
+        return text
+
+    def _set_textContent(self, text: Optional[DOMString]) -> None:
+        """Indirect accessor to set the `textContent` property.
+
+        The children are detached all at once, and versions are bumped up to the root a single time.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        children = self._child_nodes._nodes
+        removed = tuple(children)
+        if removed:
+            for node in removed:
+                node._parent_node = None
+                node._prev_sibling_node = None
+                node._next_sibling_node = None
+            children.clear()
+            journals = self._get_journals()
+            if journals:
+                _record(journals, 'childList', self, removedNodes=removed)
+        if text:
+            text_node = Text(owner_document=self._owner_document, data=text)
+            self._record_insertion(self._insert_child_node(0, text_node))
+        if removed or text:
+            self._bump_version()
 
     def _get_index_of_child_node(self, child: Node) -> c_ulong:
-        raise NotImplementedError()
+        """Accessor to get the position of `child` in the `childNodes` property."""
+        children = self._child_nodes._nodes
+        # Appending is by far the most common case, so look at the tail first.
+        if children and children[-1] is child:
+            return len(children) - 1
+        for index, node in enumerate(children):
+            if node is child:
+                return index
+        raise DOMException(DOMException.NOT_FOUND_ERR)
+
+    def _get_document(self) -> Optional[Document]:
+        """Accessor to get the `Document` this node belongs to.
+
+        Unlike `ownerDocument`, a `Document` returns itself.
+        """
+        return self._owner_document
+
+    def _iter_descendants(self) -> Iterator[Node]:
+        """Yields every descendant of this node in document order.
+
+        The tree is walked through the sibling pointers, so no stack is kept and deep trees do not
+        hit the recursion limit.
+        The tree must not be modified while iterating.
+        """
+        children = self._child_nodes._nodes
+        node = children[0] if children else None
+        while node is not None:
+            yield node
+            children = node._child_nodes._nodes
+            if children:
+                node = children[0]
+                continue
+            while node._next_sibling_node is None:
+                node = node._parent_node
+                if node is self or node is None:
+                    return
+            node = node._next_sibling_node
 
     def _get_firstChild(self) -> Optional[Node]:
         """Indirect accessor to get the `firstChild` property."""
@@ -180,37 +734,111 @@ class Node:
         """Indirect accessor to set the `ownerDocument` property."""
         self._owner_document = owner_document
 
-    def _appendChild(self, new_child: Node) -> Node:
+    def _insertBefore(self, new_child: Node, ref_child: Optional[Node]) -> Node:
+        if ref_child is None:
+            return self._appendChild(new_child)
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._check_NOT_FOUND_ERR(ref_child)
         if new_child.nodeType == Node.DOCUMENT_FRAGMENT_NODE:
-            for grand_child_node in new_child.childNodes:
-                self._appendChild(grand_child_node)
+            for grand_child_node in list(new_child.childNodes):
+                self._insertBefore(grand_child_node, ref_child)
+            return new_child
+        self._check_WRONG_DOCUMENT_ERR(new_child)
+        self._check_HIERARCHY_REQUEST_ERR(new_child)
+        if new_child is ref_child:
+            return new_child
+        if new_child._parent_node is not None:
+            new_child._parent_node._remove_child_node(new_child)
+        self._insert_child_node(self._get_index_of_child_node(ref_child),
+                                new_child)
+        self._bump_version()
+        self._record_insertion(new_child)
+        return new_child
+
+    def _replaceChild(self, new_child: Node, old_child: Node) -> Node:
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._check_NOT_FOUND_ERR(old_child)
+        if new_child is old_child:
+            return old_child
+        if new_child.nodeType == Node.DOCUMENT_FRAGMENT_NODE:
+            self._insertBefore(new_child, old_child)
         else:
-            self._check_NO_MODIFICATION_ALLOWED_ERR()
             self._check_WRONG_DOCUMENT_ERR(new_child)
             self._check_HIERARCHY_REQUEST_ERR(new_child)
-            # XXX
-            raise NotImplementedError()
+            if new_child._parent_node is not None:
+                new_child._parent_node._remove_child_node(new_child)
+            self._insert_child_node(self._get_index_of_child_node(old_child),
+                                    new_child)
+            self._record_insertion(new_child)
+        return self._remove_child_node(old_child)
+
+    def _removeChild(self, old_child: Node) -> Node:
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._check_NOT_FOUND_ERR(old_child)
+        return self._remove_child_node(old_child)
+
+    def _appendChild(self, new_child: Node) -> Node:
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        if new_child.nodeType == Node.DOCUMENT_FRAGMENT_NODE:
+            for grand_child_node in list(new_child.childNodes):
+                self._appendChild(grand_child_node)
+            return new_child
+        self._check_WRONG_DOCUMENT_ERR(new_child)
+        self._check_HIERARCHY_REQUEST_ERR(new_child)
+        if new_child._parent_node is not None:
+            new_child._parent_node._remove_child_node(new_child)
+        self._insert_child_node(len(self._child_nodes._nodes), new_child)
+        self._bump_version()
+        self._record_insertion(new_child)
         return new_child
 
     def _hasChildNodes(self) -> bool:
         return self.childNodes.length > 0
 
     def _check_HIERARCHY_REQUEST_ERR(self, node: Node) -> None:
-        # Should be checked on subclasses.
-        raise NotImplementedError()
+        if self._node_type is not None:
+            child_node_types = _CHILD_NODE_TYPES[self._node_type.value]
+            if node._node_type.value not in child_node_types:
+                raise DOMException(DOMException.HIERARCHY_REQUEST_ERR)
+        if node._contains(self):
+            raise DOMException(DOMException.HIERARCHY_REQUEST_ERR)
 
     def _check_WRONG_DOCUMENT_ERR(self, node: Node) -> None:
-        if node.ownerDocument is not self.ownerDocument:
+        if node._get_document() is not self._get_document():
             raise DOMException(DOMException.WRONG_DOCUMENT_ERR)
 
     def _check_NO_MODIFICATION_ALLOWED_ERR(self) -> None:
-        if self._read_only:
+        if self._read_only or self._is_frozen():
             raise DOMException(DOMException.NO_MODIFICATION_ALLOWED_ERR)
 
     def _check_NOT_FOUND_ERR(self, node: Node) -> None:
-        if node not in self.childNodes:
+        if node._parent_node is not self:
             raise DOMException(DOMException.NOT_FOUND_ERR)
 
+    def _get_elements_by_tag_name(self, name: DOMString) -> List[Element]:
+        """Accessor to get descendant elements named `name` in document order.
+
+        On a frozen document the tag index built by `Document.freeze()` is used instead of walking
+        the subtree.
+        """
+        document = self._get_document()
+        if document is not None and document._frozen and self._preorder_index is not None:
+            from w3.python.core.frozen import indexed_elements
+            return indexed_elements(document, name, self._preorder_index + 1, self._subtree_end)
+        return [node for node in self._iter_descendants()
+                if node._node_type is Node.ELEMENT_NODE
+                and (name == '*' or node._node_name == name)]
+
+    def _is_frozen(self) -> bool:
+        """Returns `True` if the document owning this node has been frozen."""
+        document = self._get_document()
+        return document is not None and document._frozen
+
+    def _is_batching(self) -> bool:
+        """Returns `True` while the document owning this node is within `Document.batch()`."""
+        document = self._get_document()
+        return document is not None and document._batch_depth > 0
+
     @property
     def nodeName(self) -> DOMString:
         """The name of this node, depending on its type."""
@@ -303,6 +931,28 @@ class Node:
         """
         return self._get_ownerDocument()
 
+    @property
+    def textContent(self) -> Optional[DOMString]:
+        """The text content of this node and its descendants.
+
+        For `Element` and `DocumentFragment` nodes, this is the concatenation of the data of every
+        `Text` and `CDATASection` descendant, in document order.
+        For `Text`, `CDATASection`, `Comment` and `Attr` nodes, this is the same as `nodeValue`.
+        For `Document` and `DocumentType` nodes, this is `None`.
+        On setting, any possible children are removed and replaced by a single `Text` node
+        containing the string (if it is not empty).
+
+        Raises:
+            Exceptions on setting
+                DOMException:
+                    NO_MODIFICATION_ALLOWED_ERR: Raised when the node is readonly.
+        """
+        return self._get_textContent()
+
+    @textContent.setter
+    def textContent(self, text: Optional[DOMString]) -> None:
+        self._set_textContent(text)
+
     def insertBefore(self, newChild: Node, refChild: Node) -> Node:
         """Inserts the node `newChild` before the existing child node `refChild`.
 
@@ -324,7 +974,7 @@ class Node:
             -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
             -   NOT_FOUND_ERR: Raised if `refChild` is not a child of this node.
         """
-        raise NotImplementedError()
+        return self._insertBefore(newChild, refChild)
 
     def replaceChild(self, newChild: Node, oldChild: Node) -> Node:
         """Replaces the child node `oldChild` with `newChild` in the list of children, and returns the `oldChild` node.
@@ -345,7 +995,7 @@ class Node:
             -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
             -   NOT_FOUND_ERR: Raised if `oldChild` is not a child of this node.
         """
-        raise NotImplementedError()
+        return self._replaceChild(newChild, oldChild)
 
     def removeChild(self, oldChild: Node) -> Node:
         """Removes the child node indicated by `oldChild` from the list of children, and returns it.
@@ -361,7 +1011,7 @@ class Node:
             -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
             -   NOT_FOUND_ERR: Raised if `oldChild` is not a child of this node.
         """
-        raise NotImplementedError()
+        return self._removeChild(oldChild)
 
     def appendChild(self, newChild: Node) -> Node:
         """Adds the node `newChild` to the end of the list of children of this node.
@@ -393,6 +1043,31 @@ class Node:
         """
         return self._hasChildNodes()
 
+    def compareDocumentPosition(self, other: Node) -> int:
+        """Compares the reference node, i.e. the node on which this method is being called, with a
+        node, i.e. the one passed as a parameter, with regard to their position in the document and
+        according to the document order.
+
+        An `Attr` is positioned as if it were the first child of its owner element, before any other
+        child.
+
+        Args:
+            other: The node to compare against the reference node.
+
+        Returns:
+            Returns how the node is positioned relatively to the reference node, as a bitmask of the
+            `DOCUMENT_POSITION_*` constants.
+
+        This method raises no exceptions.
+        """
+        # `order` is built on top of this module, and so is imported once needed; as is `frozen`.
+        from w3.python.core.order import compare_document_position
+        return compare_document_position(self, other)
+
+    def _get_position_node(self) -> Optional[Node]:
+        """Accessor to get the node of the tree whose position this node takes in document order."""
+        return self
+
     def cloneNode(self) -> Node:
         """Returns a duplicate of this node, i.e., serves as a generic copy constructor for nodes.
 
@@ -411,6 +1086,59 @@ class Node:
         raise NotImplementedError()
 
 
+# Characters which may not appear in names of elements or attributes.
+_INVALID_NAME_CHARACTERS = re.compile(r'[\s"\'<>/=]')
+
+
+def _check_INVALID_CHARACTER_ERR(name: DOMString) -> None:
+    if not name or _INVALID_NAME_CHARACTERS.search(name):
+        raise DOMException(DOMException.INVALID_CHARACTER_ERR)
+
+
+# `mutation` is imported by these only, as there is nothing to record until a `MutationJournal` is
+# attached.
+def _record(journals: Tuple[MutationJournal, ...], *args: Any, **kwargs: Any) -> None:
+    from w3.python.core.mutation import MutationRecord, notify
+    notify(journals, MutationRecord(*args, **kwargs))
+
+
+def _wants_old_values(journals: Tuple[MutationJournal, ...]) -> bool:
+    from w3.python.core.mutation import wants_old_values
+    return wants_old_values(journals)
+
+
+def _node_type_values(*node_types: c_ushort) -> FrozenSet[int]:
+    return frozenset(node_type.value for node_type in node_types)
+
+
+# Types of nodes which may be children of each type of node, keyed by `Node.nodeType` values.
+# `c_ushort` is not hashable, so the raw integers are used here.
+_CONTENT_NODE_TYPES = _node_type_values(Node.ELEMENT_NODE,
+                                        Node.PROCESSING_INSTRUCTION_NODE,
+                                        Node.COMMENT_NODE,
+                                        Node.TEXT_NODE,
+                                        Node.CDATA_SECTION_NODE,
+                                        Node.ENTITY_REFERENCE_NODE)
+_CHILD_NODE_TYPES: Dict[int, FrozenSet[int]] = {
+    Node.ELEMENT_NODE.value: _CONTENT_NODE_TYPES,
+    Node.ATTRIBUTE_NODE.value: _node_type_values(Node.TEXT_NODE,
+                                                 Node.ENTITY_REFERENCE_NODE),
+    Node.TEXT_NODE.value: frozenset(),
+    Node.CDATA_SECTION_NODE.value: frozenset(),
+    Node.ENTITY_REFERENCE_NODE.value: _CONTENT_NODE_TYPES,
+    Node.ENTITY_NODE.value: _CONTENT_NODE_TYPES,
+    Node.PROCESSING_INSTRUCTION_NODE.value: frozenset(),
+    Node.COMMENT_NODE.value: frozenset(),
+    Node.DOCUMENT_NODE.value: _node_type_values(Node.ELEMENT_NODE,
+                                                Node.PROCESSING_INSTRUCTION_NODE,
+                                                Node.COMMENT_NODE,
+                                                Node.DOCUMENT_TYPE_NODE),
+    Node.DOCUMENT_TYPE_NODE.value: frozenset(),
+    Node.DOCUMENT_FRAGMENT_NODE.value: _CONTENT_NODE_TYPES,
+    Node.NOTATION_NODE.value: frozenset(),
+}
+
+
 class DocumentFragment(Node):
     """Interface `DocumentFragment`
 
@@ -444,98 +1172,997 @@ class DocumentFragment(Node):
 
 
 class Attr(Node):
-    name: DOMString
-    specified: bool
-    value: DOMString
+    """Interface `Attr`
 
+    The `Attr` interface represents an attribute in an `Element` object.
+    Typically the allowable values for the attribute are defined in a document type definition.
 
-class Element(Node):
-    tagName: DOMString
-    getAttribute: Callable[[DOMString], DOMString]
-    setAttribute: Callable[[DOMString, DOMString], None]
-    removeAttribute: Callable[[DOMString], None]
-    getAttributeNode: Callable[[DOMString], Attr]
-    setAttributeNode: Callable[[Attr], Attr]
-    removeAttributeNode: Callable[[Attr], Attr]
-    getElementsByTagName: Callable[[DOMString], NodeList]
-    normalize: Callable[[], None]
+    `Attr` objects inherit the `Node` interface, but since they are not actually child nodes of the
+    element they describe, the DOM does not consider them part of the document tree.
+    Thus, the `Node` attributes `parentNode`, `previousSibling`, and `nextSibling` have a `None`
+    value for `Attr` objects.
+    """
 
+    def __init__(self,
+                 owner_document: Document,
+                 name: DOMString,
+                 value: DOMString = '',
+                 specified: bool = True,
+                 read_only: bool = False) -> None:
+        super().__init__(owner_document=owner_document,
+                         node_type=Node.ATTRIBUTE_NODE,
+                         node_name=name,
+                         node_value=value,
+                         read_only=read_only)
+        self._owner_element: Optional[Element] = None
+        self._specified: bool = specified
 
-class CharacterData(Node):
-    data: DOMString
-    length: c_ulong
-    substringData: Callable[[c_ulong, c_ulong], DOMString]
-    appendData: Callable[[DOMString], None]
-    insertData: Callable[[c_ulong, DOMString], None]
-    deleteData: Callable[[c_ulong, c_ulong], None]
-    replaceData: Callable[[c_ulong, c_ulong, DOMString], None]
+    def _set_nodeValue(self, value: DOMString) -> None:
+        """Indirect accessor to set the `nodeValue` property."""
+        old_value = self._node_value
+        super()._set_nodeValue(value)
+        self._specified = True
+        owner_element = self._owner_element
+        if owner_element is not None:
+            owner_element._bump_version()
+            journals = owner_element._get_journals()
+            if journals:
+                _record(journals, 'attributes', owner_element, attributeName=self._node_name,
+                        oldValue=old_value if _wants_old_values(journals) else None)
+
+    def _get_textContent(self) -> DOMString:
+        """Indirect accessor to get the `textContent` property."""
+        return self._get_nodeValue()
 
+    def _set_textContent(self, text: Optional[DOMString]) -> None:
+        """Indirect accessor to set the `textContent` property."""
+        self._set_nodeValue(text or '')
 
-class Comment(CharacterData):
-    pass
+    def _get_position_node(self) -> Optional[Element]:
+        """Accessor to get the node of the tree whose position this node takes in document order,
+        which is its owner element.
+        """
+        return self._owner_element
 
+    def _release(self) -> None:
+        """Drops every reference this node holds to other nodes, leaving it detached and empty."""
+        super()._release()
+        self._owner_element = None
 
-class Text(CharacterData):
-    splitText: Callable[[c_ulong], Text]
+    @property
+    def name(self) -> DOMString:
+        """Returns the name of this attribute."""
+        return self._get_nodeName()
 
+    @property
+    def specified(self) -> bool:
+        """If this attribute was explicitly given a value in the original document, this is `True`;
+        otherwise, it is `False`.
+        """
+        return self._specified
 
-class CDATASection(Text):
-    pass
+    @property
+    def value(self) -> DOMString:
+        """On retrieval, the value of the attribute is returned as a string.
+
+        Raises:
+            Exceptions on setting
+                DOMException:
+                    NO_MODIFICATION_ALLOWED_ERR: Raised when the node is readonly.
+        """
+        return self._get_nodeValue()
 
+    @value.setter
+    def value(self, value: DOMString) -> None:
+        self._set_nodeValue(value)
 
-class DocumentType(Node):
-    name: DOMString
-    entities: NamedNodeMap
-    notations: NamedNodeMap
 
+class Element(Node):
+    """Interface `Element`
 
-class Notation(Node):
-    publicId: DOMString
-    systemId: DOMString
+    By far the vast majority of objects (apart from text) that authors encounter when traversing a
+    document are `Element` nodes.
+    Elements may have attributes associated with them; since the `Element` interface inherits from
+    `Node`, the generic `Node` interface method `attributes` may be used to retrieve the set of all
+    attributes for an element.
+    """
 
+    def __init__(self,
+                 owner_document: Document,
+                 tag_name: DOMString,
+                 read_only: bool = False) -> None:
+        super().__init__(owner_document=owner_document,
+                         node_type=Node.ELEMENT_NODE,
+                         node_name=tag_name,
+                         node_value=None,
+                         read_only=read_only)
+        self._attributes = NamedNodeMap(owner_element=self)
 
-class Entity(Node):
-    publicId: DOMString
-    systemId: DOMString
-    notationName: DOMString
+    def _set_nodeValue(self, value: DOMString) -> None:
+        """Indirect accessor to set the `nodeValue` property.
 
+        `nodeValue` of an `Element` is always `None`, so setting it has no effect.
+        """
 
-class EntityReference(Node):
-    pass
+    @property
+    def tagName(self) -> DOMString:
+        """The name of the element."""
+        return self._get_nodeName()
 
+    def getAttribute(self, name: DOMString) -> DOMString:
+        """Retrieves an attribute value by name.
 
-class ProcessingInstruction(Node):
-    target: DOMString
-    data: DOMString
+        Args:
+            name: The name of the attribute to retrieve.
 
+        Returns:
+            The `Attr` value as a string, or the empty string if that attribute does not have a
+            specified or default value.
 
-class Document(Node):
-    """Interface Document
+        This method raises no exceptions.
+        """
+        attr = self._attributes._items.get(name)
+        if attr is None:
+            return ''
+        return attr._get_nodeValue()
 
-    The `Document` interface represents the entire HTML or XML document.
-    Conceptually, it is the root of the document tree, and provides the primary access to the document's data.
+    def setAttribute(self, name: DOMString, value: DOMString) -> None:
+        """Adds a new attribute.
 
-    Since elements, text nodes, comments, processing instructions, etc. cannot exist outside the context of a `Document`, the `Document` interface also contains the factory methods needed to create these objects.
-    The `Node` objects created have a `ownerDocument`` attribute which associates them with the `Document` within whose context they were created.
-    """
+        If an attribute with that name is already present in the element, its value is changed to be
+        that of the value parameter.
 
-    doctype: DocumentType
-    implementation: DOMImplementation
-    documentElement: Element
-    createElement: Callable[[Document, DOMString], Element]
-    createDocumentFragment: Callable[[Document], DocumentFragment]
-    createTextNode: Callable[[Document, DOMString], Text]
-    createComment: Callable[[Document, DOMString], Comment]
-    createCDATASection: Callable[[Document, DOMString], CDATASection]
-    createProcessingInstruction: Callable[[
-        Document, DOMString, DOMString], ProcessingInstruction]
-    createAttribute: Callable[[Document, DOMString], Attr]
-    createEntityReference: Callable[[Document, DOMString], EntityReference]
-    getElementsByTagName: Callable[[Document, DOMString], NodeList]
+        Args:
+            name: The name of the attribute to create or alter.
+            value: Value to set in string form.
 
-    def __init__(self, read_only: bool = False) -> None:
-        super().__init__(owner_document=None,
-                         node_type=Node.DOCUMENT_NODE,
-                         node_name='#document',
-                         node_value=None,
-                         read_only=read_only)
+        Raises:
+            DOMException:
+            -   INVALID_CHARACTER_ERR: Raised if the specified name contains an invalid character.
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        _check_INVALID_CHARACTER_ERR(name)
+        attr = self._attributes._items.get(name)
+        if attr is None:
+            attr = Attr(owner_document=self._owner_document,
+                        name=name,
+                        value=value)
+            self._attributes.setNamedItem(attr)
+        else:
+            attr._set_nodeValue(value)
+
+    def removeAttribute(self, name: DOMString) -> None:
+        """Removes an attribute by name.
+
+        Args:
+            name: The name of the attribute to remove.
+
+        Raises:
+            DOMException:
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        if name in self._attributes._items:
+            self._attributes.removeNamedItem(name)
+
+    def getAttributeNode(self, name: DOMString) -> Optional[Attr]:
+        """Retrieves an `Attr` node by name.
+
+        Args:
+            name: The name of the attribute to retrieve.
+
+        Returns:
+            The `Attr` node with the specified attribute name or `None` if there is no such
+            attribute.
+
+        This method raises no exceptions.
+        """
+        return self._attributes.getNamedItem(name)
+
+    def setAttributeNode(self, newAttr: Attr) -> Optional[Attr]:
+        """Adds a new attribute.
+
+        If an attribute with that name is already present in the element, it is replaced by the new
+        one.
+
+        Args:
+            newAttr: The `Attr` node to add to the attribute list.
+
+        Returns:
+            If the `newAttr` attribute replaces an existing attribute with the same name, the
+            previously existing `Attr` node is returned, otherwise `None` is returned.
+
+        Raises:
+            DOMException:
+            -   WRONG_DOCUMENT_ERR: Raised if `newAttr` was created from a different document than
+                the one that created the element.
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+            -   INUSE_ATTRIBUTE_ERR: Raised if `newAttr` is already an attribute of another
+                `Element` object.
+        """
+        return self._attributes.setNamedItem(newAttr)
+
+    def removeAttributeNode(self, oldAttr: Attr) -> Attr:
+        """Removes the specified attribute.
+
+        Args:
+            oldAttr: The `Attr` node to remove from the attribute list.
+
+        Returns:
+            The `Attr` node that was removed.
+
+        Raises:
+            DOMException:
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+            -   NOT_FOUND_ERR: Raised if `oldAttr` is not an attribute of the element.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        if self._attributes.getNamedItem(oldAttr.name) is not oldAttr:
+            raise DOMException(DOMException.NOT_FOUND_ERR)
+        return self._attributes.removeNamedItem(oldAttr.name)
+
+    def getElementsByTagName(self, name: DOMString) -> NodeList:
+        """Returns a `NodeList` of all descendant elements with a given tag name, in the order in
+        which they would be encountered in a preorder traversal of the `Element` tree.
+
+        Args:
+            name: The name of the tag to match on. The special value "*" matches all tags.
+
+        Returns:
+            A list of matching `Element` nodes.
+
+        This method raises no exceptions.
+        """
+        return _ElementsByTagName(self, name)
+
+    def normalize(self) -> None:
+        """Puts all `Text` nodes in the full depth of the sub-tree underneath this `Element` into a
+        "normal" form where only markup (e.g., tags, comments, processing instructions, CDATA
+        sections, and entity references) separates `Text` nodes, i.e., there are no adjacent `Text`
+        nodes.
+
+        This can be used to ensure that the DOM view of a document is the same as if it were saved
+        and re-loaded.
+        Empty `Text` nodes are removed as well.
+
+        The subtree is walked once; each child list is rebuilt at most once, and the data of each
+        run of adjacent `Text` nodes is joined at once.
+
+        Raises:
+            DOMException:
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if a node whose children have to be merged is
+                readonly.
+        """
+        stack: List[Node] = [self]
+        while stack:
+            node = stack.pop()
+            node._normalize_child_nodes()
+            stack.extend(child for child in node._child_nodes._nodes
+                         if child._child_nodes._nodes)
+
+
+# Data of at least this many characters is edited in a `Rope` rather than as a string.
+class CharacterData(Node):
+    """Interface `CharacterData`
+
+    The `CharacterData` interface extends `Node` with a set of attributes and methods for accessing
+    character data in the DOM.
+    For clarity this set is defined here rather than on each object that uses these attributes and
+    methods.
+    No DOM objects correspond directly to `CharacterData`, though `Text` and others do inherit the
+    interface from it.
+    All offsets in this interface start from 0.
+    """
+
+    def __init__(self,
+                 owner_document: Document,
+                 node_type: c_ushort,
+                 node_name: DOMString,
+                 data: DOMString = '',
+                 read_only: bool = False) -> None:
+        super().__init__(owner_document=owner_document,
+                         node_type=node_type,
+                         node_name=node_name,
+                         node_value=data,
+                         read_only=read_only)
+        # Large data is moved into a rope on its first edit, so further edits do not copy it all.
+        # `_node_value` is then `None` after each edit, until the data is read again.
+        self._rope: Optional[Rope] = None
+
+    def _get_nodeValue(self) -> DOMString:
+        """Indirect accessor to get the `nodeValue` property.
+
+        Data edited in a rope is put back together here, once per series of edits.
+        """
+        value = self._node_value
+        if value is None:
+            value = self._node_value = str(self._rope)
+        return value
+
+    def _set_nodeValue(self, value: DOMString) -> None:
+        """Indirect accessor to set the `nodeValue` property."""
+        journals = self._get_journals()
+        old_value = self._get_nodeValue() if journals and _wants_old_values(journals) else None
+        super()._set_nodeValue(value)
+        self._rope = None
+        if journals:
+            _record(journals, 'characterData', self, oldValue=old_value)
+
+    def _get_length(self) -> c_ulong:
+        """Indirect accessor to get the `length` property."""
+        if self._node_value is None:
+            return len(self._rope)
+        return len(self._node_value)
+
+    def _edit_data(self, offset: c_ulong, count: c_ulong, arg: DOMString) -> None:
+        """Replaces the `count` characters from `offset` on with `arg`."""
+        journals = self._get_journals()
+        if journals:
+            _record(journals, 'characterData', self,
+                    oldValue=self._get_nodeValue() if _wants_old_values(journals) else None)
+        self._node_value, self._rope = splice(self._node_value, self._rope, offset, count, arg)
+        self._bump_version()
+
+    def _check_INDEX_SIZE_ERR(self, offset: c_ulong, count: c_ulong = 0) -> None:
+        if offset < 0 or offset > self._get_length() or count < 0:
+            raise DOMException(DOMException.INDEX_SIZE_ERR)
+
+    @property
+    def data(self) -> DOMString:
+        """The character data of the node that implements this interface.
+
+        Raises:
+            Exceptions on setting
+                DOMException:
+                    NO_MODIFICATION_ALLOWED_ERR: Raised when the node is readonly.
+
+            Exceptions on retrieval
+                DOMException:
+                    DOMSTRING_SIZE_ERR: Raised when it would return more characters than fit in a
+                        `DOMString` variable on the implementation platform.
+        """
+        return self._get_nodeValue()
+
+    @data.setter
+    def data(self, data: DOMString) -> None:
+        self._set_nodeValue(data)
+
+    @property
+    def length(self) -> c_ulong:
+        """The number of characters that are available through `data` and the `substringData` method
+        below.
+
+        This may have the value zero, i.e., `CharacterData` nodes may be empty.
+        """
+        return self._get_length()
+
+    def substringData(self, offset: c_ulong, count: c_ulong) -> DOMString:
+        """Extracts a range of data from the node.
+
+        Args:
+            offset: Start offset of substring to extract.
+            count: The number of characters to extract.
+
+        Returns:
+            The specified substring.
+            If the sum of `offset` and `count` exceeds the `length`, then all characters to the end
+            of the data are returned.
+
+        Raises:
+            DOMException:
+            -   INDEX_SIZE_ERR: Raised if the specified offset is negative or greater than the
+                number of characters in `data`, or if the specified `count` is negative.
+        """
+        self._check_INDEX_SIZE_ERR(offset, count)
+        if self._node_value is None:
+            return self._rope.substring(offset, count)
+        return self._node_value[offset:offset+count]
+
+    def appendData(self, arg: DOMString) -> None:
+        """Append the string to the end of the character data of the node.
+
+        Upon success, `data` provides access to the concatenation of `data` and the `DOMString`
+        specified.
+
+        Args:
+            arg: The `DOMString` to append.
+
+        Raises:
+            DOMException:
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._edit_data(self._get_length(), 0, DOMString(arg))
+
+    def insertData(self, offset: c_ulong, arg: DOMString) -> None:
+        """Insert a string at the specified character offset.
+
+        Args:
+            offset: The character offset at which to insert.
+            arg: The `DOMString` to insert.
+
+        Raises:
+            DOMException:
+            -   INDEX_SIZE_ERR: Raised if the specified offset is negative or greater than the
+                number of characters in `data`.
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._check_INDEX_SIZE_ERR(offset)
+        self._edit_data(offset, 0, DOMString(arg))
+
+    def deleteData(self, offset: c_ulong, count: c_ulong) -> None:
+        """Remove a range of characters from the node.
+
+        Upon success, `data` and `length` reflect the change.
+
+        Args:
+            offset: The offset from which to remove characters.
+            count: The number of characters to delete.
+                If the sum of `offset` and `count` exceeds `length` then all characters from
+                `offset` to the end of the data are deleted.
+
+        Raises:
+            DOMException:
+            -   INDEX_SIZE_ERR: Raised if the specified offset is negative or greater than the
+                number of characters in `data`, or if the specified `count` is negative.
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._check_INDEX_SIZE_ERR(offset, count)
+        self._edit_data(offset, count, '')
+
+    def replaceData(self, offset: c_ulong, count: c_ulong, arg: DOMString) -> None:
+        """Replace the characters starting at the specified character offset with the specified
+        string.
+
+        Args:
+            offset: The offset from which to start replacing.
+            count: The number of characters to replace.
+                If the sum of `offset` and `count` exceeds `length`, then all characters to the end
+                of the data are replaced (i.e., the effect is the same as a `remove` method call
+                with the same range, followed by an `append` method invocation).
+            arg: The `DOMString` with which the range must be replaced.
+
+        Raises:
+            DOMException:
+            -   INDEX_SIZE_ERR: Raised if the specified offset is negative or greater than the
+                number of characters in `data`, or if the specified `count` is negative.
+            -   NO_MODIFICATION_ALLOWED_ERR: Raised if this node is readonly.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        self._check_INDEX_SIZE_ERR(offset, count)
+        self._edit_data(offset, count, DOMString(arg))
+
+    def _get_textContent(self) -> DOMString:
+        """Indirect accessor to get the `textContent` property."""
+        return self._get_nodeValue()
+
+    def _set_textContent(self, text: Optional[DOMString]) -> None:
+        """Indirect accessor to set the `textContent` property."""
+        self._set_nodeValue(text or '')
+
+
+class Comment(CharacterData):
+    """Interface `Comment`
+
+    This represents the content of a comment, i.e., all the characters between the starting '<!--'
+    and ending '-->'.
+    """
+
+    def __init__(self,
+                 owner_document: Document,
+                 data: DOMString = '',
+                 read_only: bool = False) -> None:
+        super().__init__(owner_document=owner_document,
+                         node_type=Node.COMMENT_NODE,
+                         node_name='#comment',
+                         data=data,
+                         read_only=read_only)
+
+
+class Text(CharacterData):
+    """Interface `Text`
+
+    The `Text` interface represents the textual content (termed character data in XML) of an
+    `Element` or `Attr`.
+    If there is no markup inside an element's content, the text is contained in a single object
+    implementing the `Text` interface that is the only child of the element.
+    If there is markup, it is parsed into a list of elements and `Text` nodes that form the list of
+    children of the element.
+    """
+
+    splitText: Callable[[c_ulong], Text]
+
+    def __init__(self,
+                 owner_document: Document,
+                 data: DOMString = '',
+                 read_only: bool = False) -> None:
+        super().__init__(owner_document=owner_document,
+                         node_type=Node.TEXT_NODE,
+                         node_name='#text',
+                         data=data,
+                         read_only=read_only)
+
+
+class CDATASection(Text):
+    """Interface `CDATASection`
+
+    CDATA sections are used to escape blocks of text containing characters that would otherwise be
+    regarded as markup.
+    The only delimiter that is recognized in a CDATA section is the "]]>" string that ends the CDATA
+    section.
+    """
+
+    def __init__(self,
+                 owner_document: Document,
+                 data: DOMString = '',
+                 read_only: bool = False) -> None:
+        CharacterData.__init__(self,
+                               owner_document=owner_document,
+                               node_type=Node.CDATA_SECTION_NODE,
+                               node_name='#cdata-section',
+                               data=data,
+                               read_only=read_only)
+
+
+class DocumentType(Node):
+    """Interface `DocumentType`
+
+    Each `Document` has a `doctype` attribute whose value is either `None` or a `DocumentType`
+    object.
+    The `DocumentType` interface in the DOM Level 1 Core provides an interface to the list of
+    entities that are defined for the document, and little else because the effect of namespaces and
+    the various XML scheme efforts on DTD representation are not clearly understood as of this
+    writing.
+    """
+
+    def __init__(self,
+                 owner_document: Document,
+                 name: DOMString,
+                 read_only: bool = False) -> None:
+        super().__init__(owner_document=owner_document,
+                         node_type=Node.DOCUMENT_TYPE_NODE,
+                         node_name=name,
+                         node_value=None,
+                         read_only=read_only)
+        self._entities: NamedNodeMap = NamedNodeMap(read_only=True)
+        self._notations: NamedNodeMap = NamedNodeMap(read_only=True)
+
+    def _get_textContent(self) -> None:
+        """Indirect accessor to get the `textContent` property, which is always `None` for a
+        `DocumentType`.
+        """
+        return None
+
+    def _set_textContent(self, text: Optional[DOMString]) -> None:
+        """Indirect accessor to set the `textContent` property, which has no effect on a
+        `DocumentType`.
+        """
+
+    @property
+    def name(self) -> DOMString:
+        """The name of DTD; i.e., the name immediately following the `DOCTYPE` keyword."""
+        return self._get_nodeName()
+
+    @property
+    def entities(self) -> NamedNodeMap:
+        """A `NamedNodeMap` containing the general entities, both external and internal, declared in
+        the DTD.
+        """
+        return self._entities
+
+    @property
+    def notations(self) -> NamedNodeMap:
+        """A `NamedNodeMap` containing the notations declared in the DTD."""
+        return self._notations
+
+
+class Notation(Node):
+    publicId: DOMString
+    systemId: DOMString
+
+
+class Entity(Node):
+    publicId: DOMString
+    systemId: DOMString
+    notationName: DOMString
+
+
+class EntityReference(Node):
+    pass
+
+
+class ProcessingInstruction(Node):
+    target: DOMString
+    data: DOMString
+
+
+class Document(Node):
+    """Interface Document
+
+    The `Document` interface represents the entire HTML or XML document.
+    Conceptually, it is the root of the document tree, and provides the primary access to the
+    document's data.
+
+    Since elements, text nodes, comments, processing instructions, etc. cannot exist outside the
+    context of a `Document`, the `Document` interface also contains the factory methods needed to
+    create these objects.
+    The `Node` objects created have a `ownerDocument`` attribute which associates them with the
+    `Document` within whose context they were created.
+
+    Thread safety:
+        Any number of threads may read one document at once, as long as no thread modifies it
+        meanwhile:
+        properties, `getElementsByTagName()` and the live `NodeList`s it returns,
+        `getElementById()`, `textContent`, `compareDocumentPosition()`, `sort_in_document_order()`,
+        `XPath.evaluate()`, `subtree_hash()` and `text_simhash()`.
+        The caches these fill lazily are each published as a single tuple of the version they were
+        built for and their content, so a thread either finds a complete cache or builds its own,
+        and threads racing to fill the same cache store equal values.
+        No lock is taken on reads.
+
+        Modifications, `batch()`, `release()` and attaching `MutationJournal`s must not run
+        concurrently with anything else on the same document; synchronizing them is up to the
+        caller.
+        Freezing the document with `freeze()` is the way to share it for good, since it can then no
+        longer be modified by mistake, and its indexes are all built before it is marked as frozen.
+    """
+
+    createProcessingInstruction: Callable[[
+        Document, DOMString, DOMString], ProcessingInstruction]
+    createEntityReference: Callable[[Document, DOMString], EntityReference]
+
+    def __init__(self,
+                 read_only: bool = False,
+                 arena: bool = False) -> None:
+        """
+        Args:
+            read_only: If `True`, the document itself cannot be modified.
+            arena: If `True`, the document keeps a registry of every node created for it, so that
+                `release()` can tear them all down at once.
+        """
+        # Registry of the nodes created for this document, in arena mode
+        self._arena: Optional[List[Node]] = [] if arena else None
+        super().__init__(owner_document=None,
+                         node_type=Node.DOCUMENT_NODE,
+                         node_name='#document',
+                         node_value=None,
+                         read_only=read_only)
+        self._implementation: DOMImplementation = DOMImplementation()
+        # Structures built by `freeze()`
+        self._frozen: bool = False
+        self._preorder: Tuple[Node, ...] = ()
+        self._tag_index: Dict[DOMString, Tuple[int, ...]] = {}
+        self._id_index: Dict[DOMString, Element] = {}
+        # Set by the parser if it stopped at a limit
+        self._truncated: bool = False
+        # Version of the document the id index was built for, and that index, until the document is
+        # frozen
+        self._id_cache: Optional[Tuple[int, Dict[DOMString, Element]]] = None
+        # State of `batch()`
+        self._batch_depth: int = 0
+        self._batch_nodes: List[Node] = []
+        # Version of the document the document order was numbered for, and the stamp of that
+        # numbering:
+        # the version itself, or a negative count for numberings within `batch()`
+        self._order_version: Optional[int] = None
+        self._order_stamp: int = 0
+        self._batch_stamp: int = 0
+        # Attached `MutationJournal`s, replaced as a whole when one is attached or closed
+        self._journals: Tuple[MutationJournal, ...] = ()
+
+    def _get_document(self) -> Document:
+        """Accessor to get the `Document` this node belongs to, which is itself."""
+        return self
+
+    def _get_textContent(self) -> None:
+        """Indirect accessor to get the `textContent` property, which is always `None` for a
+        `Document`.
+        """
+        return None
+
+    def _set_textContent(self, text: Optional[DOMString]) -> None:
+        """Indirect accessor to set the `textContent` property, which has no effect on a `Document`.
+        """
+
+    @property
+    def doctype(self) -> Optional[DocumentType]:
+        """The Document Type Declaration associated with this document.
+
+        For HTML documents as well as XML documents without a document type declaration this returns
+        `None`.
+        """
+        for node in self._child_nodes:
+            if node._node_type is Node.DOCUMENT_TYPE_NODE:
+                return node
+        return None
+
+    @property
+    def implementation(self) -> DOMImplementation:
+        """The `DOMImplementation` object that handles this document."""
+        return self._implementation
+
+    @property
+    def documentElement(self) -> Optional[Element]:
+        """This is a convenience attribute that allows direct access to the child node that is the
+        root element of the document.
+        """
+        for node in self._child_nodes:
+            if node._node_type is Node.ELEMENT_NODE:
+                return node
+        return None
+
+    @property
+    def frozen(self) -> bool:
+        """`True` once `freeze()` has been called on this document."""
+        return self._frozen
+
+    @property
+    def truncated(self) -> bool:
+        """`True` if the parser stopped building this document on reaching one of its
+        `ParserLimits`, leaving the rest of the source out.
+        """
+        return self._truncated
+
+    def createElement(self, tagName: DOMString) -> Element:
+        """Creates an element of the type specified.
+
+        Args:
+            tagName: The name of the element type to instantiate.
+
+        Returns:
+            A new `Element` object.
+
+        Raises:
+            DOMException:
+            -   INVALID_CHARACTER_ERR: Raised if the specified name contains an invalid character.
+        """
+        _check_INVALID_CHARACTER_ERR(tagName)
+        return Element(owner_document=self, tag_name=tagName)
+
+    def createDocumentFragment(self) -> DocumentFragment:
+        """Creates an empty `DocumentFragment` object.
+
+        Returns:
+            A new `DocumentFragment`.
+
+        This method has no parameters.
+        This method raises no exceptions.
+        """
+        return DocumentFragment(owner_document=self)
+
+    def createTextNode(self, data: DOMString) -> Text:
+        """Creates a `Text` node given the specified string.
+
+        Args:
+            data: The data for the node.
+
+        Returns:
+            The new `Text` object.
+
+        This method raises no exceptions.
+        """
+        return Text(owner_document=self, data=data)
+
+    def createComment(self, data: DOMString) -> Comment:
+        """Creates a `Comment` node given the specified string.
+
+        Args:
+            data: The data for the node.
+
+        Returns:
+            The new `Comment` object.
+
+        This method raises no exceptions.
+        """
+        return Comment(owner_document=self, data=data)
+
+    def createCDATASection(self, data: DOMString) -> CDATASection:
+        """Creates a `CDATASection` node whose value is the specified string.
+
+        Args:
+            data: The data for the `CDATASection` contents.
+
+        Returns:
+            The new `CDATASection` object.
+
+        This method raises no exceptions.
+        """
+        return CDATASection(owner_document=self, data=data)
+
+    def createAttribute(self, name: DOMString) -> Attr:
+        """Creates an `Attr` of the given name.
+
+        Args:
+            name: The name of the attribute.
+
+        Returns:
+            A new `Attr` object.
+
+        Raises:
+            DOMException:
+            -   INVALID_CHARACTER_ERR: Raised if the specified name contains an invalid character.
+        """
+        _check_INVALID_CHARACTER_ERR(name)
+        return Attr(owner_document=self, name=name, specified=False)
+
+    def getElementsByTagName(self, tagname: DOMString) -> NodeList:
+        """Returns a `NodeList` of all the `Element`s with a given tag name in the order in which
+        they would be encountered in a preorder traversal of the `Document` tree.
+
+        Args:
+            tagname: The name of the tag to match on. The special value "*" matches all tags.
+
+        Returns:
+            A new `NodeList` object containing all the matched `Element`s.
+
+        This method raises no exceptions.
+        """
+        return _ElementsByTagName(self, tagname)
+
+    def getElementById(self, elementId: DOMString) -> Optional[Element]:
+        """Returns the `Element` whose `id` attribute is given by `elementId`.
+
+        If more than one element has that `id`, the first one in document order is returned.
+
+        Args:
+            elementId: The unique `id` value for an element.
+
+        Returns:
+            The matching element, or `None` if there is none.
+
+        This method raises no exceptions.
+        """
+        if self._frozen:
+            return self._id_index.get(elementId)
+        if self._batch_depth:
+            for node in self._iter_descendants():
+                if node._node_type is Node.ELEMENT_NODE \
+                        and node.getAttribute('id') == elementId:
+                    return node
+            return None
+        version = self._version
+        cache = self._id_cache
+        if cache is None or cache[0] != version:
+            id_index: Dict[DOMString, Element] = {}
+            for node in self._iter_descendants():
+                if node._node_type is Node.ELEMENT_NODE:
+                    element_id = node.getAttribute('id')
+                    if element_id and element_id not in id_index:
+                        id_index[element_id] = node
+            cache = (version, id_index)
+            self._id_cache = cache
+        return cache[1].get(elementId)
+
+    @contextmanager
+    def batch(self) -> Iterator[Document]:
+        """Groups many modifications of the document, deferring the upkeep of derived structures
+        until they are all done.
+
+        Modifications made within the batch only note down the nodes they touch.
+        Cached text, the id index and the results of `getElementsByTagName()` are then invalidated
+        once, when the outermost batch ends, in a single walk up from the noted nodes.
+        Reading the document within the batch stays correct, as caches are bypassed until then.
+
+        Batches may be nested; only the outermost one commits.
+
+        Example:
+            >>> with document.batch():
+            ...     for item in items:
+            ...         ul.appendChild(item)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._commit_batch()
+
+    def __enter__(self) -> Document:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        # A frozen document may be shared, e.g. by a `DocumentCache`, so it is not the block's to
+        # release.
+        if not self._frozen:
+            self.release()
+
+    def release(self) -> None:
+        """Tears down the document at once.
+
+        Nodes drop their references to other nodes: links to their parent, siblings, children,
+        attributes and owner document are cleared in a single pass.
+        The parent, child and sibling links make a tree one large reference cycle, which otherwise
+        stays in memory until the cyclic garbage collector traces it; once released, each node is
+        freed by reference counting as soon as nothing else refers to it.
+
+        In arena mode, every node ever created for this document is released, in the tree or not.
+        Otherwise, the nodes of the tree and their attributes are; detached subtrees are left to the
+        garbage collector.
+
+        A document used as a context manager is released on exit, which makes its owner explicit:
+
+        Example:
+            >>> with parse(source) as document:
+            ...     rows = extract(document)
+
+        The document is left empty. Nodes still referred to elsewhere remain valid objects,
+        but are detached and no longer owned by any document.
+
+        A frozen document is meant to be shared, so it cannot be released; a context manager leaves
+        it as is on exit.
+
+        This method has no parameters.
+
+        Raises:
+            DOMException:
+                NO_MODIFICATION_ALLOWED_ERR: Raised if the document is frozen.
+        """
+        self._check_NO_MODIFICATION_ALLOWED_ERR()
+        if self._arena is not None:
+            nodes = self._arena
+        else:
+            nodes = []
+            for node in self._iter_descendants():
+                nodes.append(node)
+                if node._attributes is not None:
+                    nodes.extend(node._attributes._items.values())
+        for node in nodes:
+            node._release()
+        nodes.clear()
+        self._child_nodes._nodes.clear()
+        self._text_cache = None
+        self._hash_cache = None
+        self._simhash_cache = None
+        self._preorder = ()
+        self._tag_index = {}
+        self._id_index = {}
+        self._id_cache = None
+        self._batch_nodes = []
+        self._journals = ()
+        self._version += 1
+
+    def _commit_batch(self) -> None:
+        """Bumps the version of every node modified within the batch and of its ancestors, each at
+        most once.
+        """
+        nodes = self._batch_nodes
+        self._batch_nodes = []
+        bumped = set()
+        for node in nodes:
+            while node is not None and id(node) not in bumped:
+                bumped.add(id(node))
+                node._version += 1
+                node = node._parent_node
+
+    def freeze(self) -> None:
+        """Makes the whole document tree immutable.
+
+        Once frozen, every node owned by this document raises `NO_MODIFICATION_ALLOWED_ERR` on
+        modification.
+        The read-only state is kept as a single flag on the document, so freezing does not touch
+        every node's `_read_only`.
+
+        In exchange for immutability, `freeze()` precomputes structures which are never invalidated
+        afterwards:
+
+        -   a flattened preorder array of the whole tree,
+        -   preorder interval labels on every node, so a subtree is a contiguous range of that
+            array,
+        -   a tag index and an id index used by `getElementsByTagName()` and `getElementById()`.
+
+        All of them are built before the document is marked as frozen and are never written to
+        again, so a frozen document can be queried from many threads at once without locking.
+        Calling `freeze()` on an already frozen document does nothing.
+
+        This method has no parameters.
+        This method raises no exceptions.
+        """
+        if self._frozen:
+            return
+        from w3.python.core.frozen import build_indexes
+        build_indexes(self)
+        self._frozen = True
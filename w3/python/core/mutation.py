@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Iterable, List, NamedTuple, Optional, Tuple
+
+from w3.python.core.type import DOMString
+
+if TYPE_CHECKING:
+    from w3.python.core.interface import Document
+    from w3.python.core.interface import Node
+
+
+class MutationRecord(NamedTuple):
+    """A single modification of the tree, as recorded by a `MutationJournal`.
+
+    -   `'childList'` records list the `addedNodes` and `removedNodes` of `target`, along with the
+        siblings around them.
+    -   `'attributes'` records name the `attributeName` of the `target` element which was set or
+        removed.
+    -   `'characterData'` records tell that the data of the `target` node changed.
+
+    `oldValue` holds the value of the attribute or data before the modification, if the journal
+    asked for it.
+    """
+
+    type: str
+    target: Node
+    addedNodes: Tuple[Node, ...] = ()
+    removedNodes: Tuple[Node, ...] = ()
+    previousSibling: Optional[Node] = None
+    nextSibling: Optional[Node] = None
+    attributeName: Optional[DOMString] = None
+    oldValue: Optional[DOMString] = None
+
+
+class MutationJournal:
+    """Records every modification of a document into a ring buffer, to be drained in batches.
+
+    Modifications are recorded from the moment the journal is created until it is closed.
+    At most `maxlen` records are kept: when more pile up before being drained, the oldest ones are
+    dropped and `overflowed` is set, so that a consumer knows it missed changes and must look at the
+    whole document again.
+
+    While no journal is attached, recording costs a single check per modification.
+
+    Example:
+        >>> with MutationJournal(document) as journal:
+        ...     rewrite(document)
+        ...     for record in journal.drain():
+        ...         reindex(record.target)
+    """
+
+    def __init__(self,
+                 document: Document,
+                 maxlen: int = 4096,
+                 old_values: bool = False) -> None:
+        """
+        Args:
+            document: The document to record the modifications of.
+            maxlen: The number of records kept until they are drained.
+            old_values: If `True`, records keep the value of attributes and character data before
+                each modification.
+                For large character data edited in place, this puts the data back together on every
+                edit.
+        """
+        self._document: Document = document
+        self._records: Deque[MutationRecord] = deque(maxlen=maxlen)
+        self._old_values: bool = old_values
+        # Set when records were dropped since the last `drain()`.
+        self.overflowed: bool = False
+        document._journals = document._journals + (self,)
+
+    def __enter__(self) -> MutationJournal:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _append(self, record: MutationRecord) -> None:
+        records = self._records
+        if len(records) == records.maxlen:
+            self.overflowed = True
+        records.append(record)
+
+    def drain(self) -> List[MutationRecord]:
+        """Returns the records kept so far, in the order the modifications were made, and forgets
+        them.
+
+        `overflowed` is cleared as well; check it before draining.
+        """
+        records = list(self._records)
+        self._records.clear()
+        self.overflowed = False
+        return records
+
+    def close(self) -> None:
+        """Stops recording the modifications of the document."""
+        self._document._journals = tuple(journal for journal in self._document._journals
+                                         if journal is not self)
+
+
+def notify(journals: Iterable[MutationJournal], record: MutationRecord) -> None:
+    """Appends `record` to each of `journals`."""
+    for journal in journals:
+        journal._append(record)
+
+
+def wants_old_values(journals: Iterable[MutationJournal]) -> bool:
+    """Returns `True` if any of `journals` keeps old values."""
+    return any(journal._old_values for journal in journals)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from functools import cmp_to_key
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from w3.python.core.interface import Attr
+from w3.python.core.interface import Document
+from w3.python.core.interface import Node
+
+
+def compare_document_position(node: Node, other: Node) -> int:
+    """Returns how `other` is positioned relatively to `node`.
+
+    See `Node.compareDocumentPosition()`.
+    """
+    if other is node:
+        return 0
+    position = node._get_position_node()
+    other_position = other._get_position_node()
+    if position is None or other_position is None:
+        return _compare_disconnected(node, other)
+    if position is other_position:
+        # One of them is an attribute of the other, or both are attributes of the same element.
+        if isinstance(node, Attr) and isinstance(other, Attr):
+            names = list(position._attributes._items)
+            following = names.index(other._node_name) > names.index(node._node_name)
+            return Node.DOCUMENT_POSITION_IMPLEMENTATION_SPECIFIC | (
+                Node.DOCUMENT_POSITION_FOLLOWING if following else Node.DOCUMENT_POSITION_PRECEDING)
+        if isinstance(other, Attr):
+            return Node.DOCUMENT_POSITION_CONTAINED_BY | Node.DOCUMENT_POSITION_FOLLOWING
+        return Node.DOCUMENT_POSITION_CONTAINS | Node.DOCUMENT_POSITION_PRECEDING
+    if position._contains(other_position):
+        if isinstance(node, Attr):
+            # Children of an element follow its attributes, but are not contained by them.
+            return Node.DOCUMENT_POSITION_FOLLOWING
+        return Node.DOCUMENT_POSITION_CONTAINED_BY | Node.DOCUMENT_POSITION_FOLLOWING
+    if other_position._contains(position):
+        if isinstance(other, Attr):
+            return Node.DOCUMENT_POSITION_PRECEDING
+        return Node.DOCUMENT_POSITION_CONTAINS | Node.DOCUMENT_POSITION_PRECEDING
+    if position._preorder_index is not None and other_position._preorder_index is not None \
+            and node._is_frozen() and position._get_document() is other_position._get_document():
+        if other_position._preorder_index > position._preorder_index:
+            return Node.DOCUMENT_POSITION_FOLLOWING
+        return Node.DOCUMENT_POSITION_PRECEDING
+    # Bring both branches to the same depth, then climb them together up to their common ancestor.
+    branch = position._get_ancestor(max(position._depth - other_position._depth, 0))
+    other_branch = other_position._get_ancestor(max(other_position._depth - position._depth, 0))
+    if branch is None or other_branch is None:
+        return _compare_disconnected(node, other)
+    while branch._parent_node is not other_branch._parent_node:
+        branch = branch._parent_node
+        other_branch = other_branch._parent_node
+        if branch is None or other_branch is None:
+            return _compare_disconnected(node, other)
+    if branch._parent_node is None:
+        return _compare_disconnected(node, other)
+    parent = branch._parent_node
+    if parent._get_index_of_child_node(other_branch) > parent._get_index_of_child_node(branch):
+        return Node.DOCUMENT_POSITION_FOLLOWING
+    return Node.DOCUMENT_POSITION_PRECEDING
+
+
+def _compare_disconnected(node: Node, other: Node) -> int:
+    # Nodes of different trees get an arbitrary, yet consistent, order.
+    following = id(other) > id(node)
+    return Node.DOCUMENT_POSITION_DISCONNECTED | Node.DOCUMENT_POSITION_IMPLEMENTATION_SPECIFIC \
+        | (Node.DOCUMENT_POSITION_FOLLOWING if following else Node.DOCUMENT_POSITION_PRECEDING)
+
+
+def update_document_order(document: Document) -> None:
+    """Numbers the nodes of the tree of `document` in preorder, unless the numbering is up to date.
+
+    The numbering is kept until the document is modified;
+    nodes numbered before carry an older stamp and so are known to be out of date.
+    A frozen document uses the preorder indexes built by `Document.freeze()` instead.
+
+    Outside of `Document.batch()`, the stamp is the version of the document, so threads numbering
+    the same unmodified tree at once write the very same keys, and each of them finds its numbering
+    intact whichever thread wrote a key last.
+    """
+    if document._frozen:
+        return
+    version = document._version
+    if document._order_version == version and not document._batch_depth:
+        return
+    if document._batch_depth:
+        # Versions are not bumped within a batch, so every numbering there needs a stamp of its own.
+        document._batch_stamp -= 1
+        stamp = document._batch_stamp
+    else:
+        stamp = version
+    document._order_stamp = stamp
+    document._order_key = (stamp, 0)
+    for index, node in enumerate(document._iter_descendants(), 1):
+        node._order_key = (stamp, index)
+    document._order_version = version
+
+
+def order_key(node: Node) -> Optional[int]:
+    """Returns the index of `node` in the preorder of the tree of its document,
+    or `None` if it is not in that tree.
+
+    The numbering must be up to date; see `update_document_order()`.
+    """
+    document = node._get_document()
+    if document is None:
+        return None
+    if document._frozen:
+        return node._preorder_index
+    key = node._order_key
+    if key is None or key[0] != document._order_stamp:
+        return None
+    return key[1]
+
+
+def sort_in_document_order(nodes: Iterable[Node]) -> List[Node]:
+    """Returns `nodes` in document order, without duplicates.
+
+    Nodes are sorted by the preorder index of the tree of their document, which is assigned at once
+    the first time it is needed after a modification, so merging the results of several queries
+    costs a sort of integer keys rather than comparisons of positions in the tree.
+    An `Attr` comes right after its owner element.
+    Nodes which are not in the tree of their document come last,
+    in the order given by `compareDocumentPosition()`.
+
+    Args:
+        nodes: The nodes to sort, possibly with duplicates.
+
+    Returns:
+        A new list of the distinct nodes, in document order.
+    """
+    unique = list({id(node): node for node in nodes}.values())
+    documents: Dict[int, int] = {}
+    keyed: List[Tuple[int, int, int, Node]] = []
+    others: List[Node] = []
+    for node in unique:
+        document = node._get_document()
+        position = node._get_position_node()
+        key = None
+        if document is not None and position is not None:
+            if id(document) not in documents:
+                documents[id(document)] = len(documents)
+                update_document_order(document)
+            key = order_key(position)
+        if key is None:
+            others.append(node)
+            continue
+        # Attributes go after their owner element, and before its first child.
+        offset = 0
+        if position is not node:
+            offset = 1 + list(position._attributes._items).index(node._node_name)
+        keyed.append((documents[id(document)], key, offset, node))
+    keyed.sort(key=lambda item: item[:3])
+    others.sort(key=cmp_to_key(lambda node, other: (
+        -1 if compare_document_position(node, other) & Node.DOCUMENT_POSITION_FOLLOWING else 1)))
+    return [item[3] for item in keyed] + others
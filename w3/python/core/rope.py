@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple, Union
+
+
+# Leaves of a rope are plain strings of at most this many characters.
+LEAF_SIZE = 1024
+
+# Data of at least this many characters is moved into a rope on its first edit.
+ROPE_THRESHOLD = 4096
+
+
+class _Branch:
+    """Inner node of a rope, the concatenation of `left` and `right`."""
+
+    __slots__ = ('left', 'right', 'length', 'height')
+
+    def __init__(self, left: _Rope, right: _Rope) -> None:
+        self.left: _Rope = left
+        self.right: _Rope = right
+        self.length: int = len(left) if left.__class__ is str else left.length
+        self.length += len(right) if right.__class__ is str else right.length
+        self.height: int = max(_height(left), _height(right)) + 1
+
+
+_Rope = Union[str, _Branch]
+
+
+def _length(node: _Rope) -> int:
+    return len(node) if node.__class__ is str else node.length
+
+
+def _height(node: _Rope) -> int:
+    return 0 if node.__class__ is str else node.height
+
+
+def _balance(node: _Branch) -> _Rope:
+    """Restores the AVL balance of `node`, whose subtrees differ in height by at most 2."""
+    left, right = node.left, node.right
+    difference = _height(left) - _height(right)
+    if difference > 1:
+        if _height(left.left) < _height(left.right):
+            left = _rotate_left(left)
+        return _rotate_right(_Branch(left, right))
+    if difference < -1:
+        if _height(right.right) < _height(right.left):
+            right = _rotate_right(right)
+        return _rotate_left(_Branch(left, right))
+    return node
+
+
+def _rotate_left(node: _Branch) -> _Branch:
+    right = node.right
+    return _Branch(_Branch(node.left, right.left), right.right)
+
+
+def _rotate_right(node: _Branch) -> _Branch:
+    left = node.left
+    return _Branch(left.left, _Branch(left.right, node.right))
+
+
+def _join(left: _Rope, right: _Rope) -> _Rope:
+    """Concatenates two ropes, in time proportional to the difference of their heights."""
+    if not _length(left):
+        return right
+    if not _length(right):
+        return left
+    left_height = _height(left)
+    right_height = _height(right)
+    if left_height > right_height + 1:
+        return _balance(_Branch(left.left, _join(left.right, right)))
+    if right_height > left_height + 1:
+        return _balance(_Branch(_join(left, right.left), right.right))
+    if left_height == right_height == 0 and len(left) + len(right) <= LEAF_SIZE:
+        return left + right
+    return _Branch(left, right)
+
+
+def _split(node: _Rope, offset: int) -> Tuple[_Rope, _Rope]:
+    """Splits a rope into the characters before `offset` and the ones from `offset` on."""
+    if node.__class__ is str:
+        return node[:offset], node[offset:]
+    left_length = _length(node.left)
+    if offset <= left_length:
+        left, right = _split(node.left, offset)
+        return left, _join(right, node.right)
+    left, right = _split(node.right, offset - left_length)
+    return _join(node.left, left), right
+
+
+def _from_string(text: str) -> _Rope:
+    """Builds a balanced rope of `LEAF_SIZE` leaves out of `text`."""
+    if len(text) <= LEAF_SIZE:
+        return text
+    leaves = [text[i:i+LEAF_SIZE] for i in range(0, len(text), LEAF_SIZE)]
+    return _build(leaves, 0, len(leaves))
+
+
+def _build(leaves: List[str], start: int, end: int) -> _Rope:
+    if end - start == 1:
+        return leaves[start]
+    middle = (start + end) // 2
+    return _Branch(_build(leaves, start, middle), _build(leaves, middle, end))
+
+
+class Rope:
+    """A mutable string stored as a balanced tree of chunks.
+
+    Inserting or deleting characters anywhere costs `O(log n)`, instead of copying the whole string
+    as `str` slicing does.
+    The whole string is only put together by `str()`.
+    """
+
+    __slots__ = ('_root',)
+
+    def __init__(self, text: str = '') -> None:
+        self._root: _Rope = _from_string(text)
+
+    def __len__(self) -> int:
+        return _length(self._root)
+
+    def __str__(self) -> str:
+        if self._root.__class__ is str:
+            return self._root
+        leaves: List[str] = []
+        stack: List[_Rope] = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is str:
+                leaves.append(node)
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+        return ''.join(leaves)
+
+    def substring(self, offset: int, count: int) -> str:
+        """Returns the (at most) `count` characters from `offset` on, only visiting the chunks they
+        lie in.
+        """
+        end = min(offset + count, len(self))
+        parts: List[str] = []
+        stack: List[Tuple[_Rope, int]] = [(self._root, 0)]
+        while stack:
+            node, start = stack.pop()
+            node_end = start + _length(node)
+            if node_end <= offset or start >= end:
+                continue
+            if node.__class__ is str:
+                parts.append(node[max(offset - start, 0):end - start])
+            else:
+                stack.append((node.right, start + _length(node.left)))
+                stack.append((node.left, start))
+        return ''.join(parts)
+
+    def insert(self, offset: int, text: str) -> None:
+        """Inserts `text` at `offset`."""
+        if not text:
+            return
+        left, right = _split(self._root, offset)
+        self._root = _join(_join(left, _from_string(text)), right)
+
+    def delete(self, offset: int, count: int) -> None:
+        """Deletes the (at most) `count` characters from `offset` on."""
+        if count <= 0:
+            return
+        left, rest = _split(self._root, offset)
+        self._root = _join(left, _split(rest, count)[1])
+
+    def append(self, text: str) -> None:
+        """Appends `text` at the end."""
+        self._root = _join(self._root, _from_string(text))
+
+
+def splice(value: Optional[str],
+           rope: Optional[Rope],
+           offset: int,
+           count: int,
+           text: str) -> Tuple[Optional[str], Optional[Rope]]:
+    """Replaces the `count` characters from `offset` on with `text`, in the data `value` or `rope`.
+
+    Data small enough is edited as a string; larger data is moved into a rope on its first edit,
+    so further edits do not copy it all.
+
+    Args:
+        value: The data as a string, or `None` if it was edited in `rope` since it was last read.
+        rope: The rope the data is edited in, or `None` if it has not been moved into one.
+
+    Returns:
+        The data as a string, or `None` if the edit was made in the rope; and the rope, if any.
+    """
+    if rope is None:
+        if len(value) < ROPE_THRESHOLD:
+            return value[:offset] + text + value[offset+count:], None
+        rope = Rope(value)
+    rope.delete(offset, count)
+    rope.insert(offset, text)
+    return None, rope
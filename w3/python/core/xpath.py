@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import re
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from w3.python.core.interface import Node
+from w3.python.core.order import sort_in_document_order
+from w3.python.core.type import DOMString
+
+
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<string>"[^"]*"|'[^']*')
+    |(?P<number>\d+)
+    |(?P<axis>[a-zA-Z][\w-]*)\s*::
+    |(?P<function>[a-zA-Z][\w-]*)\s*\(
+    |(?P<name>[a-zA-Z_][\w-]*|\*)
+    |(?P<symbol>//|/|\.\.|\.|@|\[|\]|\)|,|!=|=)
+)''', re.VERBOSE)
+
+_AXES = frozenset(['child', 'descendant', 'descendant-or-self', 'self', 'parent', 'attribute',
+                   'ancestor', 'ancestor-or-self', 'following-sibling', 'preceding-sibling'])
+_NODE_TESTS = frozenset(['text', 'node', 'comment'])
+
+# A predicate takes the nodes selected from one context node, in axis order, and returns those it
+# keeps.
+_Predicate = Callable[[List[Node]], List[Node]]
+# A value expression within a predicate returns the strings it stands for on a node.
+_Value = Callable[[Node], List[DOMString]]
+
+
+class _Step:
+    """One location step of a compiled path: the nodes on `axis` passing the node test and then
+    every predicate.
+    """
+
+    __slots__ = ('axis', 'kind', 'name', 'predicates', 'positional')
+
+    def __init__(self,
+                 axis: str,
+                 kind: str,
+                 name: Optional[DOMString] = None,
+                 predicates: Tuple[_Predicate, ...] = (),
+                 positional: bool = False) -> None:
+        self.axis: str = axis
+        # One of 'name' (the principal node type of the axis, named `name` unless `None`), 'text',
+        # 'comment' or 'node'
+        self.kind: str = kind
+        self.name: Optional[DOMString] = name
+        self.predicates: Tuple[_Predicate, ...] = predicates
+        # `True` if any predicate depends on positions, which makes the step depend on how nodes are
+        # grouped by context node
+        self.positional: bool = positional
+
+    def test(self, node: Node) -> bool:
+        kind = self.kind
+        if kind == 'name':
+            principal = Node.ATTRIBUTE_NODE if self.axis == 'attribute' else Node.ELEMENT_NODE
+            return node._node_type is principal \
+                and (self.name is None or node._node_name == self.name)
+        if kind == 'text':
+            return node._node_type is Node.TEXT_NODE or node._node_type is Node.CDATA_SECTION_NODE
+        if kind == 'comment':
+            return node._node_type is Node.COMMENT_NODE
+        return True
+
+
+class XPath:
+    """A compiled path expression, in the abbreviated XPath 1.0 syntax.
+
+    The supported subset covers location paths made of:
+
+    -   absolute (`/`, `//`) and relative paths, `.` and `..`;
+    -   the `child`, `descendant`, `descendant-or-self`, `self`, `parent`, `attribute`, `ancestor`,
+        `ancestor-or-self`, `following-sibling` and `preceding-sibling` axes, with `@` for
+        `attribute::`;
+    -   name tests, `*`, `text()`, `comment()` and `node()`;
+    -   predicates: a position (`[2]`), `[last()]`, a value (`@name`, `text()`, `.` or a child
+        element name) tested for existence, compared with `=` or `!=` to a string, or passed to
+        `contains()` or `starts-with()`, and `not()` of any of these.
+
+    The expression is compiled once; `evaluate()` then runs the plan against any context node.
+    `//name` steps are looked up through `getElementsByTagName()`, which uses the tag index of a
+    frozen document, and child steps follow the child lists. Nodes are kept in document order
+    between steps without sorting whenever possible.
+
+    Example:
+        >>> hrefs = [attr.value for attr in compile_path('//a/@href').evaluate(document)]
+    """
+
+    def __init__(self, expression: str) -> None:
+        """
+        Args:
+            expression: The path expression.
+
+        Raises:
+            ValueError: Raised if `expression` is not a valid path in the supported subset.
+        """
+        self._expression: str = expression
+        self._absolute: bool = False
+        self._steps: Tuple[_Step, ...] = ()
+        _Compiler(expression).compile(self)
+
+    def __repr__(self) -> str:
+        return '%s(%r)' % (type(self).__name__, self._expression)
+
+    @property
+    def expression(self) -> str:
+        """The source of the compiled expression."""
+        return self._expression
+
+    def evaluate(self, context: Node) -> List[Node]:
+        """Returns the nodes selected by the path from `context`, in document order and without
+        duplicates.
+
+        Text nodes selected by `text()` and attributes selected by `@name` are returned as nodes;
+        read their `data` or `value`.
+
+        Args:
+            context: The context node; absolute paths start from its document instead.
+
+        Returns:
+            The selected nodes.
+        """
+        if self._absolute:
+            document = context._get_document()
+            context = document if document is not None else _get_root(context)
+        nodes = [context]
+        # `ordered`: nodes are in document order without duplicates. `flat`: moreover, no node is a
+        # descendant of another.
+        ordered = flat = True
+        for step in self._steps:
+            if not ordered:
+                nodes = sort_in_document_order(nodes)
+                flat = False
+            axis = step.axis
+            descendant = axis in ('descendant', 'descendant-or-self')
+            if descendant and not flat and not step.positional:
+                # The descendants of nested context nodes are already among those of the outermost
+                # ones.
+                nodes = _outermost(nodes)
+                flat = True
+            selected: List[Node] = []
+            for node in nodes:
+                selected.extend(_select(step, node))
+            nodes = selected
+            if axis in ('child', 'attribute'):
+                ordered = flat
+                flat = flat or axis == 'attribute'
+            elif descendant:
+                ordered, flat = flat, False
+            elif axis != 'self':
+                ordered = flat = False
+        if not ordered:
+            nodes = sort_in_document_order(nodes)
+        return nodes
+
+
+@lru_cache(maxsize=256)
+def compile_path(expression: str) -> XPath:
+    """Returns the compiled `XPath` for `expression`, reusing the plans of the most recently used
+    expressions.
+
+    Raises:
+        ValueError: Raised if `expression` is not a valid path in the supported subset.
+    """
+    return XPath(expression)
+
+
+def _get_root(node: Node) -> Node:
+    while node._parent_node is not None:
+        node = node._parent_node
+    return node
+
+
+def _outermost(nodes: List[Node]) -> List[Node]:
+    """Drops the nodes of a list in document order which lie within an earlier one, whose
+    descendants already cover theirs.
+    """
+    kept: List[Node] = []
+    for node in nodes:
+        if not kept or not kept[-1]._contains(node):
+            kept.append(node)
+    return kept
+
+
+def _iter_axis(axis: str, node: Node) -> Iterator[Node]:
+    """Yields the nodes on `axis` from `node`, in axis order."""
+    if axis == 'child':
+        yield from node._child_nodes._nodes
+    elif axis == 'descendant':
+        yield from node._iter_descendants()
+    elif axis == 'descendant-or-self':
+        yield node
+        yield from node._iter_descendants()
+    elif axis == 'self':
+        yield node
+    elif axis == 'attribute':
+        if node._attributes is not None and node._node_type is Node.ELEMENT_NODE:
+            yield from node._attributes._items.values()
+    elif axis == 'following-sibling':
+        sibling = node._next_sibling_node
+        while sibling is not None:
+            yield sibling
+            sibling = sibling._next_sibling_node
+    elif axis == 'preceding-sibling':
+        sibling = node._prev_sibling_node
+        while sibling is not None:
+            yield sibling
+            sibling = sibling._prev_sibling_node
+    else:
+        # The parent of an attribute is the element it belongs to.
+        if node._node_type is Node.ATTRIBUTE_NODE:
+            parent = node._owner_element
+        else:
+            parent = node._parent_node
+        if axis == 'ancestor-or-self':
+            yield node
+        elif axis == 'parent':
+            if parent is not None:
+                yield parent
+            return
+        while parent is not None:
+            yield parent
+            parent = parent._parent_node
+
+
+def _select(step: _Step, node: Node) -> List[Node]:
+    """Returns the nodes selected by `step` from a single context node, in axis order."""
+    if step.axis == 'descendant' and step.kind == 'name':
+        selected = node._get_elements_by_tag_name(step.name or '*')
+    elif step.axis == 'child' and step.kind == 'name':
+        name = step.name
+        selected = [child for child in node._child_nodes._nodes
+                    if child._node_type is Node.ELEMENT_NODE
+                    and (name is None or child._node_name == name)]
+    else:
+        selected = [candidate for candidate in _iter_axis(step.axis, node) if step.test(candidate)]
+    for predicate in step.predicates:
+        if not selected:
+            break
+        selected = predicate(selected)
+    return selected
+
+
+class _Compiler:
+    """Recursive descent compiler of path expressions into the steps of an `XPath`."""
+
+    def __init__(self, expression: str) -> None:
+        self._expression: str = expression
+        self._tokens: List[Tuple[str, str]] = []
+        self._positions: List[int] = []
+        self._index: int = 0
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None:
+                raise self._error(position)
+            self._tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            self._positions.append(match.start(match.lastgroup))
+            position = match.end()
+
+    def _error(self, position: Optional[int] = None) -> ValueError:
+        """Returns the error to raise for an unexpected character at `position`, or else for the
+        last token read.
+        """
+        if position is None and 0 < self._index <= len(self._positions):
+            position = self._positions[self._index - 1]
+        where = 'end' if position is None else 'position %d' % position
+        return ValueError('invalid path expression %r at %s' % (self._expression, where))
+
+    def _peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self._index < len(self._tokens):
+            return self._tokens[self._index]
+        return None, None
+
+    def _next(self) -> Tuple[Optional[str], Optional[str]]:
+        token = self._peek()
+        self._index += 1
+        return token
+
+    def _expect(self, symbol: str) -> None:
+        if self._next() != ('symbol', symbol):
+            raise self._error()
+
+    def compile(self, path: XPath) -> None:
+        steps: List[_Step] = []
+        kind, separator = self._peek()
+        if kind is None:
+            raise self._error()
+        if kind == 'symbol' and separator in ('/', '//'):
+            self._next()
+            path._absolute = True
+            if separator == '/' and self._peek()[0] is None:
+                return
+        else:
+            separator = None
+        while True:
+            step = self._step()
+            if separator == '//':
+                if step.axis == 'child' and not step.positional:
+                    # `//name` is `/descendant-or-self::node()/child::name`: without positions, one
+                    # descendant step does.
+                    step.axis = 'descendant'
+                else:
+                    steps.append(_Step('descendant-or-self', 'node'))
+            steps.append(step)
+            kind, value = self._peek()
+            if kind is None:
+                break
+            self._next()
+            if kind != 'symbol' or value not in ('/', '//'):
+                raise self._error()
+            separator = value
+        path._steps = tuple(steps)
+
+    def _step(self) -> _Step:
+        kind, value = self._next()
+        if (kind, value) == ('symbol', '.'):
+            return _Step('self', 'node')
+        if (kind, value) == ('symbol', '..'):
+            return _Step('parent', 'node')
+        axis = 'child'
+        if (kind, value) == ('symbol', '@'):
+            axis = 'attribute'
+            kind, value = self._next()
+        elif kind == 'axis':
+            if value not in _AXES:
+                raise self._error()
+            axis = value
+            kind, value = self._next()
+        if kind == 'name':
+            step = _Step(axis, 'name', None if value == '*' else value)
+        elif kind == 'function' and value in _NODE_TESTS:
+            self._expect(')')
+            step = _Step(axis, value)
+        else:
+            raise self._error()
+        predicates: List[_Predicate] = []
+        while self._peek() == ('symbol', '['):
+            self._next()
+            predicate, positional = self._predicate()
+            self._expect(']')
+            predicates.append(predicate)
+            step.positional = step.positional or positional
+        step.predicates = tuple(predicates)
+        return step
+
+    def _predicate(self) -> Tuple[_Predicate, bool]:
+        kind, value = self._peek()
+        if kind == 'number':
+            self._next()
+            index = int(value) - 1
+            return (lambda nodes: nodes[index:index+1] if index >= 0 else []), True
+        if (kind, value) == ('function', 'last'):
+            self._next()
+            self._expect(')')
+            return (lambda nodes: nodes[-1:]), True
+        test = self._test()
+        return (lambda nodes: [node for node in nodes if test(node)]), False
+
+    def _test(self) -> Callable[[Node], bool]:
+        kind, value = self._peek()
+        if (kind, value) == ('function', 'not'):
+            self._next()
+            test = self._test()
+            self._expect(')')
+            return lambda node: not test(node)
+        if kind == 'function' and value in ('contains', 'starts-with'):
+            self._next()
+            operand = self._value()
+            self._expect(',')
+            string = self._string()
+            self._expect(')')
+            if value == 'contains':
+                return lambda node: any(string in text for text in operand(node))
+            return lambda node: any(text.startswith(string) for text in operand(node))
+        operand = self._value()
+        kind, value = self._peek()
+        if (kind, value) == ('symbol', '='):
+            self._next()
+            string = self._string()
+            return lambda node: any(text == string for text in operand(node))
+        if (kind, value) == ('symbol', '!='):
+            self._next()
+            string = self._string()
+            return lambda node: any(text != string for text in operand(node))
+        return lambda node: bool(operand(node))
+
+    def _value(self) -> _Value:
+        kind, value = self._next()
+        if (kind, value) == ('symbol', '@'):
+            kind, name = self._next()
+            if kind != 'name' or name == '*':
+                raise self._error()
+            return _attribute_value(name)
+        if (kind, value) == ('function', 'text'):
+            self._expect(')')
+            return _text_values
+        if (kind, value) == ('symbol', '.'):
+            return lambda node: [node._get_textContent() or '']
+        if kind == 'name' and value != '*':
+            return _child_values(value)
+        raise self._error()
+
+    def _string(self) -> str:
+        kind, value = self._next()
+        if kind != 'string':
+            raise self._error()
+        return value[1:-1]
+
+
+def _attribute_value(name: DOMString) -> _Value:
+    def values(node: Node) -> List[DOMString]:
+        attributes = node._attributes
+        if attributes is None or node._node_type is not Node.ELEMENT_NODE:
+            return []
+        attr = attributes._items.get(name)
+        return [] if attr is None else [attr._get_nodeValue()]
+    return values
+
+
+def _text_values(node: Node) -> List[DOMString]:
+    return [child._get_nodeValue() for child in node._child_nodes._nodes
+            if child._node_type is Node.TEXT_NODE or child._node_type is Node.CDATA_SECTION_NODE]
+
+
+def _child_values(name: DOMString) -> _Value:
+    def values(node: Node) -> List[DOMString]:
+        return [child._get_textContent() for child in node._child_nodes._nodes
+                if child._node_type is Node.ELEMENT_NODE and child._node_name == name]
+    return values
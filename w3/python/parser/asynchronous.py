@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Mapping, Optional, Protocol
+from typing import Tuple, Union
+
+from w3.python.core.interface import Document
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.parser.parser import Parser
+from w3.python.parser.limits import ParserLimits
+from w3.python.parser.pool import StringPool
+
+
+# Size of the chunks read from the stream at once.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamReader(Protocol):
+    """Anything with an `asyncio.StreamReader`-like `read()` coroutine, e.g. `aiohttp.StreamReader`.
+    """
+
+    def read(self, n: int = -1) -> Awaitable[Union[bytes, str]]:
+        ...
+
+
+async def _feed(parser: Parser,
+                chunk: Union[bytes, str],
+                executor: Optional[Executor],
+                offload_size: int) -> None:
+    if executor is not None and len(chunk) >= offload_size:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, parser.feed, chunk)
+    else:
+        parser.feed(chunk)
+
+
+async def aiterparse(stream: StreamReader,
+                     events: Iterable[str] = ('end',),
+                     encoding: str = 'utf-8',
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     executor: Optional[Executor] = None,
+                     offload_size: int = DEFAULT_CHUNK_SIZE,
+                     stop: Union[str, Callable[[Element], bool], None] = None,
+                     only: Union[str, Callable[[str, Mapping[str, str]], bool], None] = None,
+                     arena: bool = False,
+                     pool: Optional[StringPool] = None,
+                     limits: Optional[ParserLimits] = None) -> AsyncIterator[Tuple[str, Node]]:
+    """Parses the HTML read from `stream`, yielding parse events as the source arrives.
+
+    The source is read chunk by chunk, and the events each chunk makes known are yielded before the
+    next chunk is awaited, so the tree is built while the rest of the source is still on its way.
+    The document being built is the `ownerDocument` of the nodes yielded.
+
+    Parsing is done on the event loop, unless an `executor` is given:
+    then chunks of at least `offload_size` characters or bytes are parsed in it, so big pages do not
+    block the loop.
+    Chunks are still parsed one at a time and in order.
+
+    A stream which cannot be trusted can be parsed within `limits`:
+    once one is reached, no more of `stream` is read, and the document is marked as `truncated`.
+
+    Example:
+        >>> async for event, element in aiterparse(response.content):
+        ...     if element.tagName == 'title':
+        ...         break
+
+    Args:
+        stream: The stream to read the source from.
+        events: The kinds of events to yield, among `'start'` and `'end'`.
+        encoding: The encoding used to decode `bytes` read from `stream`.
+        chunk_size: The number of bytes (or characters) to read from `stream` at once.
+        executor: If given, the executor big chunks are parsed in.
+        offload_size: The size from which chunks are parsed in `executor`.
+        stop: If given, parsing (and reading `stream`) stops once an element meeting this condition
+            is closed; see `Parser`.
+        only: If given, only the subtrees of the elements matching this filter are built; see
+            `Parser`.
+        arena: If `True`, the document is built in arena mode; see `Document.release()`.
+        pool: If given, the `StringPool` shared with other documents; see `Parser`.
+        limits: If given, the `ParserLimits` parsing stops at; see `Parser`.
+
+    Yields:
+        `(event, element)` pairs, in document order.
+    """
+    parser = Parser(encoding=encoding, events=events, stop=stop, only=only,
+                    arena=arena, pool=pool, limits=limits)
+    while not parser.stopped:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        await _feed(parser, chunk, executor, offload_size)
+        for event in parser.read_events():
+            yield event
+    parser.close()
+    for event in parser.read_events():
+        yield event
+
+
+async def parse_async(stream: StreamReader,
+                      encoding: str = 'utf-8',
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      executor: Optional[Executor] = None,
+                      offload_size: int = DEFAULT_CHUNK_SIZE,
+                      stop: Union[str, Callable[[Element], bool], None] = None,
+                      only: Union[str, Callable[[str, Mapping[str, str]], bool], None] = None,
+                      arena: bool = False,
+                      pool: Optional[StringPool] = None,
+                      limits: Optional[ParserLimits] = None) -> Document:
+    """Parses the HTML read from `stream` into a `Document`.
+
+    This is the asynchronous counterpart of `parse()`; see `aiterparse()` for the arguments,
+    and `parse()` for `arena`, `pool` and `limits`.
+
+    Returns:
+        The built document.
+    """
+    parser = Parser(encoding=encoding, stop=stop, only=only, arena=arena, pool=pool, limits=limits)
+    while not parser.stopped:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        await _feed(parser, chunk, executor, offload_size)
+    return parser.close()
@@ -0,0 +1,469 @@
+from __future__ import annotations
+
+from typing import Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from w3.python.core.interface import Attr
+from w3.python.core.interface import CDATASection
+from w3.python.core.interface import Comment
+from w3.python.core.interface import Document
+from w3.python.core.interface import DocumentType
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.core.interface import Text
+from w3.python.parser.limits import ParserLimits
+from w3.python.parser.pool import StringPool
+from w3.python.parser.tokenizer import Token
+from w3.python.parser.tokenizer import TokenType
+
+
+# Elements which never have content, and so have no end tag.
+VOID_ELEMENTS = frozenset(['area', 'base', 'basefont', 'bgsound', 'br', 'col',
+                           'embed', 'frame', 'hr', 'img', 'input', 'keygen',
+                           'link', 'meta', 'param', 'source', 'track', 'wbr'])
+
+_HEADINGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+_TABLE_SECTIONS = frozenset(['thead', 'tbody', 'tfoot'])
+
+
+def _closed_by() -> Dict[str, FrozenSet[str]]:
+    closed_by: Dict[str, FrozenSet[str]] = {}
+    for name in ['address', 'article', 'aside', 'blockquote', 'center',
+                 'details', 'dialog', 'dir', 'div', 'dl', 'fieldset',
+                 'figcaption', 'figure', 'footer', 'form', 'header', 'hgroup',
+                 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section',
+                 'summary', 'table', 'ul']:
+        closed_by[name] = frozenset(['p'])
+    for name in _HEADINGS:
+        closed_by[name] = frozenset(['p']) | _HEADINGS
+    closed_by['li'] = frozenset(['li', 'p'])
+    closed_by['dt'] = closed_by['dd'] = frozenset(['dt', 'dd', 'p'])
+    closed_by['option'] = frozenset(['option'])
+    closed_by['optgroup'] = frozenset(['optgroup', 'option'])
+    closed_by['tr'] = frozenset(['tr', 'td', 'th'])
+    closed_by['td'] = closed_by['th'] = frozenset(['td', 'th'])
+    for name in _TABLE_SECTIONS:
+        closed_by[name] = frozenset(['tr', 'td', 'th']) | _TABLE_SECTIONS
+    return closed_by
+
+
+# Condition on the name and attributes of a start tag, deciding whether the element is built.
+ElementFilter = Callable[[str, Tuple[Tuple[str, str], ...]], bool]
+
+
+class LimitExceeded(Exception):
+    """Raised by `TreeBuilder.process()` once a limit has been reached; `TreeBuilder.exceeded` names
+    it.
+    """
+
+
+class _Skipped:
+    """Stand-in for an open element which is not built."""
+
+    __slots__ = ('_node_name',)
+
+    def __init__(self, name: str) -> None:
+        self._node_name: str = name
+
+
+# Open elements which are implicitly closed by the start tag of another element, keyed by the name
+# of that element.
+# e.g. `<li>` closes a `<li>` left open before it.
+CLOSED_BY: Dict[str, FrozenSet[str]] = _closed_by()
+
+
+class TreeBuilder:
+    """Builds a DOM tree out of `Token`s.
+
+    This is a simplified take on the HTML tree construction algorithm:
+
+    -   Void elements never get children.
+    -   Start tags listed in `CLOSED_BY` implicitly close the current element (e.g. `<p>`, `<li>`,
+        `<td>`).
+    -   End tags close the nearest open element of the same name, along with every element opened
+        after it.
+        End tags with no matching open element are ignored.
+    -   Content outside of any element gets an implied `<html>` document element, but `<head>` and
+        `<body>` are never implied.
+
+    Every node built keeps the span of source it was read from in `_source_start` and `_source_end`.
+    `_source_end` of an element is the end of its end tag, or where it was implicitly closed.
+
+    If an `events` queue is given, `('start', element)` is appended to it when an element is opened
+    and `('end', element)` when it is closed.
+
+    If a `stop` condition is given, it is called with every element as soon as the element is
+    closed, and `stopped` is set once it returns `True`; callers are expected to stop giving tokens
+    from then on.
+
+    If an `only` filter is given, just the subtrees of the elements whose start tag meets it are
+    built, as children of the document element in document order.
+    Everything outside of them is only kept track of by name, so that end tags and implied end tags
+    still close the right elements, and no node is created for it.
+
+    Input is assumed to be well-formed until proven otherwise: as long as every end tag closes the
+    current element and no start tag implies an end tag, tags are built on a fast path which skips
+    the recovery steps above.
+    The first tag which needs them switches the builder over to the general path for the rest of the
+    source.
+
+    If a `pool` is given, names, attribute values and character data are taken from it,
+    so that documents built with the same pool share their equal strings.
+
+    If `limits` are given, the first token which would go beyond one of them is not built:
+    `stopped` and `exceeded` are set, the document is marked as truncated, and `LimitExceeded` is
+    raised.
+    The time budget is left to the caller, which may end the building with `exceed()`.
+    """
+
+    def __init__(self,
+                 document: Document,
+                 context: Optional[Element] = None,
+                 events: Optional[Deque[Tuple[str, Node]]] = None,
+                 stop: Optional[Callable[[Element], bool]] = None,
+                 only: Optional[ElementFilter] = None,
+                 pool: Optional[StringPool] = None,
+                 limits: Optional[ParserLimits] = None) -> None:
+        """
+        Args:
+            document: The document to build nodes for.
+            context: If given, a fragment is built under this element instead of a whole document
+                under `document`.
+            events: If given, the queue parse events are appended to.
+            stop: If given, the condition on closed elements which stops the building.
+            only: If given, the condition on start tags of the elements whose subtrees are built.
+            pool: If given, the pool strings are shared through.
+            limits: If given, the bounds on the nodes built.
+        """
+        self._document: Document = document
+        self._root: Node = document if context is None else context
+        self._open_elements: List[Node] = [self._root]
+        self._only: Optional[ElementFilter] = only
+        # Index in `_open_elements` of the element matching `only` being built, if any.
+        self._match_index: Optional[int] = None
+        # Set while content is dropped for not being inside of an element matching `only`.
+        self._skipping: bool = only is not None
+        self._events: Optional[Deque[Tuple[str, Node]]] = events
+        self._stop: Optional[Callable[[Element], bool]] = stop
+        # Set once an element closed meets the `stop` condition.
+        self.stopped: bool = False
+        self._text_data: List[str] = []
+        self._text_start: int = 0
+        self._text_end: int = 0
+        # Number of characters in `_text_data`, while `limits` bound it
+        self._text_size: int = 0
+        # Set when the tokens could not be built without closing `context`,
+        # i.e. the fragment does not fit under it.
+        self.overflowed: bool = False
+        # Set until a tag needs error recovery, while tags are built on the fast path.
+        self._well_formed: bool = context is None and only is None
+        self._pool: Optional[StringPool] = pool
+        self._limits: Optional[ParserLimits] = limits
+        # Name of the limit reached, once building stopped on it
+        self.exceeded: Optional[str] = None
+        # Number of nodes built, while `limits` bound it
+        self._node_count: int = 0
+
+    @property
+    def document(self) -> Document:
+        """The document nodes are built for."""
+        return self._document
+
+    @property
+    def current_node(self) -> Node:
+        """The element that nodes are currently appended to."""
+        return self._open_elements[-1]
+
+    def process(self, token: Token) -> None:
+        """Builds the nodes for `token`."""
+        token_type = token.type
+        if self._skipping and token_type != TokenType.START_TAG \
+                and token_type != TokenType.END_TAG and token_type != TokenType.DOCTYPE:
+            return
+        if token_type == TokenType.CHARACTERS:
+            if not self._text_data:
+                self._text_start = token.start
+                self._text_size = 0
+            if self._limits is not None and self._limits.max_text_size is not None:
+                # Checked as the text comes, so that an overlong run is neither kept nor joined.
+                self._text_size += len(token.data)
+                if self._text_size > self._limits.max_text_size:
+                    self._text_data.clear()
+                    self.exceed('max_text_size')
+            self._text_data.append(token.data)
+            self._text_end = token.end
+            return
+        if self._text_data:
+            self._flush_text()
+        if self._well_formed:
+            if token_type == TokenType.START_TAG:
+                if self._build_start_tag(token):
+                    return
+            elif token_type == TokenType.END_TAG:
+                if self._build_end_tag(token):
+                    return
+        if token_type == TokenType.START_TAG:
+            self._process_start_tag(token)
+        elif token_type == TokenType.END_TAG:
+            self._process_end_tag(token)
+        elif token_type == TokenType.COMMENT:
+            if self._limits is not None:
+                self._check_limits(token.data)
+            self._append(Comment(owner_document=self._document, data=self._intern(token.data)),
+                         token)
+        elif token_type == TokenType.CDATA:
+            if self._limits is not None:
+                self._check_limits(token.data)
+            self._ensure_document_element(token)
+            self._append(CDATASection(owner_document=self._document, data=self._intern(token.data)),
+                         token)
+        elif token_type == TokenType.DOCTYPE:
+            if self._root is self._document \
+                    and self._document.documentElement is None \
+                    and self._document.doctype is None:
+                doctype = DocumentType(owner_document=self._document,
+                                       name=self._intern(token.name))
+                self._append(doctype, token)
+
+    def close(self, offset: int) -> None:
+        """Closes every element still open at `offset`, the end of the source."""
+        if self._text_data:
+            self._flush_text()
+        if len(self._open_elements) > 1 and self._root is not self._document:
+            self.overflowed = True
+        self._pop(1, offset)
+
+    def _flush_text(self) -> None:
+        data = ''.join(self._text_data)
+        self._text_data.clear()
+        if self.current_node is self._document:
+            if data.isspace():
+                return
+            self._ensure_document_element(None)
+        if self._limits is not None:
+            self._check_limits(data)
+        if self._pool is not None:
+            data = self._pool.intern(data)
+        text = Text(owner_document=self._document, data=data)
+        text._source_start = self._text_start
+        text._source_end = self._text_end
+        parent = self.current_node
+        parent._insert_child_node(len(parent._child_nodes._nodes), text)
+
+    def _append(self, node: Node, token: Token) -> Node:
+        node._source_start = token.start
+        node._source_end = token.end
+        parent = self.current_node
+        parent._insert_child_node(len(parent._child_nodes._nodes), node)
+        return node
+
+    def _ensure_document_element(self, token: Optional[Token]) -> None:
+        """Opens the document element, if nodes are about to be appended to the document itself."""
+        if self.current_node is not self._document:
+            return
+        document_element = self._document.documentElement
+        if document_element is None:
+            document_element = Element(owner_document=self._document, tag_name='html')
+            offset = self._text_start if token is None else token.start
+            document_element._source_start = offset
+            self._document._insert_child_node(len(self._document._child_nodes._nodes),
+                                              document_element)
+            if self._events is not None:
+                self._events.append(('start', document_element))
+        # Content after `</html>` still belongs to the document element.
+        if document_element._source_end is not None:
+            document_element._source_end = None
+            document_element._bump_version()
+        self._open_elements.append(document_element)
+
+    def _build_start_tag(self, token: Token) -> bool:
+        """Builds the element of `token` on the fast path, if that needs no error recovery.
+
+        Returns:
+            `True` if the element was built, `False` if `token` is left to the general path.
+        """
+        name = token.name
+        open_elements = self._open_elements
+        parent = open_elements[-1]
+        closed = CLOSED_BY.get(name)
+        if name == 'html' or len(open_elements) == 1 \
+                or (closed is not None and parent._node_name in closed):
+            # The start tag of the document element is expected; anything else here is recovered
+            # from.
+            if name != 'html' or parent is not self._document \
+                    or self._document.documentElement is not None:
+                self._well_formed = False
+            return False
+        element = self._create_element(token)
+        element._source_start = token.start
+        parent._insert_child_node(len(parent._child_nodes._nodes), element)
+        if self._events is not None:
+            self._events.append(('start', element))
+        if name in VOID_ELEMENTS:
+            element._source_end = token.end
+            self._end(element)
+        else:
+            open_elements.append(element)
+        return True
+
+    def _build_end_tag(self, token: Token) -> bool:
+        """Closes the current element on the fast path, if `token` is its end tag.
+
+        Returns:
+            `True` if the element was closed, `False` if `token` is left to the general path.
+        """
+        open_elements = self._open_elements
+        element = open_elements[-1]
+        if element._node_name != token.name or len(open_elements) == 1:
+            self._well_formed = False
+            return False
+        open_elements.pop()
+        element._source_end = token.end
+        self._end(element)
+        return True
+
+    def _process_start_tag(self, token: Token) -> None:
+        name = token.name
+        if name == 'html':
+            if self.current_node is self._document \
+                    and self._document.documentElement is None:
+                element = self._create_element(token)
+                self._append(element, token)._source_end = None
+                self._open_elements.append(element)
+                if self._events is not None:
+                    self._events.append(('start', element))
+                return
+            self._ensure_document_element(token)
+            self._merge_attributes(self._document.documentElement, token)
+            return
+        self._ensure_document_element(token)
+        closed = CLOSED_BY.get(name)
+        if closed is not None:
+            while self.current_node._node_name in closed:
+                if len(self._open_elements) == 1:
+                    self.overflowed = True
+                    break
+                self._pop(len(self._open_elements) - 1, token.start)
+        if self._skipping:
+            if not self._only(name, token.attributes):
+                if self._limits is not None and self._limits.max_depth is not None \
+                        and len(self._open_elements) > self._limits.max_depth:
+                    self.exceed('max_depth')
+                if name not in VOID_ELEMENTS:
+                    self._open_elements.append(_Skipped(name))
+                return
+            self._process_match(token)
+            return
+        element = self._create_element(token)
+        self._append(element, token)
+        if self._events is not None:
+            self._events.append(('start', element))
+        if name not in VOID_ELEMENTS:
+            element._source_end = None
+            self._open_elements.append(element)
+        else:
+            self._end(element)
+
+    def _process_match(self, token: Token) -> None:
+        """Builds the element of `token`, which meets `only`, as a child of the document element."""
+        element = self._create_element(token)
+        element._source_start = token.start
+        element._source_end = token.end
+        parent = self._open_elements[1] if self._root is self._document else self._root
+        parent._insert_child_node(len(parent._child_nodes._nodes), element)
+        if self._events is not None:
+            self._events.append(('start', element))
+        if token.name in VOID_ELEMENTS:
+            self._end(element)
+            return
+        element._source_end = None
+        self._match_index = len(self._open_elements)
+        self._skipping = False
+        self._open_elements.append(element)
+
+    def _process_end_tag(self, token: Token) -> None:
+        name = token.name
+        open_elements = self._open_elements
+        for index in range(len(open_elements) - 1, 0, -1):
+            if open_elements[index]._node_name == name:
+                self._pop(index + 1, token.start)
+                self._pop(index, token.end)
+                return
+        if self._root is not self._document:
+            self.overflowed = True
+
+    def _pop(self, index: int, offset: int) -> None:
+        """Closes the open elements from `index` onwards at `offset`."""
+        open_elements = self._open_elements
+        while len(open_elements) > index:
+            element = open_elements.pop()
+            if type(element) is _Skipped:
+                continue
+            element._source_end = offset
+            self._end(element)
+        if self._match_index is not None and index <= self._match_index:
+            self._match_index = None
+            self._skipping = True
+
+    def _end(self, element: Node) -> None:
+        """Reports that `element` has been closed."""
+        if self._events is not None:
+            self._events.append(('end', element))
+        if self._stop is not None and not self.stopped and self._stop(element):
+            self.stopped = True
+
+    def _intern(self, value: str) -> str:
+        return value if self._pool is None else self._pool.intern(value)
+
+    def exceed(self, limit: str) -> None:
+        """Stops building on reaching `limit`, leaving the document as it is.
+
+        Raises:
+            LimitExceeded: Always raised, to leave the token being built.
+        """
+        self.stopped = True
+        self.exceeded = limit
+        self._document._truncated = True
+        raise LimitExceeded(limit)
+
+    def _check_limits(self, data: Optional[str] = None, token: Optional[Token] = None) -> None:
+        """Calls `exceed()` if building a node, with `data` or the element of `token`, would go
+        beyond `limits`.
+        """
+        limits = self._limits
+        if limits.max_nodes is not None and self._node_count >= limits.max_nodes:
+            self.exceed('max_nodes')
+        if limits.max_text_size is not None and data is not None \
+                and len(data) > limits.max_text_size:
+            self.exceed('max_text_size')
+        if token is not None:
+            if limits.max_depth is not None and len(self._open_elements) > limits.max_depth:
+                self.exceed('max_depth')
+            if limits.max_attributes is not None and len(token.attributes) > limits.max_attributes:
+                self.exceed('max_attributes')
+            if limits.max_text_size is not None \
+                    and any(len(value) > limits.max_text_size for _, value in token.attributes):
+                self.exceed('max_text_size')
+        self._node_count += 1
+
+    def _create_element(self, token: Token) -> Element:
+        if self._limits is not None:
+            self._check_limits(token=token)
+        name = token.name
+        if self._pool is not None:
+            name = self._pool.intern(name)
+        element = Element(owner_document=self._document, tag_name=name)
+        self._merge_attributes(element, token)
+        return element
+
+    def _merge_attributes(self, element: Element, token: Token) -> None:
+        """Adds the attributes of `token` which `element` does not have yet."""
+        items = element._attributes._items
+        pool = self._pool
+        for name, value in token.attributes:
+            if name not in items:
+                if pool is not None:
+                    name = pool.intern(name)
+                    value = pool.intern(value)
+                attr = Attr(owner_document=self._document, name=name, value=value)
+                attr._owner_element = element
+                items[name] = attr
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import gc
+import hashlib
+import marshal
+import os
+import tempfile
+import threading
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+import zlib
+
+from w3.python.core.interface import Attr
+from w3.python.core.interface import CDATASection
+from w3.python.core.interface import Comment
+from w3.python.core.interface import Document
+from w3.python.core.interface import DocumentType
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.core.interface import Text
+from w3.python.parser.parser import parse
+
+
+# Version of the serialized form; serialized documents of another version are parsed again.
+FORMAT_VERSION = 1
+
+_ELEMENT = Node.ELEMENT_NODE.value
+_TEXT = Node.TEXT_NODE.value
+_CDATA_SECTION = Node.CDATA_SECTION_NODE.value
+_COMMENT = Node.COMMENT_NODE.value
+_DOCUMENT_TYPE = Node.DOCUMENT_TYPE_NODE.value
+_CHARACTER_DATA = {_TEXT: Text, _CDATA_SECTION: CDATASection, _COMMENT: Comment}
+
+# Number of `gc_paused()` blocks running,
+# and whether the garbage collector was enabled when the first one began.
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Keeps the cyclic garbage collector disabled within the block.
+
+    Blocks may overlap, in one thread or several: the collector is disabled when the first one
+    begins, and put back in the state it was found in once the last one ends.
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if not _gc_pauses:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if not _gc_pauses and _gc_was_enabled:
+                gc.enable()
+
+
+def serialize(document: Document) -> bytes:
+    """Returns a compact serialized form of the tree of `document`, to be turned back into a
+    document by `deserialize()`.
+
+    The tree is flattened in preorder: each element records its name, its attributes and its number
+    of children, and each other node its type and its data.
+    Only elements, character data and the document type are kept; the source spans of nodes are not.
+    """
+    return marshal.dumps((FORMAT_VERSION, len(document._child_nodes._nodes), flatten(document)))
+
+
+def flatten(root: Node, spans: bool = False) -> Tuple[tuple, ...]:
+    """Returns the records of the descendants of `root` in preorder, ending with their source spans
+    if `spans` is set.
+    """
+    records: List[tuple] = []
+    for node in root._iter_descendants():
+        node_type = node._node_type.value
+        if node_type == _ELEMENT:
+            attributes = tuple(item for attr in node._attributes._items.values()
+                               for item in (attr._node_name, attr._get_nodeValue()))
+            record = (_ELEMENT, node._node_name, len(node._child_nodes._nodes), attributes)
+        elif node_type in _CHARACTER_DATA:
+            record = (node_type, node._get_nodeValue())
+        elif node_type == _DOCUMENT_TYPE:
+            record = (_DOCUMENT_TYPE, node._node_name)
+        else:
+            continue
+        if spans:
+            record += (node._source_start, node._source_end)
+        records.append(record)
+    return tuple(records)
+
+
+def deserialize(data: bytes, pause_gc: bool = False) -> Document:
+    """Builds a new document out of the serialized form returned by `serialize()`.
+
+    Nodes only ever link to nodes of the same new tree, so the cyclic garbage collector, which
+    otherwise runs again and again as they are allocated, has nothing to find until the whole tree
+    is built.
+    With `pause_gc`, it is disabled meanwhile, which makes building large documents markedly faster;
+    as the collector is process-wide, this also holds it back in every other thread until the
+    document is built.
+
+    Args:
+        data: The serialized form of a document.
+        pause_gc: If `True`, the cyclic garbage collector is disabled while the document is built.
+
+    Raises:
+        ValueError: Raised if `data` is not a serialized document of the current `FORMAT_VERSION`.
+    """
+    try:
+        version, count, records = marshal.loads(data)
+    except (EOFError, TypeError, ValueError) as error:
+        raise ValueError('not a serialized document') from error
+    if version != FORMAT_VERSION:
+        raise ValueError('serialized document of format version %r' % (version,))
+    document = Document()
+    if pause_gc:
+        with gc_paused():
+            build(document, document, count, records)
+    else:
+        build(document, document, count, records)
+    return document
+
+
+def build(document: Document,
+           root: Node,
+           count: int,
+           records: Tuple[tuple, ...],
+           spans: bool = False) -> None:
+    """Appends the `count` subtrees flattened in `records` to the children of `root`, as nodes of
+    `document`.
+    """
+    # Open nodes, with the number of children each still expects.
+    parents: List[Node] = [root]
+    remaining: List[int] = [count]
+    for record in records:
+        while not remaining[-1]:
+            parents.pop()
+            remaining.pop()
+        parent = parents[-1]
+        remaining[-1] -= 1
+        node_type = record[0]
+        if node_type == _ELEMENT:
+            node = Element(owner_document=document, tag_name=record[1])
+            attributes = record[3]
+            items = node._attributes._items
+            for index in range(0, len(attributes), 2):
+                attr = Attr(owner_document=document, name=attributes[index],
+                            value=attributes[index + 1])
+                attr._owner_element = node
+                items[attributes[index]] = attr
+            if record[2]:
+                parents.append(node)
+                remaining.append(record[2])
+        elif node_type == _DOCUMENT_TYPE:
+            node = DocumentType(owner_document=document, name=record[1])
+        else:
+            node = _CHARACTER_DATA[node_type](owner_document=document, data=record[1])
+        if spans:
+            node._source_start = record[-2]
+            node._source_end = record[-1]
+        parent._insert_child_node(len(parent._child_nodes._nodes), node)
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a `DocumentCache`."""
+
+    hits: int
+    disk_hits: int
+    misses: int
+    documents: int
+    nodes: int
+
+
+class DocumentCache:
+    """Cache of parsed documents, keyed by a hash of their source.
+
+    Pages which come back unchanged (error pages, boilerplate, listings which did not move) are only
+    parsed once:
+    `parse()` hashes the source and returns the document already built for it on a hit.
+
+    Documents kept in memory are evicted least recently used first, once the total number of their
+    nodes exceeds `max_nodes`.
+    If a `directory` is given, every parsed document is also written there in a compact serialized
+    form, and a source missing from memory is looked up on disk before being parsed; the disk tier
+    is never evicted.
+
+    Cached documents are shared, and therefore frozen: modifying or releasing them raises
+    `NO_MODIFICATION_ALLOWED_ERR`, and using one as a context manager leaves it as is on exit.
+    With `copy=True`, the cache keeps serialized forms instead and every `parse()` returns a new,
+    modifiable document.
+
+    The cache may be used from several threads at once.
+
+    Example:
+        >>> cache = DocumentCache(max_nodes=2_000_000, directory='/var/cache/w3')
+        >>> document = cache.parse(response.body)
+    """
+
+    def __init__(self,
+                 max_nodes: int = 1_000_000,
+                 directory: Optional[str] = None,
+                 copy: bool = False,
+                 pause_gc: bool = False) -> None:
+        """
+        Args:
+            max_nodes: The total number of nodes of the documents kept in memory.
+            directory: If given, the directory of the on-disk tier, created if missing.
+            copy: If `True`, each hit returns a new copy of the document instead of the shared,
+                frozen one.
+            pause_gc: If `True`, the cyclic garbage collector is disabled while documents are
+                deserialized; see `deserialize()`.
+        """
+        self._max_nodes: int = max_nodes
+        self._directory: Optional[str] = directory
+        self._copy: bool = copy
+        self._pause_gc: bool = pause_gc
+        # Entries by key, least recently used first: the frozen document, or its serialized form if
+        # `copy` is set, and its number of nodes
+        self._entries: OrderedDict[str, Tuple[Union[Document, bytes], int]] = OrderedDict()
+        self._nodes: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._hits: int = 0
+        self._disk_hits: int = 0
+        self._misses: int = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> CacheInfo:
+        """Returns the statistics of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._disk_hits, self._misses, len(self._entries),
+                             self._nodes)
+
+    def clear(self) -> None:
+        """Forgets the documents kept in memory; the on-disk tier is left as is."""
+        with self._lock:
+            self._entries.clear()
+            self._nodes = 0
+
+    def parse(self,
+              source: Union[str, bytes],
+              encoding: str = 'utf-8') -> Document:
+        """Returns the document of `source`, parsing it only if it is not cached yet.
+
+        Args:
+            source: The HTML source.
+            encoding: The encoding used to decode `source` if it is given as `bytes`.
+
+        Returns:
+            The shared, frozen document, or a new copy of it if the cache was created with
+            `copy=True`.
+        """
+        key = self._key(source, encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+        if entry is not None:
+            return deserialize(entry[0], pause_gc=self._pause_gc) if self._copy else entry[0]
+        data = self._read(key)
+        document = None
+        if data is not None:
+            try:
+                document = deserialize(data, pause_gc=self._pause_gc)
+            except ValueError:
+                data = None
+            else:
+                with self._lock:
+                    self._disk_hits += 1
+        if document is None:
+            document = parse(source, encoding=encoding)
+            with self._lock:
+                self._misses += 1
+            if self._directory is not None or self._copy:
+                data = serialize(document)
+            if self._directory is not None:
+                self._write(key, data)
+        if self._copy:
+            # The document just built is a copy of its own, left to the caller.
+            self._store(key, data, 1 + sum(1 for _ in document._iter_descendants()))
+        else:
+            document.freeze()
+            self._store(key, document, len(document._preorder))
+        return document
+
+    def _key(self, source: Union[str, bytes], encoding: str) -> str:
+        if isinstance(source, str):
+            source = source.encode('utf-8', 'surrogatepass')
+            encoding = ''
+        digest = hashlib.blake2b(source, digest_size=20)
+        digest.update(b'\0' + encoding.lower().encode('ascii', 'replace'))
+        return digest.hexdigest()
+
+    def _store(self, key: str, value: Union[Document, bytes], nodes: int) -> None:
+        if nodes > self._max_nodes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nodes -= previous[1]
+            self._entries[key] = (value, nodes)
+            self._nodes += nodes
+            while self._nodes > self._max_nodes:
+                self._nodes -= self._entries.popitem(last=False)[1][1]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], key + '.w3')
+
+    def _read(self, key: str) -> Optional[bytes]:
+        if self._directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as stream:
+                return zlib.decompress(stream.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and moved in place, so that a concurrent reader never sees a partial file.
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(descriptor, 'wb') as stream:
+                stream.write(zlib.compress(data, 1))
+            os.replace(temporary, path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from w3.python.core.interface import Document
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.parser.builder import CLOSED_BY
+from w3.python.parser.builder import TreeBuilder
+from w3.python.parser.limits import ParserLimits
+from w3.python.parser.parser import parse
+from w3.python.parser.pool import StringPool
+from w3.python.parser.tokenizer import RAW_TEXT_ELEMENTS
+from w3.python.parser.tokenizer import Tokenizer
+from w3.python.parser.tokenizer import TAG_NAME
+
+
+# Elements which a following start tag may close without an end tag.
+_IMPLICITLY_CLOSED = frozenset().union(*CLOSED_BY.values())
+
+# Size of the blocks compared at once when looking for the unchanged prefix and suffix.
+_BLOCK_SIZE = 4096
+
+# Tags of the document element, whose effects reach beyond the run of siblings they are in.
+_HTML_TAG = re.compile(r'</?html', re.IGNORECASE)
+
+
+def reparse(document: Document,
+            old_source: str,
+            new_source: str,
+            pool: Optional[StringPool] = None,
+            limits: Optional[ParserLimits] = None) -> Document:
+    """Updates `document`, parsed from `old_source`, so that it matches `new_source`.
+
+    Only the edited region is parsed again:
+    the source common to both versions at the start and at the end is skipped,
+    the smallest run of sibling nodes covering the rest is found from the source spans the parser
+    left on the nodes, and just that run is tokenized and rebuilt from `new_source`.
+    Every other node, before and after the edit, is kept as is and only has its source span shifted.
+
+    When the edit cannot be confined to such a run (e.g. it touches the tags of the document
+    element, the first or last node within it, or the rebuilt run would not fit where the old one
+    was), the whole `new_source` is parsed instead, in arena mode if `document` was built in it.
+    Either way, the document returned is the one `parse()` would build from `new_source`.
+
+    `limits` bound the whole document rather than the edited run, so a document parsed within limits
+    is always parsed again.
+
+    Args:
+        document: The document to update, as built by `parse()` from `old_source`.
+        old_source: The source `document` was parsed from.
+        new_source: The edited source.
+        pool: If given, the `StringPool` `document` was built with; see `Parser`.
+        limits: If given, the `ParserLimits` `document` was built within; see `Parser`.
+
+    Returns:
+        `document`, updated in place, or a new document if `new_source` had to be parsed from
+        scratch.
+        A frozen `document` is never updated, so a new document is always returned for it.
+    """
+    if old_source == new_source:
+        return document
+    document_element = document.documentElement
+    if document.frozen or document_element is None or limits is not None or document.truncated:
+        return _parse_again(document, new_source, pool, limits)
+    start = _common_prefix_length(old_source, new_source)
+    suffix = _common_suffix_length(old_source, new_source,
+                                   min(len(old_source), len(new_source)) - start)
+    region = _find_region(document_element, old_source,
+                          start, len(old_source) - suffix)
+    if region is None:
+        return _parse_again(document, new_source, pool, limits)
+    container, first, last = region
+    delta = len(new_source) - len(old_source)
+    nodes = _parse_fragment(document, container, new_source,
+                            first._source_start, last._source_end + delta, pool)
+    if nodes is None:
+        return _parse_again(document, new_source, pool, limits)
+    end = last._source_end
+    next_sibling = last._next_sibling_node
+    node = first
+    while node is not next_sibling:
+        following = node._next_sibling_node
+        container.removeChild(node)
+        node = following
+    for node in nodes:
+        container.insertBefore(node, next_sibling)
+    _shift_following(container, next_sibling, end, delta)
+    return document
+
+
+def _parse_again(document: Document,
+                 source: str,
+                 pool: Optional[StringPool],
+                 limits: Optional[ParserLimits]) -> Document:
+    """Parses the whole `source` with the options `document` was built with."""
+    return parse(source, arena=document._arena is not None, pool=pool, limits=limits)
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    length = min(len(a), len(b))
+    position = 0
+    while position < length \
+            and a[position:position+_BLOCK_SIZE] == b[position:position+_BLOCK_SIZE]:
+        position += _BLOCK_SIZE
+    if position >= length:
+        return length
+    lo, hi = position, min(position + _BLOCK_SIZE, length)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[position:mid] == b[position:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Returns the length of the common suffix of `a` and `b`, up to `limit` characters."""
+    a_end, b_end = len(a), len(b)
+    position = 0
+    while position + _BLOCK_SIZE <= limit \
+            and a[a_end-position-_BLOCK_SIZE:a_end-position] \
+            == b[b_end-position-_BLOCK_SIZE:b_end-position]:
+        position += _BLOCK_SIZE
+    lo, hi = position, min(position + _BLOCK_SIZE, limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[a_end-mid:a_end-position] == b[b_end-mid:b_end-position]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _find_region(document_element: Element,
+                 source: str,
+                 start: int,
+                 end: int) -> Optional[Tuple[Node, Node, Node]]:
+    """Finds the smallest run of siblings whose source covers `[start, end)` of `source`.
+
+    Returns:
+        The parent of the run with its first and last node, or `None` if the edit is not within the
+        content of `document_element`.
+    """
+    parent: Node = document_element
+    while True:
+        children = parent._child_nodes._nodes
+        if not children or any(child._source_end is None for child in children):
+            return None
+        if children[0]._source_start > start or children[-1]._source_end < end:
+            return None
+        # Siblings merely touching the edit are rebuilt too, since the edit may join them.
+        affected = [index for index, child in enumerate(children)
+                    if child._source_start <= end and child._source_end >= start]
+        if not affected:
+            return None
+        first, last = affected[0], affected[-1]
+        child = children[first]
+        if first == last \
+                and child._node_type is Node.ELEMENT_NODE \
+                and child._node_name not in RAW_TEXT_ELEMENTS:
+            grand_children = child._child_nodes._nodes
+            if grand_children \
+                    and grand_children[0]._source_start <= start \
+                    and end <= grand_children[-1]._source_end:
+                parent = child
+                continue
+        # Edits in the gaps between siblings (e.g. an ignored end tag) are
+        # covered by taking in the sibling before the gap.
+        while children[first]._source_start > start:
+            first -= 1
+        while children[last]._source_end < end:
+            last += 1
+        # Rebuilt text next to a kept `Text` node would have been merged into it.
+        if first > 0 and children[first-1]._node_type is Node.TEXT_NODE:
+            first -= 1
+        if last + 1 < len(children) and children[last+1]._node_type is Node.TEXT_NODE:
+            last += 1
+        # An element implicitly closed by the first start tag of the run
+        # may not be closed any more once the run is edited.
+        while first > 0 and _is_implicitly_closed(children[first-1], source):
+            first -= 1
+        if parent is document_element:
+            # Whitespace before the first node and after the last one may belong to the document
+            # itself, where it is dropped, and content after `</html>` is only put back in the
+            # document element by the builder.
+            if first == 0 or last == len(children) - 1 \
+                    or _HTML_TAG.search(source, document_element._source_start,
+                                        children[last]._source_end):
+                return None
+        return parent, children[first], children[last]
+
+
+def _is_implicitly_closed(node: Node, source: str) -> bool:
+    """Returns `True` if `node` is an element whose end tag was implied by the start tag following
+    it.
+    """
+    name = node._node_name
+    if node._node_type is not Node.ELEMENT_NODE or name not in _IMPLICITLY_CLOSED:
+        return False
+    end_tag = source.rfind('</', node._source_start, node._source_end)
+    if end_tag == -1 or source.find('>', end_tag) != node._source_end - 1:
+        return True
+    name_match = TAG_NAME.match(source, end_tag + 2)
+    return name_match is None or name_match.group().lower() != name
+
+
+def _parse_fragment(document: Document,
+                    container: Node,
+                    source: str,
+                    start: int,
+                    end: int,
+                    pool: Optional[StringPool]) -> Optional[List[Node]]:
+    """Builds the nodes of `source[start:end]` as children of `container`.
+
+    Returns:
+        The built nodes, or `None` if they would not fit in `container`, e.g. an end tag in the
+        fragment would close it.
+    """
+    # A start tag of the document element would have its attributes merged into the one of
+    # `document` right away.
+    if _HTML_TAG.search(source, start, end):
+        return None
+    context = Element(owner_document=document, tag_name=container._node_name)
+    tokenizer = Tokenizer(offset=start)
+    builder = TreeBuilder(document, context=context, pool=pool)
+    for token in tokenizer.feed(source[start:end]):
+        builder.process(token)
+    for token in tokenizer.close():
+        builder.process(token)
+    builder.close(end)
+    if builder.overflowed or tokenizer.incomplete:
+        return None
+    return list(context._child_nodes._nodes)
+
+
+def _shift_following(parent: Node, next_sibling: Optional[Node], end: int, delta: int) -> None:
+    """Shifts the source spans of every node after the rebuilt run, which ended at `end`, by
+    `delta`.
+
+    Nodes following the document element in the tree may come before the run in the source
+    (e.g. a comment after `</html>`, followed by content put back in the document element), so only
+    offsets from `end` on are shifted.
+    """
+    if delta == 0:
+        return
+    while parent is not None:
+        node = next_sibling
+        while node is not None:
+            _shift(node, end, delta)
+            for descendant in node._iter_descendants():
+                _shift(descendant, end, delta)
+            node = node._next_sibling_node
+        _shift(parent, end, delta)
+        next_sibling = parent._next_sibling_node
+        parent = parent._parent_node
+
+
+def _shift(node: Node, end: int, delta: int) -> None:
+    if node._source_start is not None and node._source_start >= end:
+        node._source_start += delta
+    if node._source_end is not None and node._source_end >= end:
+        node._source_end += delta
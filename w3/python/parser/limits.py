@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+
+class ParserLimits(NamedTuple):
+    """Bounds on the resources spent parsing a source, for input which cannot be trusted.
+
+    Once a limit is reached, parsing stops right away, as with the `stop` condition of `Parser`:
+    the document built so far is returned, with `Document.truncated` set, and `Parser.exceeded`
+    names the limit.
+    Limits left to `None` are not enforced.
+
+    Example:
+        >>> limits = ParserLimits(max_depth=512, max_nodes=1_000_000, max_text_size=10_000_000,
+        ...                       time_budget=5.0)
+        >>> document = parse(untrusted, limits=limits)
+        >>> document.truncated
+        False
+    """
+
+    # Number of elements an element may be nested in, itself included.
+    max_depth: Optional[int] = None
+    # Number of nodes built, attributes aside.
+    max_nodes: Optional[int] = None
+    # Number of attributes of a single start tag.
+    max_attributes: Optional[int] = None
+    # Number of characters of a single text node, comment, CDATA section or attribute value.
+    # It only bounds parsing: the document built may be modified past it, and read back as usual.
+    max_text_size: Optional[int] = None
+    # Number of seconds parsing may take, from the creation of the parser.
+    time_budget: Optional[float] = None
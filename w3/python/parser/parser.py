@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import codecs
+from collections import deque
+import re
+import time
+from typing import Callable, Deque, Iterable, Iterator, Mapping, Optional, Tuple, Union
+
+from w3.python.core.interface import Document
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.parser.builder import ElementFilter
+from w3.python.parser.builder import LimitExceeded
+from w3.python.parser.builder import TreeBuilder
+from w3.python.parser.limits import ParserLimits
+from w3.python.parser.pool import StringPool
+from w3.python.parser.tokenizer import Token
+from w3.python.parser.tokenizer import Tokenizer
+
+
+# Kinds of events a `Parser` can report.
+_EVENT_TYPES = frozenset(['start', 'end'])
+
+# Simple selectors accepted as `only` filters, e.g. `table.prices` or `div#content`.
+_SELECTOR = re.compile(r'([a-zA-Z][\w-]*|\*)?((?:[.#][\w-]+)*)')
+_SELECTOR_PART = re.compile(r'([.#])([\w-]+)')
+
+
+class Parser:
+    """Incremental HTML parser.
+
+    The source is given with `feed()`, all at once or chunk by chunk as it arrives, and `close()`
+    returns the built `Document`.
+    Source given as `bytes` is decoded with `encoding`; a multi-byte character cut by the end of a
+    chunk is completed by the next one.
+
+    Progress can be followed with `read_events()`, which yields the `('start', element)` and
+    `('end', element)` events of the kinds asked for in `events`, as soon as the source fed makes
+    them known.
+
+    Parsing can be cut short with a `stop` condition, checked on every element as soon as it is
+    closed.
+    Once an element meets it, the rest of the source is neither tokenized nor built:
+    `stopped` is set, further `feed()` calls are ignored, and `close()` returns the document built
+    up to that element.
+
+    Building can be limited to the parts of the page of interest with an `only` filter.
+    The subtrees of the elements it matches become the children of the document element, in document
+    order, while the rest of the source is tokenized but never turned into nodes.
+
+    Untrusted source can be parsed within `limits`: once one is reached, parsing stops as with
+    `stop`, `exceeded` names the limit and the document is marked as `truncated`.
+
+    Example:
+        >>> parser = Parser()
+        >>> parser.feed('<p>Hello, ')
+        >>> parser.feed('world!</p>')
+        >>> document = parser.close()
+    """
+
+    def __init__(self,
+                 encoding: str = 'utf-8',
+                 events: Iterable[str] = (),
+                 stop: Union[str, Callable[[Element], bool], None] = None,
+                 only: Union[str, Callable[[str, Mapping[str, str]], bool], None] = None,
+                 arena: bool = False,
+                 pool: Optional[StringPool] = None,
+                 limits: Optional[ParserLimits] = None) -> None:
+        """
+        Args:
+            encoding: The encoding used to decode source given as `bytes`.
+            events: The kinds of events reported by `read_events()`, among `'start'` and `'end'`.
+            stop: If given, parsing stops once an element meeting this condition is closed.
+                It is either a tag name, or a callable taking the closed `Element` and returning
+                `True` to stop.
+            only: If given, only the subtrees of the elements matching this filter are built.
+                It is either a simple selector made of a tag name, `.class` and `#id` parts (e.g.
+                `'table.prices'`), or a callable taking the tag name and the attributes of a start
+                tag and returning `True` to build the element.
+            arena: If `True`, the document is built in arena mode, to be torn down at once with
+                `Document.release()`.
+            pool: If given, the `StringPool` shared with other documents, so that their equal
+                strings are stored once.
+            limits: If given, the `ParserLimits` parsing stops at.
+
+        Raises:
+            ValueError: Raised if an unknown kind of event is asked for, or if `only` is not a valid
+                selector.
+        """
+        self._event_types: frozenset = frozenset(events)
+        if not self._event_types <= _EVENT_TYPES:
+            raise ValueError('unknown event types: %s'
+                             % ', '.join(sorted(self._event_types - _EVENT_TYPES)))
+        self._events: Deque[Tuple[str, Node]] = deque()
+        self._document: Document = Document(arena=arena)
+        self._tokenizer: Tokenizer = Tokenizer()
+        self._builder: TreeBuilder = TreeBuilder(
+            self._document,
+            events=self._events if self._event_types else None,
+            stop=_compile_stop(stop),
+            only=_compile_only(only),
+            pool=pool,
+            limits=limits)
+        self._limits: Optional[ParserLimits] = limits
+        self._deadline: Optional[float] = None
+        if limits is not None and limits.time_budget is not None:
+            self._deadline = time.monotonic() + limits.time_budget
+        self._decoder: codecs.IncrementalDecoder = \
+            codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._closed: bool = False
+
+    @property
+    def stopped(self) -> bool:
+        """`True` once the `stop` condition has been met, or a limit reached."""
+        return self._builder.stopped
+
+    @property
+    def exceeded(self) -> Optional[str]:
+        """The name of the field of `ParserLimits` parsing stopped at, or `None` if no limit was
+        reached.
+        """
+        return self._builder.exceeded
+
+    @property
+    def document(self) -> Document:
+        """The document being built.
+
+        Until `close()` is called, this is the part of the tree built from the source fed so far.
+        """
+        return self._document
+
+    def feed(self, data: Union[str, bytes]) -> None:
+        """Parses the next chunk of the source.
+
+        Args:
+            data: The next chunk of the source.
+        """
+        builder = self._builder
+        if builder.stopped:
+            return
+        if not isinstance(data, str):
+            data = self._decoder.decode(data)
+        process = builder.process
+        if builder._stop is None and self._limits is None:
+            for token in self._tokenizer.feed(data):
+                process(token)
+            return
+        self._process(self._tokenizer.feed(data))
+
+    def _process(self, tokens: Iterator[Token]) -> None:
+        """Builds `tokens` until the `stop` condition is met or a limit is reached."""
+        builder = self._builder
+        process = builder.process
+        deadline = self._deadline
+        try:
+            for index, token in enumerate(tokens):
+                process(token)
+                if builder.stopped:
+                    return
+                # Looking at the clock costs more than building a token, so it is only done every so
+                # often.
+                if deadline is not None and not index & 0xff and time.monotonic() > deadline:
+                    builder.exceed('time_budget')
+        except LimitExceeded:
+            pass
+
+    def read_events(self) -> Iterator[Tuple[str, Node]]:
+        """Yields the events not read yet, as `(event, node)` pairs.
+
+        Events are consumed as they are yielded.
+        """
+        events = self._events
+        event_types = self._event_types
+        while events:
+            event = events.popleft()
+            if event[0] in event_types:
+                yield event
+
+    def close(self) -> Document:
+        """Parses whatever is left of the source and finishes the document.
+
+        Returns:
+            The built document.
+        """
+        if self._closed:
+            return self._document
+        self._closed = True
+        self.feed(self._decoder.decode(b'', True))
+        builder = self._builder
+        if not builder.stopped:
+            self._process(self._tokenizer.close())
+        try:
+            builder.close(self._tokenizer.offset)
+        except LimitExceeded:
+            # The text left over went beyond the limits, and was dropped; whatever is open is still
+            # to be closed.
+            builder.close(self._tokenizer.offset)
+        return self._document
+
+
+def _compile_stop(stop: Union[str, Callable[[Element], bool], None]
+                  ) -> Optional[Callable[[Element], bool]]:
+    """Turns the `stop` argument of `Parser` into a callable."""
+    if isinstance(stop, str):
+        tag_name = stop.lower()
+        return lambda element: element._node_name == tag_name
+    return stop
+
+
+def _compile_only(only: Union[str, Callable[[str, Mapping[str, str]], bool], None]
+                  ) -> Optional[ElementFilter]:
+    """Turns the `only` argument of `Parser` into the filter taken by `TreeBuilder`."""
+    if only is None:
+        return None
+    if not isinstance(only, str):
+        return lambda name, attributes: only(name, dict(attributes))
+    match = _SELECTOR.fullmatch(only.strip())
+    if match is None or not any(match.groups()):
+        raise ValueError('invalid selector: %r' % only)
+    tag_name, parts = match.groups()
+    tag_name = None if tag_name in (None, '*') else tag_name.lower()
+    classes = frozenset(value for kind, value in _SELECTOR_PART.findall(parts) if kind == '.')
+    ids = {value for kind, value in _SELECTOR_PART.findall(parts) if kind == '#'}
+    if len(ids) > 1:
+        return lambda name, attributes: False
+    id_ = ids.pop() if ids else None
+
+    def matches(name: str, attributes: Tuple[Tuple[str, str], ...]) -> bool:
+        if tag_name is not None and name != tag_name:
+            return False
+        if id_ is None and not classes:
+            return True
+        attribute_map = dict(attributes)
+        if id_ is not None and attribute_map.get('id') != id_:
+            return False
+        return classes <= set(attribute_map.get('class', '').split())
+
+    return matches
+
+
+def parse(source: Union[str, bytes],
+          encoding: str = 'utf-8',
+          stop: Union[str, Callable[[Element], bool], None] = None,
+          only: Union[str, Callable[[str, Mapping[str, str]], bool], None] = None,
+          arena: bool = False,
+          pool: Optional[StringPool] = None,
+          limits: Optional[ParserLimits] = None) -> Document:
+    """Parses a whole HTML `source` into a `Document`.
+
+    Args:
+        source: The HTML source.
+        encoding: The encoding used to decode `source` if it is given as `bytes`.
+        stop: If given, parsing stops once an element meeting this condition is closed; see
+            `Parser`.
+        only: If given, only the subtrees of the elements matching this filter are built; see
+            `Parser`.
+        arena: If `True`, the document is built in arena mode; see `Document.release()`.
+        pool: If given, the `StringPool` shared with other documents; see `Parser`.
+        limits: If given, the `ParserLimits` parsing stops at; see `Parser`.
+
+    Returns:
+        The built document.
+    """
+    parser = Parser(encoding=encoding, stop=stop, only=only, arena=arena, pool=pool, limits=limits)
+    parser.feed(source)
+    return parser.close()
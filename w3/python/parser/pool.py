@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Dict
+
+
+class StringPool:
+    """Pool of strings shared by the documents parsed with it.
+
+    Pages of one site repeat the same markup over and over: headers, navigation and footers come
+    with the same tag names, attribute values and text on every page. Parsed with a common pool,
+    equal strings are stored once, and every document refers to that single copy, so the memory
+    taken by repeated regions no longer grows with the number of pages.
+
+    Only strings of at most `max_length` characters are pooled: names, attribute values and short
+    text are what pages repeat, whereas longer text is mostly unique to its page, and pooling it
+    would keep it alive after the page is dropped.
+    The pool keeps at most `max_size` strings; once full, new strings are not shared but the ones
+    already pooled still are.
+
+    Example:
+        >>> pool = StringPool()
+        >>> documents = [parse(page, pool=pool) for page in pages]
+    """
+
+    def __init__(self, max_size: int = 1_000_000, max_length: int = 64) -> None:
+        """
+        Args:
+            max_size: The number of distinct strings kept in the pool.
+            max_length: The number of characters of the longest string pooled.
+        """
+        self._max_size: int = max_size
+        self._max_length: int = max_length
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, value: str) -> str:
+        """Returns the pooled string equal to `value`, pooling `value` if there is none yet and the
+        pool is not full.
+        """
+        if len(value) > self._max_length:
+            return value
+        pooled = self._strings.get(value)
+        if pooled is not None:
+            return pooled
+        if len(self._strings) < self._max_size:
+            self._strings[value] = value
+        return value
+
+    def clear(self) -> None:
+        """Empties the pool; documents already parsed keep the strings they refer to."""
+        self._strings.clear()
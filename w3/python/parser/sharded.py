@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import contextlib
+import marshal
+import multiprocessing
+import os
+import re
+from typing import List, Optional, Tuple, Union
+
+from w3.python.core.interface import Document
+from w3.python.core.interface import Element
+from w3.python.core.interface import Node
+from w3.python.parser.builder import CLOSED_BY
+from w3.python.parser.builder import TreeBuilder
+from w3.python.parser.cache import build
+from w3.python.parser.cache import flatten
+from w3.python.parser.cache import gc_paused
+from w3.python.parser.parser import parse
+from w3.python.parser.tokenizer import RAW_TEXT_ELEMENTS
+from w3.python.parser.tokenizer import Tokenizer
+
+
+# Number of characters of source parsed by each process at once.
+DEFAULT_SHARD_SIZE = 4 * 1024 * 1024
+
+# A shard to parse: its span in the source, the name of the element it is parsed under,
+# the name of the boundary elements, and whether it is the last one, ended by the end tag of that
+# element.
+_Shard = Tuple[int, int, str, str, bool]
+
+# Source being parsed, set in every worker process by `_initialize()`.
+_source: Optional[str] = None
+
+
+def parse_sharded(source: Union[str, bytes],
+                  encoding: str = 'utf-8',
+                  boundary: str = 'tr',
+                  processes: Optional[int] = None,
+                  shard_size: int = DEFAULT_SHARD_SIZE,
+                  pause_gc: bool = False) -> Document:
+    """Parses a large HTML `source` into a `Document`, sharing the work among several processes.
+
+    This is meant for huge documents made of a long run of sibling elements, such as the rows of a
+    table export.
+    The source is cut into shards of about `shard_size` characters, right before start tags of
+    `boundary` elements.
+    Each shard is tokenized and built in a process of its own, under the element the first
+    `boundary` element is opened in, and the parent process puts the shards back together, in order,
+    as children of that element.
+    The source before the first shard and after the end tag of that element is parsed by the parent
+    process itself.
+
+    The document built is the same as the one `parse()` would build, source spans included.
+    Whenever a cut could make a difference (e.g. it falls within a comment or a script,
+    or a shard holds an end tag closing the element the shards are parsed under), the whole source
+    is parsed with `parse()` instead;
+    so is a source too small to be worth sharing out.
+
+    Args:
+        source: The HTML source.
+        encoding: The encoding used to decode `source` if it is given as `bytes`.
+        boundary: The tag name of the elements the source is cut before.
+        processes: The number of worker processes; by default, the number of CPUs.
+        shard_size: The number of characters of source parsed by each process at once.
+        pause_gc: If `True`, the cyclic garbage collector is disabled while shards are put back
+            together;
+            see `deserialize()`.
+
+    Returns:
+        The built document.
+    """
+    if not isinstance(source, str):
+        source = source.decode(encoding, 'replace')
+    processes = processes or os.cpu_count() or 1
+    if processes < 2 or len(source) < 2 * shard_size:
+        return parse(source)
+    plan = _plan(source, boundary.lower(), shard_size)
+    if plan is None:
+        return parse(source)
+    builder, container, shards = plan
+    document = builder.document
+    with multiprocessing.Pool(min(processes, len(shards)), initializer=_initialize,
+                              initargs=(source,)) as pool:
+        # Shards are built as soon as they come back, while the following ones are still being
+        # parsed.
+        with gc_paused() if pause_gc else contextlib.nullcontext():
+            for data in pool.imap(_parse_shard, shards):
+                if data is None:
+                    pool.terminate()
+                    return parse(source)
+                count, records = marshal.loads(data)
+                build(document, container, count, records, spans=True)
+    end = shards[-1][1]
+    tokenizer = Tokenizer(offset=end)
+    _feed(builder, tokenizer, source[end:])
+    builder.close(tokenizer.offset)
+    return document
+
+
+def _plan(source: str,
+          boundary: str,
+          shard_size: int) -> Optional[Tuple[TreeBuilder, Element, List[_Shard]]]:
+    """Builds the source before the first `boundary` element,
+    and cuts the rest up to the end of its parent into shards.
+
+    Returns:
+        The builder the source before the first shard went through, the element the shards go
+        under, and the shards; or `None` if the source cannot be cut.
+    """
+    start_tag = re.compile(r'<%s[\s/>]' % re.escape(boundary), re.IGNORECASE)
+    match = start_tag.search(source)
+    if match is None:
+        return None
+    first = match.start()
+    tokenizer = Tokenizer()
+    builder = TreeBuilder(Document())
+    for token in tokenizer.feed(source[:first]):
+        builder.process(token)
+    if tokenizer.offset != first:
+        # The first boundary start tag is within markup or raw text.
+        return None
+    if builder._text_data:
+        builder._flush_text()
+    container = builder.current_node
+    name = container._node_name
+    if container._node_type is not Node.ELEMENT_NODE or name in RAW_TEXT_ELEMENTS \
+            or name in CLOSED_BY.get(boundary, ()):
+        return None
+    # The last end tag of the container: the greedy prefix makes the search start from the end.
+    end_tag = re.compile(r'.*(</%s)[\t\n\r\f />]' % re.escape(name), re.IGNORECASE | re.DOTALL)
+    match = end_tag.match(source, first)
+    end = -1 if match is None else match.start(1)
+    starts = [first]
+    for target in range(first + shard_size, end, shard_size):
+        match = start_tag.search(source, max(target, starts[-1] + 1), end)
+        if match is None:
+            break
+        starts.append(match.start())
+    if len(starts) < 2:
+        return None
+    ends = starts[1:] + [end]
+    return builder, container, [(start, stop, name, boundary, stop == end)
+                                for start, stop in zip(starts, ends)]
+
+
+def _initialize(source: str) -> None:
+    global _source
+    _source = source
+
+
+def _parse_shard(shard: _Shard) -> Optional[bytes]:
+    """Builds a shard under an element named like the one it goes under.
+
+    Returns:
+        The children built, flattened with their source spans and serialized;
+        or `None` if they may not be the ones the shard would get within the whole source.
+    """
+    start, end, name, boundary, last = shard
+    document = Document()
+    context = Element(owner_document=document, tag_name=name)
+    tokenizer = Tokenizer(offset=start)
+    builder = TreeBuilder(document, context=context)
+    _feed(builder, tokenizer, _source[start:end])
+    if builder.overflowed or tokenizer.incomplete:
+        return None
+    # Elements left open are closed by the end tag of the parent after the last shard,
+    # but within the whole source, the following shard could only close those its first start tag
+    # implies the end of.
+    closed = CLOSED_BY.get(boundary, frozenset())
+    if not last and any(element._node_name not in closed for element in builder._open_elements[1:]):
+        return None
+    builder.close(end)
+    return marshal.dumps((len(context._child_nodes._nodes), flatten(context, spans=True)))
+
+
+def _feed(builder: TreeBuilder, tokenizer: Tokenizer, source: str) -> None:
+    """Builds all the tokens of `source`."""
+    for token in tokenizer.feed(source):
+        builder.process(token)
+    for token in tokenizer.close():
+        builder.process(token)
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import re
+from typing import Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+
+class TokenType:
+    """Definition group `TokenType`
+
+    An integer indicating which kind of markup a `Token` stands for.
+    """
+
+    START_TAG: int = 1
+    END_TAG: int = 2
+    CHARACTERS: int = 3
+    COMMENT: int = 4
+    DOCTYPE: int = 5
+    CDATA: int = 6
+
+
+class Token(NamedTuple):
+    """A single piece of markup produced by the `Tokenizer`.
+
+    `start` and `end` are offsets of the token in the source text, so that `source[start:end]` is
+    the markup the token was read from.
+    """
+
+    type: int
+    name: str = ''
+    data: str = ''
+    attributes: Tuple[Tuple[str, str], ...] = ()
+    self_closing: bool = False
+    start: int = 0
+    end: int = 0
+
+
+# Elements whose content is not markup, but text up to the matching end tag.
+# Entities are decoded in `RCDATA_ELEMENTS`, and kept as is in the others.
+RAW_TEXT_ELEMENTS = frozenset(['script', 'style', 'xmp', 'iframe',
+                               'noembed', 'noframes', 'textarea', 'title'])
+RCDATA_ELEMENTS = frozenset(['textarea', 'title'])
+
+TAG_NAME = re.compile(r'[a-zA-Z][^\t\n\r\f />\x00]*')
+# Rest of a tag up to its closing '>'; quoted values may contain '>'.
+_TAG_REST = re.compile(r'(?:"[^"]*"|\'[^\']*\'|[^"\'>])*>')
+_ATTRIBUTE = re.compile(
+    r'([^\s/>][^\s/=>]*)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]*))?')
+
+
+@lru_cache(maxsize=None)
+def _raw_text_end(name: str) -> Pattern:
+    return re.compile(r'</%s(?=[\t\n\r\f />])' % name, re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _literal(text: str) -> Pattern:
+    return re.compile(re.escape(text))
+
+
+def _decode(text: str) -> str:
+    if '&' not in text:
+        return text
+    # The entity table of `html` is only loaded once a character reference is met.
+    from html import unescape
+    return unescape(text)
+
+
+class Tokenizer:
+    """Splits HTML source into `Token`s.
+
+    Source text may be given all at once or in chunks through `feed()`.
+    Markup and character references which are cut by the end of a chunk are kept back until the next
+    chunk (or `close()`) completes them.
+    Text is not: a run of text split across chunks comes as several `CHARACTERS` tokens, which
+    `TreeBuilder` joins, so it is the tree built, rather than the tokens, which never depends on how
+    the source was split.
+    """
+
+    def __init__(self, offset: int = 0) -> None:
+        """
+        Args:
+            offset: Offset of the first character fed, which is added to the `start` and `end` of
+                every token.
+        """
+        self._buffer: str = ''
+        self._position: int = 0
+        self._offset: int = offset
+        self._raw_text_element: Optional[str] = None
+        # While the markup or raw text at `_position` waits for its terminator: the terminator,
+        # the number of characters it may start before the next chunk, and those characters.
+        # The chunks fed meanwhile are kept aside, and only joined to the buffer once one completes
+        # the terminator.
+        self._terminator: Optional[Pattern] = None
+        self._overlap: int = 0
+        self._tail: str = ''
+        self._chunks: List[str] = []
+        # Where the search for the terminator resumes in the buffer, once the chunks are joined.
+        self._resume: int = 0
+        # Set when `close()` had to cut off unterminated markup.
+        self.incomplete: bool = False
+
+    @property
+    def offset(self) -> int:
+        """Offset in the source of the first character not yet tokenized."""
+        return self._offset + self._position
+
+    def feed(self, data: str) -> Iterator[Token]:
+        """Adds `data` to the source and yields every token it completes."""
+        if self._terminator is not None:
+            # Unless the terminator ends within `data`, there is nothing to tokenize: searching
+            # the whole of the pending markup again, or copying it into a new buffer, waits until
+            # it does.
+            window = self._tail + data
+            if self._terminator.search(window) is None:
+                self._chunks.append(data)
+                self._tail = window[max(len(window) - self._overlap, 0):]
+                return iter(())
+        self._join(data)
+        return self._tokenize(final=False)
+
+    def close(self) -> Iterator[Token]:
+        """Yields the tokens left at the end of the source."""
+        if self._terminator is not None:
+            self._join('')
+        return self._tokenize(final=True)
+
+    def _join(self, data: str) -> None:
+        """Starts the buffer at `_position`, and appends the chunks kept aside and `data` to it."""
+        position = self._position
+        if self._terminator is None:
+            self._buffer = self._buffer[position:] + data
+        else:
+            self._chunks.append(data)
+            self._buffer = ''.join([self._buffer[position:]] + self._chunks)
+            # The terminator was in none of the chunks but the last, nor across them before the
+            # tail.
+            self._resume = len(self._buffer) - len(data) - len(self._tail)
+            self._terminator = None
+            self._chunks = []
+        self._offset += position
+        self._position = 0
+
+    def _wait(self, terminator: Pattern, length: int, buffer: str, start: int) -> None:
+        """Keeps the chunks fed aside until one completes `terminator`, of `length` characters.
+
+        `terminator` is searched for in `buffer` from `start` on.
+        """
+        self._terminator = terminator
+        self._overlap = length - 1
+        self._tail = buffer[max(len(buffer) - self._overlap, start):]
+
+    def _tokenize(self, final: bool) -> Iterator[Token]:
+        buffer = self._buffer
+        length = len(buffer)
+        offset = self._offset
+        while self._position < length:
+            position = self._position
+            if self._raw_text_element is not None:
+                name = self._raw_text_element
+                pattern = _raw_text_end(name)
+                match = pattern.search(buffer, max(position, self._resume))
+                self._resume = 0
+                if match is None:
+                    if not final:
+                        # The end tag is matched along with the character following its name.
+                        self._wait(pattern, len(name) + 3, buffer, position)
+                        return
+                    self.incomplete = True
+                    end = length
+                else:
+                    end = match.start()
+                self._raw_text_element = None
+                if end > position:
+                    text = buffer[position:end]
+                    if name in RCDATA_ELEMENTS:
+                        text = _decode(text)
+                    self._position = end
+                    yield Token(TokenType.CHARACTERS, data=text,
+                                start=offset+position, end=offset+end)
+                continue
+            lt = buffer.find('<', position)
+            if lt != position:
+                if lt == -1:
+                    end = length
+                    if not final:
+                        # Keep back a trailing character reference which may be cut.
+                        amp = buffer.rfind('&', position)
+                        if amp != -1 and ';' not in buffer[amp:]:
+                            end = amp
+                else:
+                    end = lt
+                if end == position:
+                    return
+                self._position = end
+                yield Token(TokenType.CHARACTERS,
+                            data=_decode(buffer[position:end]),
+                            start=offset+position, end=offset+end)
+                continue
+            token = self._tokenize_markup(buffer, position, final)
+            if token is None:
+                return
+            self._position = token.end - offset
+            if token.type == TokenType.START_TAG and token.name in RAW_TEXT_ELEMENTS:
+                self._raw_text_element = token.name
+            yield token
+        if final and self._raw_text_element is not None:
+            # The source ended right after the start tag of a raw text element.
+            self.incomplete = True
+
+    def _tokenize_markup(self,
+                         buffer: str,
+                         position: int,
+                         final: bool) -> Optional[Token]:
+        """Reads the markup starting with '<' at `position`.
+
+        Returns `None` if more source is needed to finish reading it.
+        """
+        offset = self._offset
+        length = len(buffer)
+        if length - position < 2 or (buffer.startswith('<!', position) and length - position < 9):
+            if not final:
+                return None
+        next_char = buffer[position+1:position+2]
+        if next_char == '!':
+            if buffer.startswith('<!--', position):
+                return self._read_until(buffer, position, position+4, '-->',
+                                        TokenType.COMMENT, final)
+            if buffer.startswith('<![CDATA[', position):
+                return self._read_until(buffer, position, position+9, ']]>',
+                                        TokenType.CDATA, final)
+            token = self._read_until(buffer, position, position+2, '>',
+                                     TokenType.COMMENT, final)
+            if token is not None and token.data[:7].lower() == 'doctype':
+                name = token.data[7:].strip().split(None, 1)
+                return token._replace(type=TokenType.DOCTYPE,
+                                      name=name[0].lower() if name else '')
+            return token
+        if next_char == '?':
+            return self._read_until(buffer, position, position+1, '>',
+                                    TokenType.COMMENT, final)
+        is_end_tag = next_char == '/'
+        name_match = TAG_NAME.match(buffer, position+2 if is_end_tag else position+1)
+        if name_match is None:
+            if is_end_tag and length - position < 3 and not final:
+                return None
+            if is_end_tag and buffer.startswith('</>', position):
+                return Token(TokenType.COMMENT, start=offset+position,
+                             end=offset+position+3)
+            if is_end_tag:
+                return self._read_until(buffer, position, position+2, '>',
+                                        TokenType.COMMENT, final)
+            # A lone '<' is just text.
+            return Token(TokenType.CHARACTERS, data='<', start=offset+position,
+                         end=offset+position+1)
+        rest_match = _TAG_REST.match(buffer, name_match.end())
+        if rest_match is None:
+            if not final:
+                return None
+            self.incomplete = True
+            return Token(TokenType.CHARACTERS, data=_decode(buffer[position:]),
+                         start=offset+position, end=offset+length)
+        name = name_match.group().lower()
+        end = rest_match.end()
+        if is_end_tag:
+            return Token(TokenType.END_TAG, name=name, start=offset+position,
+                         end=offset+end)
+        rest = rest_match.group()[:-1]
+        self_closing = rest.endswith('/')
+        attributes: List[Tuple[str, str]] = []
+        seen = set()
+        for attribute_match in _ATTRIBUTE.finditer(rest):
+            attribute_name, value = attribute_match.groups()
+            attribute_name = attribute_name.lower()
+            if attribute_name in seen:
+                continue
+            seen.add(attribute_name)
+            if value is None:
+                value = ''
+            elif value[:1] in ('"', "'"):
+                value = value[1:-1]
+            attributes.append((attribute_name, _decode(value)))
+        return Token(TokenType.START_TAG, name=name, attributes=tuple(attributes),
+                     self_closing=self_closing, start=offset+position,
+                     end=offset+end)
+
+    def _read_until(self,
+                    buffer: str,
+                    position: int,
+                    data_start: int,
+                    terminator: str,
+                    token_type: int,
+                    final: bool) -> Optional[Token]:
+        """Reads markup whose data runs from `data_start` up to `terminator`."""
+        data_end = buffer.find(terminator, max(data_start, self._resume))
+        self._resume = 0
+        if data_end == -1:
+            if not final:
+                self._wait(_literal(terminator), len(terminator), buffer, data_start)
+                return None
+            self.incomplete = True
+            data_end = end = len(buffer)
+        else:
+            end = data_end + len(terminator)
+        return Token(token_type, data=buffer[data_start:data_end],
+                     start=self._offset+position, end=self._offset+end)
+
+
+def tokenize(source: str) -> Iterator[Token]:
+    """Yields the tokens of a complete HTML `source`."""
+    tokenizer = Tokenizer()
+    yield from tokenizer.feed(source)
+    yield from tokenizer.close()